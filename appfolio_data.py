@@ -13,6 +13,9 @@ import requests
 from dotenv import load_dotenv
 import os
 import logging
+from dashboard_data import clean_csv, raw_export_path
+from telemetry import RunTelemetry
+from scraper_replay import Recorder
 load_dotenv()
 
 logging.basicConfig(
@@ -23,14 +26,18 @@ logging.basicConfig(
 
 
 # Define paths and credentials
-CHROMEDRIVER_PATH = r"C:\Users\SelengeTulga\Documents\chromedriver\chromedriver.exe"
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH", r"C:\Users\SelengeTulga\Documents\chromedriver\chromedriver.exe")
 LOGIN_URL = os.getenv('APPFOLIO_LOGIN_URL')
 USERNAME = os.getenv('APPFOLIO_USERNAME')
 PASSWORD = os.getenv('APPFOLIO_PASSWORD')
 WORK_ORDER_URL = os.getenv('WORK_ORDER_URL')
 VACANCY_URL = os.getenv('VACANCY_URL')
 
-BASE_DOWNLOAD_FOLDER = r"C:\Users\SelengeTulga\Documents\GitHub\appfolio-dashboard\data"
+BASE_DOWNLOAD_FOLDER = os.getenv("APPFOLIO_DOWNLOAD_FOLDER", r"C:\Users\SelengeTulga\Documents\GitHub\appfolio-dashboard\data")
+HEADLESS = os.getenv("APPFOLIO_HEADLESS", "0") == "1"
+
+# Set APPFOLIO_RECORD_DIR to save pages, CSVs and SMS responses for scraper_replay.py
+recorder = Recorder(os.getenv("APPFOLIO_RECORD_DIR"))
 
 # Define separate folders for each CSV type
 TENANT_FOLDER = os.path.join(BASE_DOWNLOAD_FOLDER, "tenant_data")
@@ -60,7 +67,7 @@ def get_latest_message():
             response = requests.get(API_URL, headers=headers, params=params)
             if response.status_code == 429:
                 print("Too many requests. Waiting 10 seconds before retrying...")
-                logging.info("Too many requests. Waiting 10 seconds before retrying...")
+                logging.warning("Too many requests. Waiting 10 seconds before retrying...")
                 time.sleep(10)  # Wait before retrying
                 continue
             response.raise_for_status()
@@ -70,10 +77,10 @@ def get_latest_message():
 
         except requests.RequestException as e:
             print(f"API Error: {e}")
-            logging.info(f"API Error: {e}")
+            logging.error(f"API Error: {e}")
 
     print("Failed to retrieve messages after multiple attempts.")
-    logging.info("Failed to retrieve messages after multiple attempts.")
+    logging.error("Failed to retrieve messages after multiple attempts.")
     return None
 
 
@@ -88,15 +95,16 @@ def wait_for_new_code(previous_message_id):
         if latest_message and latest_message["id"] != previous_message_id:
             match = re.search(r"\b\d{6}\b", latest_message["text"])  # Extract 6-digit code
             if match:
+                recorder.sms(latest_message)
                 return match.group(0)
         time.sleep(wait_interval)
 
     print(" Failed to retrieve a new verification code within the time limit.")
-    logging.info(" Failed to retrieve a new verification code within the time limit.")
+    logging.error(" Failed to retrieve a new verification code within the time limit.")
     return None
 
 def click_update_button(driver):
-    """Click the Columns tab, check the checkboxes, and click the Update button."""
+    """Click the Columns tab, check the checkboxes, and click the Update button. Returns True if it was clicked."""
     try:
         update_button = WebDriverWait(driver, 10).until(
             EC.element_to_be_clickable((By.XPATH, "//button[text()='Update']"))
@@ -104,14 +112,16 @@ def click_update_button(driver):
         update_button.click()
         print("Update button clicked successfully.")
         logging.info("Update button clicked successfully.")
+        return True
 
     except Exception as e:
         print(f"An error occurred: {e}")
-        logging.info(f"An error occurred: {e}")
+        logging.error(f"An error occurred: {e}")
+        return False
 
 
 def open_dropdown_and_click_csv(driver):
-    """Open dropdown and click the Export CSV button, and verify if it was successful."""
+    """Open dropdown and click the Export CSV button. Returns True if the export was started."""
     try:
         # Open the dropdown menu
         dropdown_button = WebDriverWait(driver, 10).until(
@@ -133,147 +143,182 @@ def open_dropdown_and_click_csv(driver):
         
         print("CSV export process initiated.")
         logging.info("CSV export process initiated.")
+        return True
 
     except Exception as e:
         print(f"An error occurred: {e}")
-        logging.info(f"An error occurred: {e}")
-
-def get_latest_csv(downloads_folder, max_wait_time=30):
-    """Retrieve the latest downloaded CSV file after waiting for it."""
+        logging.error(f"An error occurred: {e}")
+        return False
+
+def get_latest_csv(downloads_folder, max_wait_time=30, newer_than=None, poll_interval=0.5):
+    """
+    Wait for the downloaded CSV and return its path. With newer_than (a time.time() value,
+    e.g. when Export was clicked) only files written since then count, so a CSV left from
+    an earlier report isn't picked up. Chrome keeps a download as *.crdownload until it
+    completes, so a .csv file is never a partial download.
+    """
     print(" Waiting for CSV file to be downloaded...")
     logging.info(" Waiting for CSV file to be downloaded...")
-    
-    for _ in range(max_wait_time // 2):  # Check every 2 seconds, up to 30 seconds
-        files = os.listdir(downloads_folder)
-        csv_files = [f for f in files if f.endswith('.csv')]
+
+    deadline = time.time() + max_wait_time
+    while True:
+        csv_files = [os.path.join(downloads_folder, f) for f in os.listdir(downloads_folder) if f.endswith('.csv')]
+        if newer_than is not None:
+            csv_files = [path for path in csv_files if os.path.getmtime(path) >= newer_than]
         if csv_files:
-            latest_file = max([os.path.join(downloads_folder, f) for f in csv_files], key=os.path.getctime)
+            latest_file = max(csv_files, key=os.path.getmtime)
             print(f" Latest downloaded file: {latest_file}")
             logging.info(f" Latest downloaded file: {latest_file}")
             return latest_file
-        time.sleep(2)  # Wait before checking again
-    
-    raise FileNotFoundError(" No CSV files found in the downloads folder after waiting.")
-
-def clean_csv(file_path,file_prefix):
-    df = pd.read_csv(file_path)
-    df = df.iloc[1:]
-    df = df.iloc[:-2]
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_path = f'C:\\Users\\SelengeTulga\\Documents\\GitHub\\appfolio-dashboard\\data\\{file_prefix}_cleaned_{timestamp}.csv'
-    
-    df.to_csv(output_path, index=False, encoding='utf-8-sig')
-    print(f"CSV saved to: {output_path}")
-    logging.info(f"CSV saved to: {output_path}")
-
-def download_csv(driver, page_url, file_prefix, file_type):
-    """Navigate to a page, download CSV, and move it to the correct folder."""
+        if time.time() >= deadline:
+            break
+        time.sleep(poll_interval)  # Wait before checking again
+
+    raise FileNotFoundError(" No new CSV file found in the downloads folder after waiting.")
+
+def download_csv(driver, page_url, file_prefix, file_type, clean=True, telemetry=None):
+    """
+    Navigate to a page, download CSV, and move it to the correct folder.
+    With clean=False the raw export is kept as <prefix>-<timestamp>.csv for a later clean step.
+    Navigate / update / export / download are timed as telemetry steps for this report.
+    """
+    telemetry = telemetry or RunTelemetry()
     logging.info(f"Navigating to {page_url} and downloading CSV...")
-    driver.get(page_url)
+    with telemetry.step("navigate", report=file_prefix):
+        driver.get(page_url)
     time.sleep(3)
 
     if file_type  != 1:
-        date_input = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "filters_as_of_to")))
-        date_input.clear()
-
-        date_values = {
-            2: three_months_ago,
-            3: same_day_last_year,
-            4: beginning_of_year
-        }
-
-        if file_type in date_values:
-            date_input.send_keys(date_values[file_type])
+        with telemetry.step("set_date", report=file_prefix):
+            date_input = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "filters_as_of_to")))
+            date_input.clear()
+
+            date_values = {
+                2: three_months_ago,
+                3: same_day_last_year,
+                4: beginning_of_year
+            }
+
+            if file_type in date_values:
+                date_input.send_keys(date_values[file_type])
             
     # Click update and download CSV
-    click_update_button(driver)
+    with telemetry.step("update", report=file_prefix) as step:
+        step["ok"] = click_update_button(driver)
     time.sleep(3)
-    open_dropdown_and_click_csv(driver)
-    time.sleep(5)
-    
-    # Retrieve latest CSV and move it to the correct folder
-    latest_csv = get_latest_csv(BASE_DOWNLOAD_FOLDER)
+    recorder.page(file_prefix, driver.page_source)
+    clicked_at = time.time()
+    with telemetry.step("export", report=file_prefix) as step:
+        step["ok"] = open_dropdown_and_click_csv(driver)
+
+    # Wait for this export's CSV (timed from the click until the file is complete), then move it
+    with telemetry.step("download", report=file_prefix) as step:
+        latest_csv = get_latest_csv(BASE_DOWNLOAD_FOLDER, newer_than=clicked_at)
+        step["file"] = os.path.basename(latest_csv)
+        step["bytes"] = os.path.getsize(latest_csv)
+    recorder.report_csv(file_prefix, latest_csv)
     if latest_csv:
         print(f"[SUCCESS] CSV file ready: {latest_csv}")
         print(f"[SUCCESS] CSV URL: file://{os.path.abspath(latest_csv)}")
         logging.info(f"[SUCCESS] CSV file ready: {latest_csv}")
         logging.info(f"[SUCCESS] CSV URL: file://{os.path.abspath(latest_csv)}")
-        clean_csv(latest_csv, file_prefix)
-        success = True  # Mark as successful
+        if clean:
+            with telemetry.step("clean", report=file_prefix):
+                return clean_csv(latest_csv, file_prefix, BASE_DOWNLOAD_FOLDER)
+        raw_path = raw_export_path(BASE_DOWNLOAD_FOLDER, file_prefix)
+        os.replace(latest_csv, raw_path)
+        logging.info(f"Raw export saved to: {raw_path}")
+        return raw_path
     else:
         print("[ERROR] No CSV file was found or generated.")
-        logging.info("[ERROR] No CSV file was found or generated.")
+        logging.error("[ERROR] No CSV file was found or generated.")
 
 
 
-def get_data_from_appfolio():
+def get_data_from_appfolio(clean=True):
+    """Check if ChromeDriver is set up correctly, log in and download every report. Returns True on success."""
     logging.info("Started Appfolio data process")
-    """Check if ChromeDriver is set up correctly and perform login."""
+    telemetry = RunTelemetry()
     success = False  # Initialize success flag
     # Set up Chrome options
     options = Options()
     options.add_experimental_option("prefs", {"download.default_directory": BASE_DOWNLOAD_FOLDER})  # Set default download folder
+    if HEADLESS:
+        options.add_argument("--headless=new")
     service = Service(CHROMEDRIVER_PATH)
-    driver = webdriver.Chrome(service=service, options=options)
-
-    # Open login page
-    print("[INFO] Opening login page...")
-    logging.info("[INFO] Opening login page...")
-    driver.get(LOGIN_URL)
+    try:
+        with telemetry.step("driver_start"):
+            driver = webdriver.Chrome(service=service, options=options)
+    except Exception as e:
+        print(f" Could not start ChromeDriver: {e}")
+        logging.error(f" Could not start ChromeDriver: {e}")
+        telemetry.summary(False)
+        return False
 
     try:
-        # Wait for username field and enter credentials
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "user_email"))).send_keys(USERNAME)
-        print("[INFO] Entered username")
-        logging.info("[INFO] Entered username")
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "user_password"))).send_keys(PASSWORD)
-        print("[INFO] Entered password")
-        logging.info("[INFO] Entered password")
-        # Click login button
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.NAME, "commit"))).click()
-        print("[INFO] Clicked login button")
-        logging.info("[INFO] Clicked login button")
+        with telemetry.step("login"):
+            # Open login page
+            print("[INFO] Opening login page...")
+            logging.info("[INFO] Opening login page...")
+            driver.get(LOGIN_URL)
+            recorder.page("login", driver.page_source)
+
+            # Wait for username field and enter credentials
+            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "user_email"))).send_keys(USERNAME)
+            print("[INFO] Entered username")
+            logging.info("[INFO] Entered username")
+            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "user_password"))).send_keys(PASSWORD)
+            print("[INFO] Entered password")
+            logging.info("[INFO] Entered password")
+            # Click login button
+            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.NAME, "commit"))).click()
+            print("[INFO] Clicked login button")
+            logging.info("[INFO] Clicked login button")
         time.sleep(3)  # Wait for 2FA screen to load
 
         # Detect if 2FA is required
         if "verification_code" in driver.page_source:
             print("[INFO] 2-Step Verification detected. Retrieving verification code...")
             logging.info("[INFO] 2-Step Verification detected. Retrieving verification code...")
-            # Get the latest message ID **before** requesting a new code
-            previous_message = get_latest_message()
-            previous_message_id = previous_message["id"] if previous_message else None
-
-            # Click "Send Verification Code" button
-            WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//input[@value='Send Verification Code']"))
-            ).click()
-            print("[INFO] Requested verification code.")
-            logging.info("[INFO] Requested verification code.")
+            recorder.page("two_factor", driver.page_source)
+            with telemetry.step("2fa_request"):
+                # Get the latest message ID **before** requesting a new code
+                previous_message = get_latest_message()
+                previous_message_id = previous_message["id"] if previous_message else None
+
+                # Click "Send Verification Code" button
+                WebDriverWait(driver, 10).until(
+                    EC.element_to_be_clickable((By.XPATH, "//input[@value='Send Verification Code']"))
+                ).click()
+                print("[INFO] Requested verification code.")
+                logging.info("[INFO] Requested verification code.")
             # Wait for a new code that is different from the previous one
-            verification_code = wait_for_new_code(previous_message_id)
+            with telemetry.step("2fa_code_wait") as step:
+                verification_code = wait_for_new_code(previous_message_id)
+                step["ok"] = verification_code is not None
 
             if not verification_code:
                 print(" No new verification code received.")
-                logging.info("No new verification code received.")
+                logging.error("No new verification code received.")
                 driver.quit()
                 exit()
 
-            # Enter verification code
-            verification_input = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.ID, "user_verification_code"))
-            )
-            verification_input.click()
-            time.sleep(1)
-            verification_input.send_keys(verification_code)
-            print(f"Entered verification code: {verification_code}")
-            logging.info(f"Entered verification code: {verification_code}")
-            
-            # Click "Sign In" Button
-            sign_in_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.ID, "sign_in_button"))
-            )
-            sign_in_button.click()
+            with telemetry.step("2fa_submit"):
+                # Enter verification code
+                verification_input = WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.ID, "user_verification_code"))
+                )
+                verification_input.click()
+                time.sleep(1)
+                verification_input.send_keys(verification_code)
+                print(f"Entered verification code: {verification_code}")
+                logging.info(f"Entered verification code: {verification_code}")
+
+                # Click "Sign In" Button
+                sign_in_button = WebDriverWait(driver, 10).until(
+                    EC.element_to_be_clickable((By.ID, "sign_in_button"))
+                )
+                sign_in_button.click()
             print("Successfully submitted the verification code!")
             logging.info("Successfully submitted the verification code!")
 
@@ -283,39 +328,43 @@ def get_data_from_appfolio():
         
         time.sleep(3)  # Allow page to load
 
-        tenant_csv = download_csv(driver, LOGIN_URL, "tenant_data", 1)
+        tenant_csv = download_csv(driver, LOGIN_URL, "tenant_data", 1, clean=clean, telemetry=telemetry)
 
        # Download Tenant Data
-        three_month_csv = download_csv(driver, LOGIN_URL, "t_rent", 2)
+        three_month_csv = download_csv(driver, LOGIN_URL, "t_rent", 2, clean=clean, telemetry=telemetry)
 
         # Download Tenant Data
-        same_day_csv = download_csv(driver, LOGIN_URL, "same_day", 3)
+        same_day_csv = download_csv(driver, LOGIN_URL, "same_day", 3, clean=clean, telemetry=telemetry)
 
         # Download Tenant Data
-        beg_year_csv = download_csv(driver, LOGIN_URL, "beg_year", 4)
+        beg_year_csv = download_csv(driver, LOGIN_URL, "beg_year", 4, clean=clean, telemetry=telemetry)
 
         # Download Work Order Data
-        work_order_csv = download_csv(driver, WORK_ORDER_URL, "work_order", 1)
+        work_order_csv = download_csv(driver, WORK_ORDER_URL, "work_order", 1, clean=clean, telemetry=telemetry)
 
         # Download Vacancy Data
-        vacancy_csv = download_csv(driver, VACANCY_URL, "vacancy", 1)
+        vacancy_csv = download_csv(driver, VACANCY_URL, "vacancy", 1, clean=clean, telemetry=telemetry)
 
         success = True  # Mark as successful
     except Exception as e:
         print(f" An error occurred: {e}")
-        logging.info(f" An error occurred: {e}")
+        logging.error(f" An error occurred: {e}")
 
     finally:
         driver.quit()
+        telemetry.summary(success)
+        recorder.finish(telemetry)
         if success:
             logging.info("[SUCCESS] The entire process completed successfully.")
             print("[SUCCESS] The entire process completed successfully.")
         else:
-            logging.info("[ERROR] The process encountered an error.")
+            logging.error("[ERROR] The process encountered an error.")
             print("[ERROR] The process encountered an error.")
         time.sleep(3)
+    return success
 
 
 if __name__ == "__main__":
-        get_data_from_appfolio()
+        if not get_data_from_appfolio():
+            exit(1)
     
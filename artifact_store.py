@@ -0,0 +1,174 @@
+"""
+Versioned, atomically published chart images and metrics.
+
+Every render publishes one complete set (the report images, metrics.json and a
+manifest.json with sizes and hashes) into its own directory:
+
+    artifacts/<snapshot id>-<render time>/
+    artifacts/CURRENT          name of the version readers should use
+
+The set is written to a .staging-* directory first and renamed into place once
+complete, then CURRENT is swapped with os.replace, so a reader that goes through
+CURRENT (load_current) always gets images and metrics from one finished render of
+one snapshot. Rendering and PDF builds can overlap: readers keep whatever version they
+started with, and the last KEEP_VERSIONS versions stay on disk so a slow reader isn't
+pulled out from under. A render of an older snapshot is still written but doesn't
+take CURRENT away from a newer one. "Newer" comes from the manifests (snapshot time,
+then render time), not from the order of the version names.
+
+    python artifact_store.py          # show the published versions
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+from dashboard_data import snapshot_id, extract_timestamp_from_filename
+from pdf_report import image_extension, report_image_names, save_metrics
+
+ARTIFACT_DIR = os.path.join(os.getcwd(), "artifacts")
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+METRICS_FILE = "metrics.json"
+KEEP_VERSIONS = 5
+STALE_STAGING_S = 3600  # Staging dirs left behind by a crashed render are removed after this
+
+
+def current_version(artifact_dir=ARTIFACT_DIR):
+    """Name of the published version, None before the first publish."""
+    try:
+        with open(os.path.join(artifact_dir, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def current_path(name=MANIFEST_FILE, artifact_dir=ARTIFACT_DIR):
+    """Path of a file in the published version (None before the first publish)."""
+    version = current_version(artifact_dir)
+    return os.path.join(artifact_dir, version, name) if version else None
+
+
+def _read_manifest(version, artifact_dir=ARTIFACT_DIR):
+    try:
+        with open(os.path.join(artifact_dir, version, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _is_newer(manifest, than):
+    """A newer snapshot wins; renders of the same snapshot, or of one without a timestamp, by render time."""
+    a, b = manifest.get("snapshot_time"), than.get("snapshot_time")
+    if a and b and a != b:
+        return a > b
+    return manifest.get("created_at", "") > than.get("created_at", "")
+
+
+def list_versions(artifact_dir=ARTIFACT_DIR):
+    """Published version directories, oldest render first."""
+    if not os.path.isdir(artifact_dir):
+        return []
+    versions = [name for name in os.listdir(artifact_dir)
+                if not name.startswith(".") and os.path.isdir(os.path.join(artifact_dir, name))]
+    return sorted(versions, key=lambda version: _read_manifest(version, artifact_dir).get("created_at", ""))
+
+
+def _swap_current(artifact_dir, version):
+    tmp = os.path.join(artifact_dir, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(artifact_dir, CURRENT_FILE))
+
+
+def publish(files, images, metrics_data, artifact_dir=ARTIFACT_DIR):
+    """
+    Write images ({name: bytes}) and metrics_data for the snapshot of `files` as a new
+    version and point CURRENT at it. Returns the version directory.
+    """
+    sid = snapshot_id(files)
+    version = f"{sid}-{datetime.now():%Y%m%d_%H%M%S_%f}"
+    staging = os.path.join(artifact_dir, f".staging-{version}-{os.getpid()}")
+    os.makedirs(staging)
+
+    stamps = [extract_timestamp_from_filename(os.path.basename(path)) for path in files.values() if path]
+    stamps = [stamp for stamp in stamps if stamp != datetime.min]  # min: no timestamp in the name
+    manifest = {"version": version, "snapshot_id": sid,
+                "snapshot_time": max(stamps).isoformat() if stamps else None,
+                "created_at": datetime.now().isoformat(timespec="microseconds"),
+                "files": files, "images": {}}
+    for name, data in images.items():
+        file_name = f"{name}.{image_extension(data)}"
+        with open(os.path.join(staging, file_name), "wb") as f:
+            f.write(data)
+        manifest["images"][name] = {"file": file_name, "bytes": len(data), "sha1": hashlib.sha1(data).hexdigest()}
+    save_metrics(metrics_data, os.path.join(staging, METRICS_FILE))
+    with open(os.path.join(staging, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=4)
+
+    # Visible only once complete, then published with a single rename of the pointer
+    target = os.path.join(artifact_dir, version)
+    os.rename(staging, target)
+    current = current_version(artifact_dir)
+    if current is None or _is_newer(manifest, _read_manifest(current, artifact_dir)):
+        _swap_current(artifact_dir, version)
+        print(f"📦 Published artifacts {version}")
+    else:
+        print(f"📦 Wrote artifacts {version}, CURRENT stays on the newer {current}")
+    prune(artifact_dir)
+    return target
+
+
+def load_version(version, artifact_dir=ARTIFACT_DIR):
+    """{"version", "manifest", "images": {name: bytes}, "metrics": dict} for one published version."""
+    directory = os.path.join(artifact_dir, version)
+    with open(os.path.join(directory, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    images = {}
+    for name in report_image_names():
+        entry = manifest["images"].get(name)
+        if entry is None:
+            print(f"Image not found, skipping: {name} in {directory}")
+            continue
+        with open(os.path.join(directory, entry["file"]), "rb") as f:
+            images[name] = f.read()
+    with open(os.path.join(directory, METRICS_FILE)) as f:
+        metrics = json.load(f)
+    return {"version": version, "manifest": manifest, "images": images, "metrics": metrics}
+
+
+def load_current(artifact_dir=ARTIFACT_DIR):
+    """The published set, read through CURRENT once; None before the first publish."""
+    version = current_version(artifact_dir)
+    return load_version(version, artifact_dir) if version else None
+
+
+def prune(artifact_dir=ARTIFACT_DIR, keep=KEEP_VERSIONS):
+    """Remove all but the newest `keep` versions (never CURRENT) and stale staging directories."""
+    current = current_version(artifact_dir)
+    for version in list_versions(artifact_dir)[:-keep]:
+        if version != current:
+            shutil.rmtree(os.path.join(artifact_dir, version), ignore_errors=True)
+    for name in os.listdir(artifact_dir):
+        path = os.path.join(artifact_dir, name)
+        if name.startswith(".staging-") and time.time() - os.path.getmtime(path) > STALE_STAGING_S:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List published chart/metrics artifact versions")
+    parser.add_argument("--artifact-dir", default=ARTIFACT_DIR)
+    args = parser.parse_args()
+
+    current = current_version(args.artifact_dir)
+    for version in list_versions(args.artifact_dir):
+        with open(os.path.join(args.artifact_dir, version, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        size = sum(image["bytes"] for image in manifest["images"].values())
+        print(f"{'➡️ ' if version == current else '   '}{version}  {len(manifest['images'])} images, "
+              f"{size / 1024:,.1f} KB, created {manifest['created_at']}")
+    if current is None:
+        print("Nothing published yet.")
@@ -0,0 +1,196 @@
+"""
+Generate many dashboard PDFs in one run (one per property, owner or period).
+
+Usage:
+    python batch_reports.py --spec reports.json --workers 4
+    python batch_reports.py --split-by "Work Orders:Property" --workers 4
+
+A spec file lists the reports to build:
+    {
+        "reports": [
+            {"name": "topaz", "filters": {"Work Orders": {"Property": "TOPAZ HOUSE ..."}}},
+            {"name": "march", "data_dir": "data/2025-03"}
+        ]
+    }
+
+Charts that come out identical across reports (e.g. a table no filter touches)
+are rendered once and shared by every PDF that uses them.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from dashboard_data import BASE_DIR, find_latest_files, load_data, prepare_data, filter_data, compute_metrics
+from dashboard_charts import build_figures, figure_key
+from pdf_report import render_images, build_pdf, report_image_names, TARGET_DPI
+
+OUTPUT_DIR = "reports"
+SUMMARY_FILE = "batch_summary.json"
+
+
+def report_filename(name, unique=False):
+    """
+    Safe file name for a report, e.g. 'TOPAZ HOUSE - 4400 E' -> 'topaz-house-4400-e.pdf'.
+    unique=True adds a short hash of the name, for names that slugify to the same file.
+    """
+    slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "report"
+    if unique:
+        slug += "-" + hashlib.sha1(name.encode("utf-8")).hexdigest()[:8]
+    return f"{slug}.pdf"
+
+
+def split_jobs(split_by, base_dir=BASE_DIR):
+    """One job per distinct value of a column, e.g. split_by="Work Orders:Property"."""
+    category, column = split_by.split(":", 1)
+    dfs = load_data(find_latest_files(base_dir))
+    values = sorted(dfs[category][column].dropna().unique())
+    return [{"name": str(value), "filters": {category: {column: value}}} for value in values]
+
+
+def report_outputs(jobs, output_dir=OUTPUT_DIR):
+    """
+    PDF path per job: its "output" if set, else <output_dir>/<report_filename(name)>.
+    Names that slugify alike ("A/B" and "A-B") get a hash suffix, and a path used twice a
+    number, so no two jobs overwrite each other's PDF (from --split-by or a --spec file).
+    """
+    taken = Counter(report_filename(job["name"]) for job in jobs if not job.get("output"))
+    outputs, used = [], set()
+    for job in jobs:
+        output = job.get("output") or os.path.join(output_dir, report_filename(
+            job["name"], unique=taken[report_filename(job["name"])] > 1))
+        base, ext = os.path.splitext(output)
+        n = 1
+        while output in used:  # Same name twice in a spec
+            n += 1
+            output = f"{base}-{n}{ext}"
+        used.add(output)
+        outputs.append(output)
+    return outputs
+
+
+def _render_asset(name, fig, dpi):
+    start = time.perf_counter()
+    data = render_images({name: fig}, dpi=dpi)[name]
+    return data, time.perf_counter() - start
+
+
+def _build_report(images, metrics_data, output):
+    start = time.perf_counter()
+    pdf_bytes = build_pdf(images, metrics_data, output=output)
+    return len(pdf_bytes), time.perf_counter() - start
+
+
+def run_batch(jobs, workers=None, output_dir=OUTPUT_DIR, dpi=TARGET_DPI, today=None):
+    """
+    Build every report in `jobs` and return a per-report timing summary.
+
+    1. Prepare metrics and figures for each job (pandas, in this process; loaded
+       snapshots are shared between jobs that read the same files).
+    2. Render each distinct figure once in the process pool.
+    3. Assemble the PDFs in the process pool.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    batch_start = time.perf_counter()
+    wanted = set(report_image_names())
+
+    loaded = {}  # data_dir / files -> prepared DataFrames
+    prepared_jobs = []
+    assets = {}  # (image name, figure key) -> figure
+    for job, output in zip(jobs, report_outputs(jobs, output_dir)):
+        start = time.perf_counter()
+        files = job.get("files") or find_latest_files(job.get("data_dir", BASE_DIR))
+        cache_key = json.dumps(files, sort_keys=True)
+        if cache_key not in loaded:
+            loaded[cache_key] = prepare_data(load_data(files))
+        dfs = filter_data(loaded[cache_key], job.get("filters"))
+
+        figures = {name: fig for name, fig in build_figures(dfs, today=today).items() if name in wanted}
+        keys = {}
+        for name, fig in figures.items():
+            keys[name] = (name, figure_key(fig))
+            assets.setdefault(keys[name], fig)
+
+        prepared_jobs.append({
+            "name": job["name"],
+            "output": output,
+            "metrics": compute_metrics(dfs),
+            "keys": keys,
+            "prepare_s": time.perf_counter() - start,
+        })
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        render_futures = {key: pool.submit(_render_asset, key[0], fig, dpi) for key, fig in assets.items()}
+        rendered = {key: future.result() for key, future in render_futures.items()}
+
+        build_futures = []
+        for job in prepared_jobs:
+            images = {name: rendered[key][0] for name, key in job["keys"].items()}
+            build_futures.append(pool.submit(_build_report, images, job["metrics"], job["output"]))
+
+        # How many reports use each asset, to split shared render time fairly
+        users = {}
+        for job in prepared_jobs:
+            for key in job["keys"].values():
+                users[key] = users.get(key, 0) + 1
+
+        summary_reports = []
+        for job, future in zip(prepared_jobs, build_futures):
+            pdf_size, build_s = future.result()
+            render_s = sum(rendered[key][1] / users[key] for key in job["keys"].values())
+            summary_reports.append({
+                "name": job["name"],
+                "output": job["output"],
+                "pdf_bytes": pdf_size,
+                "shared_assets": sum(1 for key in job["keys"].values() if users[key] > 1),
+                "prepare_s": round(job["prepare_s"], 3),
+                "render_s": round(render_s, 3),
+                "build_s": round(build_s, 3),
+                "total_s": round(job["prepare_s"] + render_s + build_s, 3),
+            })
+
+    return {
+        "reports": summary_reports,
+        "report_count": len(summary_reports),
+        "unique_assets": len(assets),
+        "workers": workers or os.cpu_count(),
+        "wall_s": round(time.perf_counter() - batch_start, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate dashboard PDFs in parallel")
+    parser.add_argument("--spec", help="JSON file with a 'reports' list")
+    parser.add_argument("--split-by", help='One report per value, e.g. "Work Orders:Property"')
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--dpi", type=int, default=TARGET_DPI)
+    parser.add_argument("--summary", default=None, help=f"Timing summary path (default: <output-dir>/{SUMMARY_FILE})")
+    args = parser.parse_args()
+
+    if args.spec:
+        with open(args.spec, "r") as f:
+            jobs = json.load(f)["reports"]
+    elif args.split_by:
+        jobs = split_jobs(args.split_by)
+    else:
+        parser.error("Pass --spec or --split-by")
+
+    summary = run_batch(jobs, workers=args.workers, output_dir=args.output_dir, dpi=args.dpi)
+
+    summary_file = args.summary or os.path.join(args.output_dir, SUMMARY_FILE)
+    with open(summary_file, "w") as f:
+        json.dump(summary, f, indent=4)
+
+    for report in summary["reports"]:
+        print(f"{report['name']}: {report['total_s']:.2f}s -> {report['output']}")
+    print(f"Built {summary['report_count']} reports ({summary['unique_assets']} unique charts) "
+          f"in {summary['wall_s']:.2f}s with {summary['workers']} workers. Summary: {summary_file}")
+
+
+if __name__ == "__main__":
+    main()
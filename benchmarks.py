@@ -0,0 +1,146 @@
+"""
+Scaling benchmarks on synthetic exports.
+
+For each portfolio size, writes raw exports with synthetic_data and times the steps
+the dashboard and the PDF report go through:
+  clean      clean_csv on every raw export
+  load       find_latest_files + load_data
+  aggregate  prepare_data + compute_metrics + combined_summary
+  charts     build_figures (Plotly figure construction)
+  render     render_images (Kaleido; recorded as an error when no browser is available)
+  pdf        build_pdf from the rendered images
+Results (seconds, rows per report, peak memory where available) go to
+benchmarks/results-<timestamp>.json so runs can be compared.
+
+    python benchmarks.py                          # 10k, 100k and 1M units
+    python benchmarks.py --scales 10000 --keep-data
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from dashboard_data import find_latest_files, clean_csv, load_data, prepare_data, compute_metrics, combined_summary
+from synthetic_data import generate_exports
+
+BENCH_DATA_DIR = "bench_data"
+RESULTS_DIR = "benchmarks"
+DEFAULT_SCALES = [10_000, 100_000, 1_000_000]
+
+
+def _peak_rss_mb():
+    try:
+        import resource  # Unix only
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def timed(results, name, func, *args, **kwargs):
+    """Run func, store its wall time (or the error) under results[name] and return its result."""
+    start = time.perf_counter()
+    try:
+        value = func(*args, **kwargs)
+    except Exception as e:
+        results[name] = {"seconds": round(time.perf_counter() - start, 3), "error": f"{type(e).__name__}: {e}"}
+        print(f"   ❌ {name}: {e}")
+        return None
+    results[name] = {"seconds": round(time.perf_counter() - start, 3)}
+    print(f"   ⏱️ {name}: {results[name]['seconds']:.2f}s")
+    return value
+
+
+def run_scale(n_units, data_dir, work_order_years=3, seed=0):
+    """Generate exports for n_units and time every step. Returns this scale's result dict."""
+    print(f"📦 {n_units:,} units")
+    steps = {}
+    shutil.rmtree(data_dir, ignore_errors=True)
+    raw = timed(steps, "generate", generate_exports, n_units, data_dir, seed=seed, work_order_years=work_order_years)
+    if raw is None:
+        return {"units": n_units, "steps": steps}
+
+    timed(steps, "clean", lambda: [clean_csv(path, prefix, data_dir) for prefix, path in raw.items()])
+    dfs = timed(steps, "load", lambda: load_data(find_latest_files(data_dir)))
+    rows = {name: len(df) for name, df in (dfs or {}).items()}
+
+    def aggregate():
+        prepared = prepare_data(dfs)
+        compute_metrics(prepared)
+        combined_summary(prepared)
+        return prepared
+
+    prepared = timed(steps, "aggregate", aggregate) if dfs else None
+    if prepared is not None:
+        from dashboard_charts import build_figures
+        from pdf_report import report_image_names, render_images, build_pdf
+
+        figures = timed(steps, "charts", build_figures, prepared)
+        images = None
+        if figures is not None:
+            wanted = set(report_image_names())
+            images = timed(steps, "render", render_images, {name: fig for name, fig in figures.items() if name in wanted})
+        if images is not None:
+            timed(steps, "pdf", build_pdf, images, compute_metrics(prepared))
+
+    return {"units": n_units, "rows": rows, "steps": steps, "peak_rss_mb": _peak_rss_mb()}
+
+
+def environment():
+    versions = {}
+    for module in ["pandas", "numpy", "plotly", "kaleido", "fpdf"]:
+        try:
+            versions[module] = getattr(__import__(module), "__version__", "?")
+        except ImportError:
+            versions[module] = None
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "packages": versions}
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, data_dir=BENCH_DATA_DIR, keep_data=False, work_order_years=3, seed=0):
+    results = {"started": datetime.now().isoformat(timespec="seconds"), "environment": environment(), "scales": []}
+    for n_units in scales:
+        scale_dir = os.path.join(data_dir, f"{n_units}")
+        results["scales"].append(run_scale(n_units, scale_dir, work_order_years, seed))
+        if not keep_data:
+            shutil.rmtree(scale_dir, ignore_errors=True)
+    return results
+
+
+def save_results(results, output=None):
+    output = output or os.path.join(RESULTS_DIR, f"results-{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=4)
+    print(f"✅ Results saved to {output}")
+    return output
+
+
+def print_summary(results):
+    table = pd.DataFrame({
+        f"{scale['units']:,}": {step: (timing["seconds"] if "error" not in timing else "error")
+                                for step, timing in scale["steps"].items()}
+        for scale in results["scales"]
+    })
+    print(table.to_string())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time load/clean/aggregate/charts/PDF on synthetic data")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="Portfolio sizes in units")
+    parser.add_argument("--work-order-years", type=float, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=BENCH_DATA_DIR)
+    parser.add_argument("--keep-data", action="store_true", help="Keep the generated exports")
+    parser.add_argument("--output", default=None, help="JSON file (default: benchmarks/results-<timestamp>.json)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.scales, args.data_dir, args.keep_data, args.work_order_years, args.seed)
+    print_summary(results)
+    save_results(results, args.output)
@@ -0,0 +1,528 @@
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import hashlib
+from matplotlib.figure import Figure
+from matplotlib.text import Text
+
+from dashboard_data import combined_summary
+
+
+def table_figure(df):
+    """Render a DataFrame as a matplotlib table (used for the BD/BA comparison in the PDF)."""
+    fig = Figure(figsize=(12, max(1.2, len(df) * 0.3)))  # Min height control
+    ax = fig.subplots()
+    ax.axis('tight')
+    ax.axis('off')
+
+    table = ax.table(cellText=df.values,
+                     colLabels=df.columns,
+                     loc='center',
+                     cellLoc='center')
+
+    table.auto_set_font_size(False)
+    table.set_fontsize(12)
+    table.auto_set_column_width([i for i in range(len(df.columns))])  # Adjust column width
+
+    fig.tight_layout()
+    return fig
+
+
+def avg_rent_figure(tenant_df):
+    # Drop invalid rows where Rent or Market Rent is NaN
+    filtered_df = tenant_df.dropna(subset=["Rent", "Market Rent"])
+
+    # Group by BD/BA and Calculate Avg Rent and Market Rent
+    avg_rent_df = filtered_df.groupby("BD/BA")[["Rent", "Market Rent"]].mean().round(0).reset_index()
+
+    # Count the number of units per BD/BA
+    unit_count_df = filtered_df.groupby("BD/BA").size().reset_index(name="Unit Count")
+
+    # Merge DataFrames to align BD/BA categories
+    final_df = avg_rent_df.merge(unit_count_df, on="BD/BA")
+
+    # Create figure with Bar Chart for Rent & Market Rent
+    fig3 = go.Figure()
+
+    # Add Rent bars
+    fig3.add_trace(go.Bar(
+        x=final_df["BD/BA"],
+        y=final_df["Rent"],
+        name="Avg Rent",
+        marker_color="blue",
+        text=final_df["Rent"],
+        textposition="auto"
+    ))
+
+    # Add Market Rent bars
+    fig3.add_trace(go.Bar(
+        x=final_df["BD/BA"],
+        y=final_df["Market Rent"],
+        name="Avg Market Rent",
+        marker_color="green",
+        text=final_df["Market Rent"],
+        textposition="auto"
+    ))
+
+    # Add Line Chart for Unit Count (Secondary Y-Axis)
+    fig3.add_trace(go.Scatter(
+        x=final_df["BD/BA"],
+        y=final_df["Unit Count"],
+        name="Unit Count",
+        mode="lines+markers",
+        yaxis="y2",
+        line=dict(color="red", width=2),
+        marker=dict(size=8, symbol="circle"),
+    ))
+
+    fig3.update_layout(
+        title="📊 Avg Rent vs. Market Rent with Unit Count by BD/BA",
+        xaxis=dict(
+            title=dict(text="Bedroom/Bathroom"),
+            tickangle=-45,
+            tickfont=dict(size=12)
+        ),
+        yaxis=dict(
+            title=dict(text="Amount ($)"),
+            gridcolor="lightgray"
+        ),
+        yaxis2=dict(
+            title=dict(text="Unit Count"),
+            overlaying="y",
+            side="right",
+            showgrid=False
+        ),
+        legend=dict(title=dict(text="Legend")),
+        width=1000, height=600,
+        bargap=0.15,  # Reduce gap between bars
+        barmode="group"
+    )
+    return fig3
+
+
+def status_pie_figure(df, column, title, hole=0.4, colors=px.colors.qualitative.Set3, legend=None, margin=None):
+    """Donut chart of value counts for a status-like column."""
+    status_counts = df[column].value_counts().reset_index()
+    status_counts.columns = [column, "Count"]
+    return status_counts_pie_figure(status_counts, column, title, hole, colors, legend, margin)
+
+
+def status_counts_pie_figure(status_counts, column, title, hole=0.4, colors=px.colors.qualitative.Set3, legend=None, margin=None):
+    """Donut chart from a [column, "Count"] table, largest first."""
+    fig = px.pie(status_counts,
+                 values="Count",
+                 names=column,
+                 title=title,
+                 hole=hole,  # Creates a donut-style pie chart
+                 color_discrete_sequence=colors)  # Custom colors
+
+    # 🔹 Improve Layout & Style
+    fig.update_layout(width=800, height=600)
+    if margin:
+        fig.update_layout(margin=margin)
+
+    # 🔹 Customize Legend
+    fig.update_layout(legend=legend or dict(
+        font=dict(size=14),  # Bigger font for legend
+        x=1, y=0.9,  # Position legend to the right
+        xanchor="right"
+    ))
+
+    # 🔹 Show Percentages & Labels
+    fig.update_traces(
+        textinfo="percent+label",  # Display both labels and percentages
+        pull=[0.1 if i == 0 else 0 for i in range(len(status_counts))],  # Slightly pull out the first slice
+    )
+    return fig
+
+
+def tenant_status_figure(tenant_df):
+    return status_pie_figure(tenant_df, "Status", "🏠 Tenant Status Distribution")
+
+
+def work_order_type_figure(work_orders):
+    type_counts = work_orders["Work Order Type"].value_counts().reset_index()
+    type_counts.columns = ["Work Order Type", "Count"]
+    return work_order_type_counts_figure(type_counts)
+
+
+def work_order_type_counts_figure(type_counts):
+    """Work order type donut from a ["Work Order Type", "Count"] table."""
+    return status_counts_pie_figure(
+        type_counts, "Work Order Type", "🏠 Work Order Type Distribution",
+        hole=0.3,  # Donut chart effect
+        colors=px.colors.sequential.Viridis,  # Custom color scale
+        legend=dict(
+            font=dict(size=14),  # Bigger legend font
+            orientation="h",  # Horizontal legend
+            x=0.5, y=-0.2,  # Centered below chart
+            xanchor="center"
+        ),
+    )
+
+
+def unit_status_figure(vacancies):
+    return status_pie_figure(vacancies, "Unit Status", "🏠 Unit Status Distribution",
+                             margin=dict(l=50, r=50, t=50, b=50))
+
+
+def late_payment_figure(tenant_df):
+    df_filtered = tenant_df.dropna(subset=["Tenant", "Late Count"]).copy()
+
+    # **Convert "Late Count" to numeric**
+    df_filtered["Late Count"] = pd.to_numeric(df_filtered["Late Count"], errors="coerce")
+    df_filtered = df_filtered[df_filtered["Late Count"] > 2]
+    df_filtered = df_filtered.sort_values(by="Late Count", ascending=False)
+
+    # **Create Bar Chart**
+    fig1 = px.bar(df_filtered, x="Tenant", y="Late Count",
+                  title="📊 Late Payment Frequency by Tenant",
+                  labels={"Late Count": "Late Payment Count", "Tenant": "Tenant Name"},
+                  color="Late Count",
+                  text_auto=True,
+                  color_continuous_scale="Blues")
+    fig1.update_layout(
+        height=600, width=1000,  # Bigger figure
+        margin=dict(l=50, r=50, t=50, b=150)  # Adjust margins
+    )
+
+    # 🔹 Rotate x-axis labels
+    fig1.update_xaxes(tickangle=-45)
+    return fig1
+
+
+def work_order_issue_figure(work_orders):
+    df_filtered = work_orders.dropna(subset=["Work Order Issue"])
+
+    # **Count work order frequency per unit**
+    work_order_issue_counts = df_filtered["Work Order Issue"].value_counts().reset_index()
+    work_order_issue_counts.columns = ["Work Order Issue", "Work Order Issue Count"]  # Rename columns
+    return work_order_issue_counts_figure(work_order_issue_counts)
+
+
+def work_order_issue_counts_figure(work_order_issue_counts):
+    """Top-20 issue bar chart from a ["Work Order Issue", "Work Order Issue Count"] table."""
+    # **Sort by Work Order Count in Descending Order & Show Top 20**
+    work_order_issue_counts = work_order_issue_counts.sort_values(by="Work Order Issue Count", ascending=True).tail(20)
+
+    fig6 = px.bar(
+        work_order_issue_counts,
+        x="Work Order Issue Count",
+        y="Work Order Issue",
+        title="📊 Work Order Frequency by Issue",
+        labels={"Work Order Issue Count": "Work Order Issue Count", "Work Order Issue": "Work Order Issue"},
+        color="Work Order Issue Count",
+        color_continuous_scale="Viridis",  # Gradient color
+        text_auto=True,
+        orientation='h'  # Horizontal bars
+    )
+
+    # 🔹 Improve Layout & Style
+    fig6.update_layout(
+        width=1100, height=600,  # Bigger size
+        coloraxis_showscale=False,  # Hide the color scale bar
+        margin=dict(t=50, b=50, l=200, r=50)  # Adjust margins to give more space
+    )
+
+    # 🔹 Customize X-Axis
+    fig6.update_xaxes(
+        title_text="Work Order Issue Count",
+        tickangle=0,  # Keep horizontal for clarity
+        showgrid=True,
+        gridcolor="lightgray"
+    )
+
+    # 🔹 Customize Y-Axis
+    fig6.update_yaxes(
+        title_text="Work Order Issue",
+        showgrid=False,  # Remove grid to keep it clean
+        tickmode="array",  # Ensure that each label is spaced out properly
+    )
+    fig6.update_traces(
+        textposition="outside",  # Position text outside the bars
+        textfont=dict(size=12),  # Reduce font size to prevent overlap
+    )
+    return fig6
+
+
+def days_vacant_figure(vacancies):
+    # Drop missing values
+    df_filtered1 = vacancies.dropna(subset=["Bed/Bath", "Days Vacant"])
+
+    # Aggregate data: Calculate average "Days Vacant" per "Bed/Bath"
+    df_avg_vacancy = df_filtered1.groupby("Bed/Bath", as_index=False)["Days Vacant"].mean().round(1)
+
+    # Aggregate data: Count the number of units per "Bed/Bath"
+    df_units_count = df_filtered1.groupby("Bed/Bath", as_index=False).size()
+
+    # Merge both datasets for consistency in sorting
+    df_combined = df_avg_vacancy.merge(df_units_count, on="Bed/Bath").sort_values(by="Bed/Bath")
+
+    # Create Bar Chart for "Avg Days Vacant"
+    fig8 = go.Figure()
+
+    fig8.add_trace(
+        go.Bar(
+            x=df_combined["Bed/Bath"],
+            y=df_combined["Days Vacant"],
+            name="Avg Days Vacant",
+            marker=dict(color=df_combined["Days Vacant"], colorscale="Blugrn"),  # Color scale
+            text=df_combined["Days Vacant"],
+            textposition="auto"
+        )
+    )
+
+    # Add Line Chart for "Number of Units"
+    fig8.add_trace(
+        go.Scatter(
+            x=df_combined["Bed/Bath"],
+            y=df_combined["size"],  # Number of units
+            name="Number of Units",
+            mode="lines+markers",
+            line=dict(color="red", width=2),
+            marker=dict(size=8, symbol="circle"),
+            yaxis="y2"  # Use secondary y-axis
+        )
+    )
+
+    # 🔹 Improve Layout & Style
+    fig8.update_layout(
+        title="📊 Average Days Vacant & Number of Units by Bed/Bath",
+        xaxis=dict(title="Bedroom/Bathroom", title_font=dict(size=14), tickfont=dict(size=12)),
+        yaxis=dict(title="Avg Days Vacant", title_font=dict(size=14), tickfont=dict(size=12), gridcolor="lightgray"),
+        yaxis2=dict(
+            title="Number of Units",
+            overlaying="y",
+            side="right",
+            showgrid=False,
+            title_font=dict(size=14),
+            tickfont=dict(size=12),
+        ),
+        legend=dict(title="Metrics", font=dict(size=12)),
+        width=1000, height=600,  # Bigger size
+        margin=dict(l=50, r=50, t=50, b=50)
+    )
+    return fig8
+
+
+def unit_type_status_figure(vacancies):
+    # Drop rows missing key info
+    df3 = vacancies.dropna(subset=["Bed/Bath", "Unit Status"])
+
+    # Group by unit type and status
+    status_counts = df3.groupby(["Bed/Bath", "Unit Status"]).size().unstack(fill_value=0)
+    status_counts = status_counts.reset_index()
+
+    # Create a stacked bar chart
+    fig7 = go.Figure()
+    custom_colors = {
+        "Vacant-Unrented": "#72c0a7",  # Deep orange
+        "Vacant-Rented": "#1E90FF",  # Blue
+        "Notice-Unrented": "#87CEFA"  # Light blue
+    }
+    # Loop through each status column to stack bars
+    for status in status_counts.columns[1:]:
+        fig7.add_trace(go.Bar(
+            x=status_counts["Bed/Bath"],
+            y=status_counts[status],
+            name=status,
+            marker=dict(color=custom_colors.get(status, "#CCCCCC")),  # Apply color here
+            text=status_counts[status],  # Add data labels
+        ))
+
+    # Customize layout
+    fig7.update_layout(
+        barmode="stack",
+        title="🏘️ Unit Type Breakdown by Status",
+        xaxis_title="Unit Type (BD/BA)",
+        yaxis_title="Number of Units",
+        width=1000,
+        height=600,
+        legend_title="Unit Status",
+        margin=dict(l=40, r=40, t=60, b=40)
+    )
+    return fig7
+
+
+def move_in_out_figure(vacancies, today=None, days=60):
+    # Today's date (pass one in for reproducible reports)
+    today = pd.Timestamp.today() if today is None else pd.Timestamp(today)
+    future_cutoff = today + pd.Timedelta(days=days)
+
+    # Parse the relevant date columns
+    last_move_out = pd.to_datetime(vacancies["Last Move Out"], errors="coerce")
+    next_move_in = pd.to_datetime(vacancies["Next Move In"], errors="coerce")
+
+    # Filter for the upcoming window
+    upcoming_move_outs = last_move_out[(last_move_out >= today) & (last_move_out <= future_cutoff)]
+    upcoming_move_ins = next_move_in[(next_move_in >= today) & (next_move_in <= future_cutoff)]
+
+    # Count per day
+    move_summary_df = pd.DataFrame({
+        "Last Move Out": upcoming_move_outs.dt.date.value_counts().sort_index(),
+        "Next Move In": upcoming_move_ins.dt.date.value_counts().sort_index()
+    }).fillna(0)
+
+    # Convert index to a string Date column for plotting
+    move_summary_df.index = move_summary_df.index.astype(str)
+    move_summary_df = move_summary_df.rename_axis("Date").reset_index()
+
+    fig10 = px.bar(
+        move_summary_df,
+        x="Date",
+        y=["Last Move Out", "Next Move In"],
+        title=f"📊 Upcoming Move-Outs and Move-Ins (Next {days} Days)",
+        labels={"value": "Count of Units"},
+        barmode="group",
+        text_auto=True,
+        color_discrete_sequence=["#EF553B", "#636EFA"]  # Red & Blue
+    )
+
+    fig10.update_layout(
+        xaxis=dict(title="Date", tickangle=45),
+        yaxis=dict(title="Count of Units", gridcolor="lightgray"),
+        width=1000, height=600,
+        margin=dict(l=50, r=50, t=50, b=50)
+    )
+    return fig10
+
+
+def trend_figure(ts, metric="Occupancy Rate"):
+    """Line per BD/BA (plus Total) of one time-series column over the snapshots in ts."""
+    fig = px.line(
+        ts,
+        x="As Of",
+        y=metric,
+        color="BD/BA",
+        markers=True,
+        title=f"📈 {metric} by BD/BA",
+    )
+    fig.update_traces(selector=dict(name="Total"), line=dict(width=4, color="black"))
+    fig.update_layout(
+        xaxis=dict(title="Snapshot"),
+        yaxis=dict(title=metric, gridcolor="lightgray"),
+        width=1000, height=500,
+        margin=dict(l=50, r=50, t=50, b=50)
+    )
+    return fig
+
+
+def forecast_figure(projected, horizon):
+    """Projected occupancy rate per BD/BA (Total in bold) from forecast.forecast_occupancy."""
+    fig = px.line(
+        projected,
+        x="Date",
+        y="Occupancy Rate",
+        color="BD/BA",
+        title=f"🔮 Projected Occupancy (Next {horizon} Days)",
+        hover_data=["Occupied", "Units"],
+    )
+    fig.update_traces(selector=dict(name="Total"), line=dict(width=4, color="black"))
+    fig.update_layout(
+        xaxis=dict(title="Date"),
+        yaxis=dict(title="Occupancy Rate (%)", gridcolor="lightgray"),
+        width=1000, height=500,
+        margin=dict(l=50, r=50, t=50, b=50)
+    )
+    return fig
+
+
+def rent_simulation_figure(summary):
+    """Fan chart of simulated monthly rent rolls (P5-P95 and P25-P75 bands, median line)."""
+    fig = go.Figure()
+    for low, high, color, name in [("P5", "P95", "rgba(99,110,250,0.15)", "5th-95th pct"),
+                                   ("P25", "P75", "rgba(99,110,250,0.35)", "25th-75th pct")]:
+        fig.add_trace(go.Scatter(x=summary["Month"], y=summary[high], line=dict(width=0), showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(x=summary["Month"], y=summary[low], line=dict(width=0), fill="tonexty",
+                                 fillcolor=color, name=name))
+    fig.add_trace(go.Scatter(x=summary["Month"], y=summary["P50"], mode="lines+markers",
+                             line=dict(color="#636EFA", width=3), name="Median"))
+    fig.update_layout(
+        title="📈 Projected Monthly Rent Roll (Simulated)",
+        xaxis=dict(title="Month"),
+        yaxis=dict(title="Rent Roll ($)", gridcolor="lightgray", tickprefix="$"),
+        width=1000, height=500,
+        margin=dict(l=50, r=50, t=50, b=50)
+    )
+    return fig
+
+
+def work_order_aging_figure(aging):
+    """Stacked bars of open work orders per age bucket (work_order_sla.aging_table output)."""
+    aging_long = aging.reset_index().melt(id_vars=aging.index.name, var_name="Age", value_name="Open Work Orders")
+    fig = px.bar(
+        aging_long,
+        x="Age",
+        y="Open Work Orders",
+        color=aging.index.name,
+        title=f"⏱️ Open Work Order Aging by {aging.index.name}",
+        text_auto=True,
+        color_discrete_sequence=px.colors.qualitative.Set2,
+    )
+    fig.update_layout(
+        barmode="stack",
+        xaxis=dict(title="Age"),
+        yaxis=dict(title="Open Work Orders", gridcolor="lightgray"),
+        width=1000, height=500,
+        margin=dict(l=50, r=50, t=50, b=50)
+    )
+    return fig
+
+
+def histogram_figure(hist, stat="Count"):
+    """Bar chart of one histograms.Histogram: "Count" or "Avg <value column>" per bin."""
+    frame = hist.to_frame()
+    fig = px.bar(
+        frame,
+        x="Bin",
+        y=stat,
+        title=f"📊 {stat} by {hist.column}",
+        labels={"Bin": hist.column},
+        hover_data=["Count"],
+        color=stat,
+        text_auto=True,
+        color_continuous_scale="Viridis",
+    )
+    fig.update_layout(
+        width=1000, height=500,
+        coloraxis_showscale=False,
+        xaxis=dict(title=hist.column, tickangle=-45),
+        yaxis=dict(title=stat, gridcolor="lightgray"),
+        margin=dict(l=50, r=50, t=50, b=100)
+    )
+    return fig
+
+
+def build_figures(dfs, today=None):
+    """
+    Every chart the dashboard exports, keyed by its image name in plotly_images/.
+    Expects prepare_data output.
+    """
+    tenant_df = dfs["Tenant Data"]
+    work_orders = dfs["Work Orders"]
+    vacancies = dfs["Vacancies"]
+
+    return {
+        "combined_summary": table_figure(combined_summary(dfs)),
+        "avg_rent": avg_rent_figure(tenant_df),
+        "status": tenant_status_figure(tenant_df),
+        "late": late_payment_figure(tenant_df),
+        "order-type": work_order_type_figure(work_orders),
+        "order-issue": work_order_issue_figure(work_orders),
+        "unit-count": unit_status_figure(vacancies),
+        "bed-bath-avg-day": days_vacant_figure(vacancies),
+        "bed-bath-unit": unit_type_status_figure(vacancies),
+        "move-in-out": move_in_out_figure(vacancies, today=today),
+    }
+
+
+def figure_key(fig):
+    """
+    Content hash of a figure, so reports that produce the same chart can share one render.
+    """
+    if hasattr(fig, "to_json"):  # Plotly
+        content = fig.to_json()
+    else:  # Matplotlib: size plus every piece of text drawn (enough for tables)
+        texts = [t.get_text() for t in fig.findobj(Text)]
+        content = repr((tuple(fig.get_size_inches()), texts))
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
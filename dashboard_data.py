@@ -0,0 +1,312 @@
+import pandas as pd
+import numpy as np
+import os
+import re
+import json
+import pickle
+import hashlib
+import logging
+from contextlib import nullcontext
+from datetime import datetime
+
+BASE_DIR = os.path.join(os.getcwd(), "data")  # Use relative path
+CACHE_DIR = os.path.join(os.getcwd(), "cache")  # Ingested snapshots and derived indexes
+SNAPSHOT_FILE = os.path.join(CACHE_DIR, "snapshot.pkl")
+
+# Define file prefixes
+file_prefixes = {
+    "Tenant Data": "tenant_data_cleaned",
+    "Work Orders": "work_order_cleaned",
+    "Vacancies": "vacancy_cleaned",
+    "T_rent": "t_rent_cleaned",
+    "Beg Year": "beg_year_cleaned",
+    "Sameday": "same_day_cleaned",
+}
+
+# Statuses counted as occupied in the BD/BA tables
+OCCUPIED_STATUSES = ["Current", "Notice-Unrented", "Notice-Rented"]
+
+# Work order statuses that no longer need anything done
+CLOSED_WORK_ORDER_STATUSES = ["Work Done", "Completed", "Completed No Need To Bill", "Canceled"]
+
+# Rent roll snapshots shown side by side in the BD/BA comparison table
+SNAPSHOT_LABELS = {
+    "Tenant Data": "Cur",
+    "T_rent": "T3",
+    "Beg Year": "BOY",
+    "Sameday": "SDLY",
+}
+
+
+# Function to extract date from the filename
+def extract_timestamp_from_filename(filename):
+    """
+    Extracts datetime object from filenames like 'tenant_data_cleaned_20250321_115751.csv'
+    """
+    try:
+        # Extract the last two underscore-separated parts before .csv
+        parts = filename.rsplit("_", 2)  # ['tenant_data_cleaned', '20250321', '115751.csv']
+        if len(parts) < 3:
+            raise ValueError("Invalid filename format")
+
+        date_str, time_str = parts[-2], parts[-1].split(".")[0]  # Get YYYYMMDD and HHMMSS
+
+        # Convert to datetime object
+        return datetime.strptime(f"{date_str}_{time_str}", "%Y%m%d_%H%M%S")
+    except ValueError as e:
+        print(f"Error parsing date from {filename}: {e}")
+        return datetime.min  # Return a minimal datetime to avoid crashing
+
+
+def find_latest_files(base_dir=BASE_DIR):
+    """Latest cleaned CSV for each category, e.g. {"Tenant Data": ".../tenant_data_cleaned_....csv"}"""
+    files_in_directory = os.listdir(base_dir)
+    latest_files = {}
+    for category, prefix in file_prefixes.items():
+        relevant_files = [f for f in files_in_directory if f.startswith(prefix) and f.endswith(".csv")]
+        if relevant_files:
+            latest_file = max(relevant_files, key=extract_timestamp_from_filename)
+            latest_files[category] = os.path.join(base_dir, latest_file)
+    return latest_files
+
+
+def raw_export_path(base_dir, file_prefix, timestamp=None):
+    """Where an uncleaned export is kept, e.g. data/t_rent-20250321_115751.csv"""
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(base_dir, f"{file_prefix}-{timestamp}.csv")
+
+
+def find_latest_raw_exports(base_dir=BASE_DIR):
+    """Latest raw export per file prefix ('tenant_data', 't_rent', ...) named by raw_export_path."""
+    pattern = re.compile(r"^(?P<prefix>[a-z_]+)-(?P<ts>\d{8}_\d{6})\.csv$")
+    latest = {}
+    for filename in os.listdir(base_dir):
+        match = pattern.match(filename)
+        if not match:
+            continue
+        prefix, ts = match.group("prefix"), match.group("ts")
+        if prefix not in latest or ts > latest[prefix][0]:
+            latest[prefix] = (ts, os.path.join(base_dir, filename))
+    return {prefix: path for prefix, (ts, path) in latest.items()}
+
+
+def clean_csv(file_path, file_prefix, output_dir=BASE_DIR):
+    """Drop AppFolio's property header row and the two total rows, save as <prefix>_cleaned_<timestamp>.csv"""
+    df = pd.read_csv(file_path)
+    df = df.iloc[1:]
+    df = df.iloc[:-2]
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_path = os.path.join(output_dir, f"{file_prefix}_cleaned_{timestamp}.csv")
+
+    df.to_csv(output_path, index=False, encoding='utf-8-sig')
+    print(f"CSV saved to: {output_path}")
+    logging.info(f"CSV saved to: {output_path}")
+    return output_path
+
+
+def snapshot_id(files):
+    """
+    Short, stable ID for a set of input files, e.g. '20250321_115851-3f2a9c1b':
+    the newest file timestamp plus a hash of the file names.
+    """
+    names = sorted(os.path.basename(path) for path in files.values() if path)
+    newest = max((extract_timestamp_from_filename(name) for name in names), default=datetime.min)
+    digest = hashlib.sha1("|".join(names).encode("utf-8")).hexdigest()[:8]
+    return f"{newest:%Y%m%d_%H%M%S}-{digest}" if newest != datetime.min else digest
+
+
+def save_snapshot(files, dfs, path=SNAPSHOT_FILE):
+    """Persist ingested (prepared) DataFrames so later stages don't re-parse the CSVs."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    snapshot = {"snapshot_id": snapshot_id(files), "files": files, "dfs": dfs}
+    with open(path, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(os.path.splitext(path)[0] + ".json", "w") as f:
+        json.dump({"snapshot_id": snapshot["snapshot_id"], "files": files,
+                   "rows": {name: len(df) for name, df in dfs.items()}}, f, indent=4)
+    return snapshot
+
+
+def load_snapshot(path=SNAPSHOT_FILE):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def load_data(files):
+    """Read each category's CSV into a DataFrame, skipping missing files."""
+    dfs = {}
+    for name, path in files.items():
+        if path and os.path.exists(path):
+            dfs[name] = pd.read_csv(path)
+        else:
+            print(f"File not found: {path}")
+    return dfs
+
+
+def to_number(series):
+    """Strip $ and , from exported amounts like "2,999.00" and convert to numbers."""
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    # Amounts repeat a lot (market rents, 0.00), so only parse each distinct string once
+    codes, uniques = pd.factorize(series)
+    cleaned = pd.Series(uniques.astype(str)).str.replace(",", "", regex=False).str.replace("$", "", regex=False)
+    parsed = pd.to_numeric(cleaned.str.strip(), errors="coerce").to_numpy(dtype="float64")
+    values = np.where(codes >= 0, parsed[codes], np.nan)
+    return pd.Series(values, index=series.index, name=series.name)
+
+
+def prepare_data(dfs):
+    """
+    Return a copy of dfs with the numeric columns the dashboard uses converted.
+    The input DataFrames are left untouched.
+    """
+    prepared = {name: df.copy() for name, df in dfs.items()}
+
+    for name in SNAPSHOT_LABELS:
+        if name in prepared:
+            df = prepared[name]
+            for column in ["Rent", "Market Rent"]:
+                if column in df.columns:
+                    df[column] = to_number(df[column])
+
+    if "Work Orders" in prepared:
+        prepared["Work Orders"]["Amount"] = to_number(prepared["Work Orders"]["Amount"])
+
+    if "Vacancies" in prepared:
+        prepared["Vacancies"]["Days Vacant"] = to_number(prepared["Vacancies"]["Days Vacant"])
+
+    return prepared
+
+
+def filter_data(dfs, filters):
+    """
+    Restrict reports to a subset, e.g. one property or owner.
+
+    filters: {"Work Orders": {"Property": "TOPAZ HOUSE ..."}, "Tenant Data": {"Tags": ["A", "B"]}}
+    Reports without a filter entry are returned unchanged.
+    """
+    filtered = dict(dfs)
+    for name, conditions in (filters or {}).items():
+        if name not in filtered:
+            continue
+        df = filtered[name]
+        for column, value in conditions.items():
+            values = value if isinstance(value, list) else [value]
+            df = df[df[column].isin(values)]
+        filtered[name] = df
+    return filtered
+
+
+def bd_ba_summary(df):
+    """Total rent and occupancy rate per BD/BA for one rent roll, with a Total row."""
+    total_units = df.groupby("BD/BA").size()
+    occupied_units = df[df["Status"].isin(OCCUPIED_STATUSES)].groupby("BD/BA").size()
+    summary = pd.DataFrame({
+        "Total_Rent": df.groupby("BD/BA")["Rent"].sum(),
+        "Total_Units": total_units,
+        "Occupied_Units": occupied_units
+    }).fillna(0)  # Fill NaN for BD/BA groups without occupied units
+
+    summary["Occupancy_Rate"] = (summary["Occupied_Units"] / summary["Total_Units"]) * 100
+    summary["Occupancy_Rate"] = summary["Occupancy_Rate"].round(2).astype(str) + "%"
+
+    total_rent = summary["Total_Rent"].sum()
+    total_units_all = summary["Total_Units"].sum()
+    occupied_units_all = summary["Occupied_Units"].sum()
+
+    overall_occupancy_rate = (occupied_units_all / total_units_all) * 100 if total_units_all > 0 else 0
+    overall_occupancy_rate = f"{round(overall_occupancy_rate, 2)}%"
+    summary["Total_Rent"] = summary["Total_Rent"].apply(lambda x: f"${x:,.2f}")
+
+    # 🔹 **Append "Total" Row**
+    total_row = pd.DataFrame([{
+        "BD/BA": "Total",
+        "Total_Rent": f"${total_rent:,.2f}",
+        "Occupancy_Rate": overall_occupancy_rate
+    }])
+
+    summary = summary.drop(columns=["Total_Units", "Occupied_Units"])
+    summary = summary.reset_index()
+    return pd.concat([summary, total_row], ignore_index=True)
+
+
+def combined_summary(dfs, profiler=None):
+    """
+    Current vs T3 / BOY / SDLY rent and occupancy per BD/BA (expects prepare_data output).
+    With a profiling.Profiler each snapshot's BD/BA summary is timed separately.
+    """
+    combined = None
+    for name, label in SNAPSHOT_LABELS.items():
+        if name not in dfs:
+            continue
+        with profiler.section("bd_ba", name) if profiler else nullcontext():
+            summary = bd_ba_summary(dfs[name])
+        summary = summary.rename(columns={
+            "Total_Rent": f"{label} Total",
+            "Occupancy_Rate": f"{label} Oc. Rate"
+        })
+        combined = summary if combined is None else pd.merge(combined, summary, on="BD/BA", how="outer")
+
+    # Optional: Fill missing with "-"
+    return combined.fillna("-").reset_index(drop=True)
+
+
+def convert_values(data):
+    return {key: [{"label": item["label"], "value": str(item["value"])} for item in value] for key, value in data.items()}
+
+
+def compute_metrics(dfs):
+    """
+    Metric cards for the three dashboard tabs, in the metrics.json format.
+    Expects prepare_data output.
+    """
+    tenant_df = dfs["Tenant Data"]
+    work_orders = dfs["Work Orders"]
+    vacancies = dfs["Vacancies"]
+
+    # Filter rows where Status == 'Current' and count them
+    current = tenant_df[tenant_df["Status"] == "Current"].shape[0]
+    unrented = tenant_df[tenant_df["Status"] == "Notice-Unrented"].shape[0]
+    current_units = current + unrented
+    all_units = tenant_df.shape[0]
+
+    # Calculate occupancy percentage
+    occupied = (current_units / all_units) * 100 if all_units else 0
+
+    total_rent = tenant_df.groupby("BD/BA")["Rent"].sum().sum()
+    total_move_out = tenant_df["Move-out"].notnull().sum()
+
+    new_work_orders = work_orders[work_orders["Status"] == "New"].shape[0]
+    urgent_work_orders = work_orders[work_orders["Priority"] == "Urgent"].shape[0]
+    all_work_order = work_orders.shape[0]
+    total_amount = work_orders["Amount"].sum()
+
+    rent_ready = vacancies[vacancies["Rent Ready"] == "Yes"].shape[0]
+    next_move_in = vacancies["Next Move In"].notnull().sum()
+    total_vacancy = vacancies.shape[0]
+    avg_days_vacant = vacancies["Days Vacant"].mean()
+
+    metrics_data = {
+        "metrics1": [
+            {"label": "Total Unit", "value": int(all_units)},
+            {"label": "Occupancy Rate", "value": f"{occupied:.2f}%"},
+            {"label": "Total Rent", "value": f"${(total_rent):,.0f}"},
+            {"label": "Total Move-outs (Next 60 days)", "value": int(total_move_out)}
+        ],
+        "metrics2": [
+            {"label": "Total Vacancy", "value": int(total_vacancy)},
+            {"label": "Rent Ready Units", "value": int(rent_ready)},
+            {"label": "Upcoming Move In", "value": int(next_move_in)},
+            {"label": "Avg Days Vacant", "value": f"{avg_days_vacant:.1f} days"}
+        ],
+        "metrics3": [
+            {"label": "Total Workorder", "value": int(all_work_order)},
+            {"label": "New work orders", "value": int(new_work_orders)},
+            {"label": "Urgent Work Orders", "value": int(urgent_work_orders)},
+            {"label": "Total Amounts", "value": f"${total_amount}"}
+        ]
+    }
+
+    # Convert to JSON-friendly format
+    return convert_values(metrics_data)
@@ -0,0 +1,111 @@
+"""
+Forward occupancy forecast by BD/BA.
+
+Lease ends, scheduled move-outs and scheduled move-ins are merged into one sorted
+event stream (+1 move-in, -1 move-out). Daily projected occupancy is then just the
+current occupancy plus a cumulative sum of the events, so a 180-day view costs the
+same as a 60-day one. The event stream only depends on the snapshot, so it is cached
+per snapshot under cache/forecast/.
+"""
+import pandas as pd
+import numpy as np
+import os
+
+from dashboard_data import CACHE_DIR, OCCUPIED_STATUSES, snapshot_id
+
+FORECAST_DIR = os.path.join(CACHE_DIR, "forecast")
+
+EVENT_COLUMNS = ["Date", "Unit", "BD/BA", "Event", "Delta"]
+
+
+def _dates(series):
+    return pd.to_datetime(series, format="%m/%d/%Y", errors="coerce")
+
+
+def build_events(tenant_df, vacancies):
+    """
+    One row per expected occupancy change:
+      Move-out    scheduled move-out (Tenant Data "Move-out" or Vacancies "Last Move Out")
+      Lease end   "Lease To" of an occupied unit with no scheduled move-out
+      Move-in     Vacancies "Next Move In"
+    Units are mapped to BD/BA through Tenant Data so both reports share the same groups.
+    """
+    bd_ba = tenant_df.drop_duplicates("Unit").set_index("Unit")["BD/BA"]
+    occupied = tenant_df[tenant_df["Status"].isin(OCCUPIED_STATUSES)]
+
+    # A move-out can show up in both reports; keep the earliest date per unit
+    move_outs = pd.concat([
+        pd.DataFrame({"Unit": occupied["Unit"], "Date": _dates(occupied["Move-out"])}),
+        pd.DataFrame({"Unit": vacancies["Unit"], "Date": _dates(vacancies["Last Move Out"])}),
+    ]).dropna().sort_values("Date").drop_duplicates("Unit")
+    move_outs["Event"] = "Move-out"
+
+    lease_ends = pd.DataFrame({"Unit": occupied["Unit"], "Date": _dates(occupied["Lease To"])}).dropna()
+    lease_ends = lease_ends[~lease_ends["Unit"].isin(move_outs["Unit"])]
+    lease_ends["Event"] = "Lease end"
+
+    move_ins = pd.DataFrame({"Unit": vacancies["Unit"], "Date": _dates(vacancies["Next Move In"])}).dropna()
+    move_ins["Event"] = "Move-in"
+
+    events = pd.concat([move_outs, lease_ends, move_ins], ignore_index=True)
+    events["BD/BA"] = events["Unit"].map(bd_ba).fillna("Unknown")
+    events["Delta"] = np.where(events["Event"] == "Move-in", 1, -1)
+    return events.sort_values("Date", kind="stable").reset_index(drop=True)[EVENT_COLUMNS]
+
+
+def events_path(files, forecast_dir=FORECAST_DIR):
+    return os.path.join(forecast_dir, f"{snapshot_id({name: files.get(name) for name in ('Tenant Data', 'Vacancies')})}.pkl")
+
+
+def load_or_build_events(dfs, files, forecast_dir=FORECAST_DIR):
+    """Event stream for this snapshot, built once and read from cache/forecast/<snapshot id>.pkl after that."""
+    path = events_path(files, forecast_dir)
+    if os.path.exists(path):
+        return pd.read_pickle(path)
+
+    events = build_events(dfs["Tenant Data"], dfs["Vacancies"])
+    os.makedirs(forecast_dir, exist_ok=True)
+    events.to_pickle(path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return events
+
+
+def current_occupancy(tenant_df):
+    """Units and occupied units per BD/BA right now."""
+    return pd.DataFrame({
+        "Units": tenant_df.groupby("BD/BA").size(),
+        "Occupied": tenant_df[tenant_df["Status"].isin(OCCUPIED_STATUSES)].groupby("BD/BA").size(),
+    }).fillna(0)
+
+
+def forecast_occupancy(tenant_df, events, today=None, horizon=90, renewal_rate=0.0):
+    """
+    Projected occupied units per day and BD/BA for the next `horizon` days.
+
+    renewal_rate: share of "Lease end" events expected to renew (0 = every lease leaves).
+    Returns a long DataFrame: Date, BD/BA, Occupied, Units, Occupancy Rate (incl. a Total group).
+    """
+    today = pd.Timestamp.today().normalize() if today is None else pd.Timestamp(today).normalize()
+    end = today + pd.Timedelta(days=horizon)
+    base = current_occupancy(tenant_df)
+
+    # Events before today already show up in Status; only the window counts
+    start, stop = events["Date"].searchsorted([today + pd.Timedelta(days=1), end + pd.Timedelta(days=1)])
+    window = events.iloc[start:stop]
+    weights = np.where(window["Event"] == "Lease end", 1 - renewal_rate, 1.0)
+    base = base.reindex(base.index.union(window["BD/BA"].unique()), fill_value=0)
+
+    daily = (
+        pd.Series(window["Delta"].to_numpy() * weights, index=pd.MultiIndex.from_frame(window[["Date", "BD/BA"]]))
+        .groupby(level=["Date", "BD/BA"]).sum()
+        .unstack("BD/BA", fill_value=0)
+        .reindex(index=pd.date_range(today, end, name="Date"), columns=base.index, fill_value=0)
+    )
+    occupied = daily.cumsum() + base["Occupied"]
+    occupied["Total"] = occupied.sum(axis=1)
+    units = pd.concat([base["Units"], pd.Series({"Total": base["Units"].sum()})])
+
+    projected = occupied.stack().rename("Occupied").reset_index()
+    projected["Units"] = projected["BD/BA"].map(units)
+    projected["Occupancy Rate"] = (projected["Occupied"] / projected["Units"].where(projected["Units"] > 0) * 100).round(2)
+    return projected
@@ -0,0 +1,138 @@
+"""
+Fixed-bin histograms of counts and sums.
+
+Bin edges are set once in HISTOGRAM_SPECS (not derived from the data like
+pd.cut(bins=10)), so the bins mean the same thing in every snapshot. Each histogram
+keeps a count per bin plus the sum of some value columns per bin, which makes them
+mergeable: histograms for several properties or snapshots add up bin by bin, and
+averages (e.g. avg Days Vacant per Sqft bin) come from sums / counts afterwards.
+Per-snapshot histograms are stored in cache/histograms/<snapshot id>.pkl along with
+the specs they were built from.
+"""
+import pandas as pd
+import numpy as np
+import os
+
+from dashboard_data import CACHE_DIR, snapshot_id, to_number
+
+HISTOGRAM_DIR = os.path.join(CACHE_DIR, "histograms")
+CACHE_VERSION = 2  # Bumped when binning changes (2: "1,274" style numbers were dropped before)
+
+# name: (report, binned column, value columns summed per bin, bin edges)
+HISTOGRAM_SPECS = {
+    "Sqft": ("Tenant Data", "Sqft", ["Lease Days", "Rent", "Market Rent"], list(range(0, 3001, 250))),
+    "Rent": ("Tenant Data", "Rent", ["Rent"], list(range(0, 10001, 500))),
+    "Market Rent": ("Tenant Data", "Market Rent", ["Market Rent"], list(range(0, 10001, 500))),
+    "Lease Days": ("Tenant Data", "Lease Days", ["Lease Days"], [0, 90, 180, 270, 365, 395, 545, 730, 1095, 1825]),
+    "Days Vacant": ("Vacancies", "Days Vacant", ["Days Vacant"], [0, 7, 14, 30, 60, 90, 180, 365]),
+    "Vacant Sqft": ("Vacancies", "Sqft", ["Days Vacant"], list(range(0, 3001, 250))),
+}
+
+
+class Histogram:
+    """
+    Counts and value sums over fixed edges. Bin 0 holds values below edges[0] and the
+    last bin values >= edges[-1], so nothing is dropped. Missing values aren't counted.
+    """
+
+    def __init__(self, column, edges, value_columns=(), counts=None, sums=None, value_counts=None):
+        self.column = column
+        self.edges = np.asarray(edges, dtype="float64")
+        self.value_columns = list(value_columns)
+        n_bins = len(self.edges) + 1
+        self.counts = np.zeros(n_bins, dtype="int64") if counts is None else np.asarray(counts, dtype="int64")
+        self.sums = sums if sums is not None else {c: np.zeros(n_bins) for c in self.value_columns}
+        # Rows per bin where the value column itself was present (the divisor for averages)
+        self.value_counts = value_counts if value_counts is not None else {c: np.zeros(n_bins, dtype="int64") for c in self.value_columns}
+
+    @classmethod
+    def from_frame(cls, df, column, edges, value_columns=()):
+        hist = cls(column, edges, value_columns)
+        values = to_number(df[column]).to_numpy(dtype="float64")  # Exported numbers look like "1,274"
+        valid = ~np.isnan(values)
+        bins = np.searchsorted(hist.edges, values[valid], side="right")
+        hist.counts = np.bincount(bins, minlength=len(hist.counts))
+        for value_column in hist.value_columns:
+            weights = to_number(df[value_column]).to_numpy(dtype="float64")[valid]
+            present = ~np.isnan(weights)
+            hist.sums[value_column] = np.bincount(bins[present], weights=weights[present], minlength=len(hist.counts))
+            hist.value_counts[value_column] = np.bincount(bins[present], minlength=len(hist.counts))
+        return hist
+
+    def __add__(self, other):
+        if not np.array_equal(self.edges, other.edges) or self.column != other.column:
+            raise ValueError(f"Can't merge histograms of {self.column} and {other.column} with different edges")
+        common = [c for c in self.value_columns if c in other.value_columns]
+        return Histogram(self.column, self.edges, common, self.counts + other.counts,
+                         {c: self.sums[c] + other.sums[c] for c in common},
+                         {c: self.value_counts[c] + other.value_counts[c] for c in common})
+
+    def labels(self):
+        edges = [f"{edge:,.0f}" for edge in self.edges]
+        return [f"< {edges[0]}"] + [f"{low}-{high}" for low, high in zip(edges, edges[1:])] + [f"{edges[-1]}+"]
+
+    def to_frame(self, drop_empty_ends=True):
+        """Bin, Count, and Sum / Avg per value column."""
+        frame = pd.DataFrame({"Bin": self.labels(), "Count": self.counts})
+        for column, sums in self.sums.items():
+            frame[f"Sum {column}"] = sums
+            n = self.value_counts[column]
+            frame[f"Avg {column}"] = np.where(n > 0, sums / np.maximum(n, 1), np.nan).round(1)
+        if drop_empty_ends:
+            # Keep the underflow/overflow bins only when something landed in them
+            keep = np.ones(len(frame), dtype=bool)
+            keep[[0, -1]] = self.counts[[0, -1]] > 0
+            frame = frame[keep]
+        return frame.reset_index(drop=True)
+
+
+def merge_histograms(histograms):
+    """Sum a list of histograms with the same edges (e.g. one per property or snapshot)."""
+    histograms = list(histograms)
+    total = histograms[0]
+    for hist in histograms[1:]:
+        total = total + hist
+    return total
+
+
+def with_lease_days(tenant_df):
+    """Tenant Data with Lease Days (Lease To - Lease From) and numeric rents added."""
+    lease_from = pd.to_datetime(tenant_df["Lease From"], format="%m/%d/%Y", errors="coerce")
+    lease_to = pd.to_datetime(tenant_df["Lease To"], format="%m/%d/%Y", errors="coerce")
+    lease_days = (lease_to - lease_from).dt.days
+    return tenant_df.assign(
+        **{"Lease Days": lease_days.where(lease_days > 0),
+           "Rent": to_number(tenant_df["Rent"]), "Market Rent": to_number(tenant_df["Market Rent"])}
+    )
+
+
+def build_histograms(dfs, specs=HISTOGRAM_SPECS):
+    """Every histogram in specs whose report is loaded."""
+    frames = {name: df for name, df in dfs.items()}
+    if "Tenant Data" in frames:
+        frames["Tenant Data"] = with_lease_days(frames["Tenant Data"])
+    return {
+        name: Histogram.from_frame(frames[report], column, edges, value_columns)
+        for name, (report, column, value_columns, edges) in specs.items()
+        if report in frames
+    }
+
+
+def histogram_path(files, histogram_dir=HISTOGRAM_DIR):
+    return os.path.join(histogram_dir, f"{snapshot_id({name: files.get(name) for name in ('Tenant Data', 'Vacancies')})}.pkl")
+
+
+def load_or_build_histograms(dfs, files, histogram_dir=HISTOGRAM_DIR, specs=HISTOGRAM_SPECS):
+    """Histograms for this snapshot, built once and then read from cache/histograms/<snapshot id>.pkl."""
+    path = histogram_path(files, histogram_dir)
+    if os.path.exists(path):
+        cached = pd.read_pickle(path)
+        # Older binning code or other specs (a histogram added or removed, a column, value columns or edges changed): rebuild
+        if isinstance(cached, dict) and cached.get("version") == CACHE_VERSION and cached.get("specs") == specs:
+            return cached["histograms"]
+
+    histograms = build_histograms(dfs, specs)
+    os.makedirs(histogram_dir, exist_ok=True)
+    pd.to_pickle({"version": CACHE_VERSION, "specs": specs, "histograms": histograms}, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return histograms
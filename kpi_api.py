@@ -0,0 +1,235 @@
+"""
+Small JSON API over the dashboard KPIs, for the Slack bot, the owner portal and friends.
+
+Everything is computed once per snapshot and kept as ready-to-send bytes, so a
+request is a dict lookup and a socket write, never pandas:
+
+    GET /api/snapshot            snapshot id, source files, when it was built
+    GET /api/kpis                metric cards (metrics.json format, plus a flat {label: value})
+    GET /api/bd-ba               current vs 3-month-ago / BOY / SDLY comparison per BD/BA
+    GET /api/charts              names of the charts
+    GET /api/charts/<name>       one chart as Plotly JSON (data + layout)
+    GET /health
+
+There is no authentication, so only aggregate data is published: charts listed in
+PRIVATE_CHARTS (the late-payment chart names tenants) are left out, and the server
+listens on localhost unless --host says otherwise. Put it behind a proxy that
+authenticates before exposing it on the network.
+
+Responses carry an ETag (snapshot id + content hash) and Last-Modified (snapshot
+time, or the start of the day the payloads were built for if that is later) with
+Cache-Control: no-cache, so clients revalidate with If-None-Match /
+If-Modified-Since and get a 304 until a new export comes in or the day changes.
+Every RELOAD_INTERVAL seconds the data folder is checked for a new snapshot (a
+directory listing); a new one is built in a worker thread and swapped in whole,
+requests keep being served from the old payloads meanwhile. The chart payloads are
+also rebuilt daily, since the move-in/out chart counts from today.
+
+    python kpi_api.py                      # http://localhost:8765/api/kpis
+    python kpi_api.py --port 9000 --data-dir data
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import date, datetime
+from email.utils import formatdate, parsedate_to_datetime
+
+from dashboard_data import (
+    BASE_DIR, SNAPSHOT_FILE, file_prefixes, extract_timestamp_from_filename, find_latest_files, snapshot_id,
+    load_data, prepare_data, load_snapshot, compute_metrics, combined_summary,
+)
+
+DEFAULT_PORT = 8765
+RELOAD_INTERVAL = 30
+MAX_HEADER_BYTES = 16 * 1024
+KEEP_ALIVE_TIMEOUT = 15
+PRIVATE_CHARTS = {"late"}  # Charts with tenant names, never served
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           503: "Service Unavailable"}
+
+
+class Payload:
+    """One pre-encoded JSON response with its validators."""
+
+    def __init__(self, obj, snapshot, last_modified):
+        self.body = json.dumps(obj, default=str).encode("utf-8")
+        self.etag = f'"{snapshot}-{hashlib.sha1(self.body).hexdigest()[:10]}"'
+        self.last_modified = last_modified  # Unix time, whole seconds
+        self.last_modified_text = formatdate(last_modified, usegmt=True)
+
+    def not_modified(self, headers):
+        """True when the client's conditional headers still match (If-None-Match wins over If-Modified-Since)."""
+        if "if-none-match" in headers:
+            tags = [tag.strip() for tag in headers["if-none-match"].split(",")]
+            return "*" in tags or self.etag in tags or f"W/{self.etag}" in tags
+        if "if-modified-since" in headers:
+            try:
+                return parsedate_to_datetime(headers["if-modified-since"]).timestamp() >= self.last_modified
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
+def _load_dfs(files, snapshot_file=SNAPSHOT_FILE):
+    """The prepared DataFrames, from the pipeline's ingested snapshot when it is for these files."""
+    if os.path.exists(snapshot_file):
+        snapshot = load_snapshot(snapshot_file)
+        if snapshot["snapshot_id"] == snapshot_id(files):
+            return snapshot["dfs"]
+    return prepare_data(load_data(files))
+
+
+def build_payloads(files, today=None, snapshot_file=SNAPSHOT_FILE):
+    """{path: Payload} for one snapshot. This is the only place pandas runs."""
+    from dashboard_charts import build_figures  # Plotly only loads when payloads are built
+
+    sid = snapshot_id(files)
+    snapshot_time = max(extract_timestamp_from_filename(os.path.basename(path)) for path in files.values())
+    # The payloads are rebuilt each day (move-in/out counts from today), so they are
+    # never older than the start of the day they were built for
+    build_day = datetime.combine(today or date.today(), datetime.min.time())
+    last_modified = int(max(snapshot_time, build_day).timestamp())
+    dfs = _load_dfs(files, snapshot_file)
+
+    metrics = compute_metrics(dfs)
+    summary = combined_summary(dfs)
+    figures = {name: fig for name, fig in build_figures(dfs, today=today).items()
+               if hasattr(fig, "to_plotly_json") and name not in PRIVATE_CHARTS}
+
+    payloads = {
+        "/api/snapshot": {"snapshot_id": sid, "snapshot_time": snapshot_time.isoformat(), "files": files,
+                          "rows": {name: len(df) for name, df in dfs.items()},
+                          "built_at": datetime.now().isoformat(timespec="seconds")},
+        "/api/kpis": {"snapshot_id": sid, "metrics": metrics,
+                      "kpis": {m["label"]: m["value"] for group in metrics.values() for m in group}},
+        "/api/bd-ba": {"snapshot_id": sid, "columns": list(summary.columns),
+                       "rows": json.loads(summary.to_json(orient="records"))},
+        "/api/charts": {"snapshot_id": sid, "charts": list(figures)},
+    }
+    for name, fig in figures.items():
+        payloads[f"/api/charts/{name}"] = {"snapshot_id": sid, "name": name, "figure": json.loads(fig.to_json())}
+    return {path: Payload(obj, sid, last_modified) for path, obj in payloads.items()}
+
+
+class KpiApi:
+    def __init__(self, data_dir=BASE_DIR, reload_interval=RELOAD_INTERVAL, snapshot_file=SNAPSHOT_FILE):
+        self.data_dir = data_dir
+        self.reload_interval = reload_interval
+        self.snapshot_file = snapshot_file
+        self.payloads = {}
+        self.loaded = (None, None)  # (snapshot id, day) the payloads were built for
+        self.requests = 0
+
+    def _latest_files(self):
+        files = find_latest_files(self.data_dir)
+        missing = [name for name in file_prefixes if name not in files]
+        if missing:
+            raise FileNotFoundError(f"No cleaned CSV in {self.data_dir} for: {', '.join(missing)}")
+        return files
+
+    async def reload(self):
+        """Rebuild the payloads in a worker thread when the snapshot (or the day) changed."""
+        try:
+            files = self._latest_files()
+        except FileNotFoundError as e:
+            print(f"⚠️ {e}")
+            return
+        wanted = (snapshot_id(files), date.today())
+        if wanted == self.loaded:
+            return
+        start = time.perf_counter()
+        payloads = await asyncio.get_running_loop().run_in_executor(
+            None, build_payloads, files, wanted[1], self.snapshot_file)
+        self.payloads, self.loaded = payloads, wanted  # Swapped whole, never half-built
+        print(f"✅ Serving snapshot {wanted[0]} ({len(payloads)} endpoints, built in {time.perf_counter() - start:.2f}s)")
+
+    async def _reload_loop(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await self.reload()
+            except Exception as e:  # Keep serving the previous snapshot
+                print(f"❌ Reload failed: {e}")
+
+    def respond(self, method, path, headers):
+        """(status, extra headers, body) for one request."""
+        if method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD"}, b'{"error": "method not allowed"}'
+        path = path.split("?", 1)[0].rstrip("/") or "/"
+        if path == "/health":
+            return 200, {}, b'{"ok": true}'
+        if not self.payloads:
+            return 503, {"Retry-After": "5"}, b'{"error": "no snapshot loaded yet"}'
+        payload = self.payloads.get(path)
+        if payload is None:
+            return 404, {}, b'{"error": "not found"}'
+        validators = {"ETag": payload.etag, "Last-Modified": payload.last_modified_text, "Cache-Control": "no-cache"}
+        if payload.not_modified(headers):
+            return 304, validators, b""
+        return 200, validators, payload.body
+
+    async def handle(self, reader, writer):
+        """One connection; HTTP/1.1 keep-alive until the client closes or goes quiet."""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 400, {}, b'{"error": "headers too large"}', False)
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._send(writer, 400, {}, b'{"error": "bad request line"}', False)
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        key, value = line.split(":", 1)
+                        headers[key.strip().lower()] = value.strip()
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              if version == "HTTP/1.1" else headers.get("connection", "").lower() == "keep-alive")
+                self.requests += 1
+                status, extra, body = self.respond(method, target, headers)
+                await self._send(writer, status, extra, b"" if method == "HEAD" else body, keep_alive, len(body))
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def _send(self, writer, status, extra, body, keep_alive, length=None):
+        lines = [f"HTTP/1.1 {status} {REASONS[status]}"]
+        if status != 304:
+            lines += ["Content-Type: application/json", f"Content-Length: {len(body) if length is None else length}"]
+        lines += [f"{key}: {value}" for key, value in extra.items()]
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        await self.reload()
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        print(f"📡 Serving KPIs on http://{host}:{port}/api/kpis")
+        async with server:
+            await asyncio.gather(server.serve_forever(), self._reload_loop())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve precomputed KPIs, the BD/BA table and chart data as JSON")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (no auth, keep it local)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--data-dir", default=BASE_DIR)
+    parser.add_argument("--reload-interval", type=float, default=RELOAD_INTERVAL, help="Seconds between snapshot checks")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(KpiApi(args.data_dir, args.reload_interval).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,366 @@
+"""
+Concurrent-session load test for the Streamlit dashboard.
+
+Opens N sessions on Streamlit's websocket (/_stcore/stream), the same protocol the
+browser speaks, and has each one go through VIEWS: a page load on a new connection,
+then the widget interactions that rerun the script from each tab. st.tabs switch in the
+browser without talking to the server, so a "tab switch" costs nothing server side;
+what costs is the rerun behind a search, the Work Orders "Aging by" radio or a
+What-If slider, and those are what get timed. For every rerun it records the time
+to the first element and to script_finished, the deltas and bytes received, and
+errors (exceptions shown on the page, timeouts). Meanwhile the server's CPU and RSS
+(plus its children, i.e. Kaleido) are sampled with psutil.
+
+Percentiles per view and overall, per concurrency level, go to
+benchmarks/loadtest-<timestamp>.json so caching/sharing changes can be compared
+(--compare an earlier file).
+
+    python loadtest.py --sessions 1 5 10                    # starts streamlit run streamlit.py on a free port
+    python loadtest.py --url http://localhost:8501 --server-pid 1234 --sessions 20 --iterations 3
+    python loadtest.py --sessions 10 --compare benchmarks/loadtest-20250321_120000.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks import RESULTS_DIR, environment, save_results
+
+try:
+    import psutil
+except ImportError:  # No server CPU/memory numbers without it
+    psutil = None
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+APP_SCRIPT = "streamlit.py"
+PERCENTILES = [50, 90, 95, 99]
+SAMPLE_INTERVAL = 0.25
+
+# (view, widget label to look for, value) - a label of None is the page load on a new connection
+VIEWS = [
+    ("load", None, None),
+    ("search", "Search tenants", "leak"),
+    ("work orders: aging by type", "Aging by", "Work Order Type"),
+    ("what-if: 24 months", "Months", 24),
+]
+
+
+def _streamlit_protos():
+    """BackMsg / ForwardMsg protos. streamlit.py in this folder shadows the package, so import with it off sys.path."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    saved = sys.path[:]
+    sys.path[:] = [p for p in sys.path if os.path.abspath(p or ".") != here]
+    try:
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+    finally:
+        sys.path[:] = saved
+    return BackMsg, ForwardMsg, WidgetState
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_healthy(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/_stcore/health", timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def start_server(port, log, script=APP_SCRIPT):
+    """streamlit run <script> headless on port, output to the open file log; returns the Popen.
+    Uses the streamlit CLI, since `python -m streamlit` from this folder would pick up streamlit.py."""
+    cli = shutil.which("streamlit")
+    if cli is None:
+        raise RuntimeError("streamlit CLI not found on PATH")
+    return subprocess.Popen(
+        [cli, "run", script, "--server.headless", "true", "--server.port", str(port),
+         "--server.address", "127.0.0.1", "--browser.gatherUsageStats", "false"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), stdout=log, stderr=subprocess.STDOUT,
+    )
+
+
+class ServerSampler:
+    """Samples CPU % and RSS (process + children) of the server while the load runs."""
+
+    def __init__(self, pid, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = []  # (seconds since start, cpu %, rss MB)
+        self._process = psutil.Process(pid) if psutil and pid else None
+        self._stop = threading.Event()
+
+    def _processes(self):
+        try:
+            return [self._process] + self._process.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return []
+
+    def _sample(self):
+        start = time.perf_counter()
+        known = {}
+        while not self._stop.wait(self.interval):
+            cpu = rss = 0.0
+            for process in self._processes():
+                try:
+                    # cpu_percent needs a previous call on the same Process object
+                    process = known.setdefault(process.pid, process)
+                    cpu += process.cpu_percent(None)
+                    rss += process.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+            self.samples.append((time.perf_counter() - start, cpu, rss / 1024 ** 2))
+
+    def __enter__(self):
+        if self._process is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._process is not None:
+            self._stop.set()
+            self._thread.join()
+        return False
+
+    def summary(self):
+        if not self.samples:
+            return None
+        cpu = np.array([s[1] for s in self.samples])
+        rss = np.array([s[2] for s in self.samples])
+        return {
+            "cpu_mean_pct": round(float(cpu.mean()), 1), "cpu_max_pct": round(float(cpu.max()), 1),
+            "rss_start_mb": round(float(rss[0]), 1), "rss_peak_mb": round(float(rss.max()), 1),
+            "rss_end_mb": round(float(rss[-1]), 1), "samples": len(self.samples),
+        }
+
+
+class Session:
+    """One simulated viewer: a websocket to the server plus the widget states the browser would send."""
+
+    def __init__(self, url, number, timeout):
+        self.url = url.replace("http", "ws", 1).rstrip("/") + "/_stcore/stream"
+        self.number = number
+        self.timeout = timeout
+        self.widgets = {}  # label -> (element type, widget id), from the first page load
+        self.states = {}  # widget id -> WidgetState
+        self.BackMsg, self.ForwardMsg, self.WidgetState = _streamlit_protos()
+
+    async def rerun(self, ws):
+        """Ask for a rerun with the current widget states; time it until script_finished."""
+        message = self.BackMsg()
+        message.rerun_script.widget_states.widgets.extend(self.states.values())
+        start = time.perf_counter()
+        await ws.send(message.SerializeToString())
+        first = None
+        deltas = size = exceptions = 0
+        while True:
+            data = await asyncio.wait_for(ws.recv(), self.timeout)
+            size += len(data)
+            msg = self.ForwardMsg()
+            msg.ParseFromString(data)
+            kind = msg.WhichOneof("type")
+            if kind == "delta":
+                deltas += 1
+                first = first or time.perf_counter() - start
+                if msg.delta.WhichOneof("type") == "new_element":
+                    exceptions += self._note_element(msg.delta.new_element)
+            elif kind == "script_finished":
+                if msg.script_finished == self.ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                return {"seconds": time.perf_counter() - start, "first_element_s": first,
+                        "deltas": deltas, "bytes": size, "exceptions": exceptions,
+                        "ok": msg.script_finished == self.ForwardMsg.FINISHED_SUCCESSFULLY and not exceptions}
+
+    def _note_element(self, element):
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            return 1
+        widget = getattr(element, kind)
+        if hasattr(widget, "id") and hasattr(widget, "label") and widget.id:
+            self.widgets.setdefault(widget.label, (kind, widget.id))
+        return 0
+
+    def set_widget(self, label, value):
+        """Set the first widget whose label contains label; False if the page doesn't have one."""
+        match = next(((kind, widget_id) for text, (kind, widget_id) in self.widgets.items() if label in text), None)
+        if match is None:
+            return False
+        kind, widget_id = match
+        state = self.WidgetState(id=widget_id)
+        if kind == "slider":
+            state.double_array_value.data.append(float(value))
+        elif kind == "checkbox":
+            state.bool_value = bool(value)
+        else:  # text_input, radio, selectbox
+            state.string_value = str(value)
+        self.states[widget_id] = state
+        return True
+
+    async def run(self, iterations, think_time, records):
+        """Each iteration reconnects (a reload: new server session, widgets back to their defaults)."""
+        for iteration in range(iterations):
+            self.widgets, self.states = {}, {}
+            async with websockets.connect(self.url, subprotocols=["streamlit"], max_size=None,
+                                          open_timeout=self.timeout) as ws:
+                for view, label, value in VIEWS:
+                    if label is not None and not self.set_widget(label, value):
+                        records.append({"session": self.number, "iteration": iteration, "view": view,
+                                        "ok": False, "error": f"no widget labelled {label!r}"})
+                        continue
+                    try:
+                        result = await self.rerun(ws)
+                    except asyncio.TimeoutError:
+                        result = {"ok": False, "error": f"no script_finished within {self.timeout}s"}
+                    records.append({"session": self.number, "iteration": iteration, "view": view, **result})
+                    if "error" in result:
+                        return
+                    if think_time:
+                        await asyncio.sleep(think_time)
+
+
+def percentiles(values):
+    if not values:
+        return None
+    values = np.array(values)
+    summary = {f"p{p}": round(float(np.percentile(values, p)), 3) for p in PERCENTILES}
+    summary.update(mean=round(float(values.mean()), 3), max=round(float(values.max()), 3), count=len(values))
+    return summary
+
+
+def summarize(records, wall_s):
+    ok = [r for r in records if r.get("ok")]
+    views = {}
+    for view, _, _ in VIEWS:
+        done = [r for r in ok if r["view"] == view]
+        views[view] = {"seconds": percentiles([r["seconds"] for r in done]),
+                       "first_element_s": percentiles([r["first_element_s"] for r in done if r["first_element_s"]])}
+    return {
+        "renders": len(records),
+        "errors": len(records) - len(ok),
+        "renders_per_s": round(len(ok) / wall_s, 2) if wall_s else None,
+        "seconds": percentiles([r["seconds"] for r in ok]),
+        "views": views,
+    }
+
+
+async def _run_level(url, sessions, iterations, think_time, ramp_s, timeout, records):
+    async def start(number):
+        await asyncio.sleep(ramp_s * number / max(sessions, 1))
+        try:
+            await Session(url, number, timeout).run(iterations, think_time, records)
+        except Exception as e:
+            records.append({"session": number, "view": "connect", "ok": False, "error": f"{type(e).__name__}: {e}"})
+
+    await asyncio.gather(*(start(number) for number in range(sessions)))
+
+
+def run_level(url, sessions, iterations=2, think_time=0.0, ramp_s=0.0, timeout=120, server_pid=None):
+    """Run `sessions` concurrent sessions through VIEWS `iterations` times; returns this level's result dict."""
+    print(f"👥 {sessions} concurrent session(s)")
+    records = []
+    with ServerSampler(server_pid) as sampler:
+        start = time.perf_counter()
+        asyncio.run(_run_level(url, sessions, iterations, think_time, ramp_s, timeout, records))
+        wall_s = time.perf_counter() - start
+    level = {"sessions": sessions, "wall_s": round(wall_s, 2), **summarize(records, wall_s),
+             "server": sampler.summary(), "records": records}
+    for record in records:
+        if "error" in record:
+            print(f"   ❌ session {record['session']} {record['view']}: {record['error']}")
+    seconds = level["seconds"] or {}
+    server = level["server"] or {}
+    print(f"   ⏱️ p50 {seconds.get('p50', float('nan')):.2f}s  p95 {seconds.get('p95', float('nan')):.2f}s  "
+          f"{level['renders_per_s'] or 0:.2f} renders/s  errors {level['errors']}  "
+          f"CPU {server.get('cpu_mean_pct', '?')}% (max {server.get('cpu_max_pct', '?')}%)  "
+          f"RSS peak {server.get('rss_peak_mb', '?')} MB")
+    return level
+
+
+def run_loadtest(levels, url=None, iterations=2, think_time=0.0, ramp_s=0.0, timeout=120, server_pid=None, label=None):
+    """Load-test url (or a streamlit server started here) at each concurrency level."""
+    if websockets is None:
+        raise RuntimeError("loadtest needs the websockets package (pip install websockets)")
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    server = log = None
+    try:
+        if url is None:
+            port = free_port()
+            url = f"http://127.0.0.1:{port}"
+            log = open(os.path.join(RESULTS_DIR, "loadtest-server.log"), "w")
+            server = start_server(port, log)
+            server_pid = server.pid
+            print(f"🚀 Started streamlit on {url} (pid {server_pid})")
+        if not wait_until_healthy(url):
+            raise RuntimeError(f"Streamlit at {url} did not become healthy")
+        results = {"started": datetime.now().isoformat(timespec="seconds"), "label": label, "url": url,
+                   "environment": environment(), "iterations": iterations, "think_time_s": think_time,
+                   "views": [view for view, _, _ in VIEWS], "levels": []}
+        for sessions in levels:
+            results["levels"].append(run_level(url, sessions, iterations, think_time, ramp_s, timeout, server_pid))
+        return results
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if log is not None:
+            log.close()
+
+
+def compare(previous_path, results):
+    """Print p50/p95 per concurrency level next to an earlier results file."""
+    with open(previous_path) as f:
+        previous = {level["sessions"]: level for level in json.load(f)["levels"]}
+    print(f"📊 vs {previous_path}")
+    for level in results["levels"]:
+        before = previous.get(level["sessions"])
+        if not before or not before["seconds"] or not level["seconds"]:
+            continue
+        for p in ("p50", "p95"):
+            old, new = before["seconds"][p], level["seconds"][p]
+            print(f"   {level['sessions']:>3} sessions {p}: {old:.2f}s -> {new:.2f}s ({(new - old) / old:+.0%})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate concurrent dashboard sessions over Streamlit's websocket")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10], help="Concurrency levels to run")
+    parser.add_argument("--iterations", type=int, default=2, help="Passes through the views per session")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Seconds between a session's reruns")
+    parser.add_argument("--ramp", type=float, default=0.0, help="Spread session starts over this many seconds")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds to wait for one rerun")
+    parser.add_argument("--url", default=None, help="Running server (default: start streamlit run streamlit.py)")
+    parser.add_argument("--server-pid", type=int, default=None, help="PID of --url's server, for CPU/memory")
+    parser.add_argument("--label", default=None, help="Free text saved with the results, e.g. the change under test")
+    parser.add_argument("--compare", default=None, help="Earlier loadtest JSON to compare p50/p95 against")
+    parser.add_argument("--output", default=None, help="JSON file (default: benchmarks/loadtest-<timestamp>.json)")
+    args = parser.parse_args()
+
+    results = run_loadtest(args.sessions, args.url, args.iterations, args.think_time, args.ramp,
+                           args.timeout, args.server_pid, args.label)
+    save_results(results, args.output or os.path.join(RESULTS_DIR, f"loadtest-{datetime.now():%Y%m%d_%H%M%S}.json"))
+    if args.compare:
+        compare(args.compare, results)
@@ -0,0 +1,120 @@
+"""
+Loss to lease: how far each occupied unit's Rent is below its Market Rent.
+
+The per-unit gap index is built once per Tenant Data snapshot and stored, sorted by
+gap (largest first), in cache/loss_to_lease/<snapshot id>.pkl together with the
+BD/BA, lease-expiry and tenure summaries. Top-N questions like "units furthest below
+market expiring in 90 days" are then a mask over the index plus taking the first N rows.
+"""
+import pandas as pd
+import numpy as np
+import os
+
+from dashboard_data import CACHE_DIR, OCCUPIED_STATUSES, extract_timestamp_from_filename, snapshot_id, to_number
+
+LOSS_TO_LEASE_DIR = os.path.join(CACHE_DIR, "loss_to_lease")
+
+# Days until "Lease To" (month-to-month / expired leases have no end date and go first)
+EXPIRY_BUCKETS = [-np.inf, 0, 30, 60, 90, 180, 365, np.inf]
+EXPIRY_LABELS = ["Expired / MTM", "0-30 days", "31-60 days", "61-90 days", "91-180 days", "181-365 days", "365+ days"]
+
+# Years since "Move-in"
+TENURE_BUCKETS = [-np.inf, 1, 2, 3, 5, np.inf]
+TENURE_LABELS = ["< 1 yr", "1-2 yrs", "2-3 yrs", "3-5 yrs", "5+ yrs"]
+
+
+def build_gap_index(tenant_df, as_of):
+    """Per-unit gap (Market Rent - Rent) for occupied units, sorted by gap, largest first."""
+    units = tenant_df[tenant_df["Status"].isin(OCCUPIED_STATUSES)]
+    as_of = pd.Timestamp(as_of).normalize()
+
+    rent = to_number(units["Rent"]).fillna(0)
+    market = to_number(units["Market Rent"]).fillna(0)
+    lease_to = pd.to_datetime(units["Lease To"], format="%m/%d/%Y", errors="coerce")
+    move_in = pd.to_datetime(units["Move-in"], format="%m/%d/%Y", errors="coerce")
+
+    # Month-to-month leases have no "Lease To"; count them as already up for renewal
+    days_to_expiry = (lease_to - as_of).dt.days.fillna(-1)
+    tenure_years = (as_of - move_in).dt.days / 365.25
+
+    index = pd.DataFrame({
+        "Unit": units["Unit"].to_numpy(),
+        "Tenant": units["Tenant"].to_numpy(),
+        "BD/BA": pd.Categorical(units["BD/BA"]),
+        "Rent": rent.to_numpy(dtype="float32"),
+        "Market Rent": market.to_numpy(dtype="float32"),
+        "Gap": (market - rent).to_numpy(dtype="float32"),
+        "Lease To": lease_to.dt.date.to_numpy(),
+        "Days To Expiry": days_to_expiry.to_numpy(dtype="int32"),
+        "Expiry Bucket": pd.cut(days_to_expiry, EXPIRY_BUCKETS, labels=EXPIRY_LABELS).values,
+        "Tenure Bucket": pd.cut(tenure_years, TENURE_BUCKETS, labels=TENURE_LABELS, right=False).values,
+    })
+    gap_pct = index["Gap"] / index["Market Rent"].where(index["Market Rent"] > 0) * 100
+    index["Gap %"] = gap_pct.astype("float64").fillna(0).round(1)
+    return index.sort_values("Gap", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def summarize_gap(index, by):
+    """Units, total rent / market rent / gap and gap % of market per group."""
+    summary = index.groupby(by, observed=True).agg(
+        Units=("Unit", "size"),
+        Rent=("Rent", "sum"),
+        **{"Market Rent": ("Market Rent", "sum"), "Loss to Lease": ("Gap", "sum")},
+    )
+    summary["Loss %"] = (summary["Loss to Lease"] / summary["Market Rent"].where(summary["Market Rent"] > 0) * 100).round(1)
+    return summary.round(2).reset_index()
+
+
+def build_loss_to_lease(tenant_df, as_of):
+    index = build_gap_index(tenant_df, as_of)
+    return {
+        "as_of": pd.Timestamp(as_of),
+        "index": index,
+        "by_bd_ba": summarize_gap(index, "BD/BA"),
+        "by_expiry": summarize_gap(index, "Expiry Bucket"),
+        "by_tenure": summarize_gap(index, "Tenure Bucket"),
+    }
+
+
+def loss_to_lease_path(files, cache_dir=LOSS_TO_LEASE_DIR):
+    return os.path.join(cache_dir, f"{snapshot_id({'Tenant Data': files.get('Tenant Data')})}.pkl")
+
+
+def load_or_build_loss_to_lease(dfs, files, cache_dir=LOSS_TO_LEASE_DIR):
+    """Gap index and summaries for this Tenant Data snapshot, computed once and then read from the cache."""
+    tenant_file = files["Tenant Data"]
+    path = loss_to_lease_path(files, cache_dir)
+    if os.path.exists(path):
+        return pd.read_pickle(path)
+
+    # Ages and days to expiry are measured from the export time, so the cache never goes stale
+    loss = build_loss_to_lease(dfs["Tenant Data"], extract_timestamp_from_filename(os.path.basename(tenant_file)))
+    os.makedirs(cache_dir, exist_ok=True)
+    pd.to_pickle(loss, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return loss
+
+
+def top_units(index, n=10, expiring_within=None, bd_ba=None):
+    """
+    The n units furthest below market, optionally only leases ending within
+    `expiring_within` days (incl. month-to-month) and/or of one BD/BA.
+    The index is already sorted by gap, so the first n matches are the answer (no sort,
+    no trip back to the rent roll).
+    """
+    mask = index["Gap"].to_numpy() > 0
+    if expiring_within is not None:
+        mask &= index["Days To Expiry"].to_numpy() <= expiring_within
+    if bd_ba is not None:
+        mask &= (index["BD/BA"] == bd_ba).to_numpy()
+    return index.iloc[np.flatnonzero(mask)[:n]]
+
+
+if __name__ == "__main__":
+    from dashboard_data import find_latest_files, load_data
+
+    files = find_latest_files()
+    loss = load_or_build_loss_to_lease(load_data(files), files)
+    print(loss["by_bd_ba"].to_string(index=False))
+    print(loss["by_expiry"].to_string(index=False))
+    print(top_units(loss["index"], 10, expiring_within=90).to_string(index=False))
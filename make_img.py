@@ -7,6 +7,7 @@ import os
 import json
 from datetime import datetime
 import kaleido
+from histograms import Histogram, HISTOGRAM_SPECS
 
 BASE_DIR = os.path.join(os.getcwd(), "data")  # Use relative path
 IMG_DIR = "plotly_pdf_images"
@@ -151,9 +152,10 @@ if tenant_data is not None:
         # **Ensure "SqFt" column is numeric**
     filtered_df["Sqft"] = pd.to_numeric(filtered_df["Sqft"], errors="coerce")
 
-        # **Group by SqFt bins and Calculate Average Lease Days**
-    filtered_df["Sqft Group"] = pd.cut(filtered_df["Sqft"], bins=10).astype(str)
-    avg_lease_days_df = filtered_df.groupby("Sqft Group")["Lease Days"].mean().reset_index()
+        # **Average Lease Days per fixed SqFt bin (same bins in every snapshot, see histograms.py)**
+    sqft_hist = Histogram.from_frame(filtered_df, "Sqft", HISTOGRAM_SPECS["Sqft"][3], ["Lease Days"])
+    avg_lease_days_df = sqft_hist.to_frame().query("Count > 0")
+    avg_lease_days_df = avg_lease_days_df.rename(columns={"Bin": "Sqft Group", "Avg Lease Days": "Lease Days"})[["Sqft Group", "Lease Days"]]
 
     fig3 = px.bar(avg_lease_days_df, 
                  x="Sqft Group", 
@@ -374,20 +376,19 @@ if tenant_data is not None:
     df1["Days Vacant"] = pd.to_numeric(df["Days Vacant"], errors="coerce")
     df1["Sqft"] = pd.to_numeric(df1["Sqft"], errors="coerce")
 
-        # **Drop NaN values**
-    df_filtered1 = df1.dropna(subset=["Sqft", "Days Vacant"])
-    
-    fig8 = px.scatter(df_filtered1, 
-                 x="Sqft", 
-                 y="Days Vacant",
+        # **Avg Days Vacant per fixed SqFt bin instead of one point per unit**
+    vacant_sqft = Histogram.from_frame(df1, "Sqft", HISTOGRAM_SPECS["Vacant Sqft"][3], ["Days Vacant"]).to_frame()
+    vacant_sqft = vacant_sqft[vacant_sqft["Count"] > 0]
+
+    fig8 = px.bar(vacant_sqft,
+                 x="Bin",
+                 y="Avg Days Vacant",
                  title="📊 Relationship Between Square Footage and Days Vacant",
-                 labels={"Sqft": "Square Footage", "Days Vacant": "Days Vacant"},
-                 color="Days Vacant",  # Color based on vacancy duration
-                 size="Days Vacant",  # Marker size based on days vacant
-                 hover_data=["Sqft", "Days Vacant"],  # Display additional data on hover
-                 color_continuous_scale="Viridis",  # Gradient color scheme
-                 opacity=0.7,  # Reduce opacity for better visualization
-                 size_max=15)  # Adjust marker size
+                 labels={"Bin": "Square Footage", "Avg Days Vacant": "Avg Days Vacant"},
+                 color="Avg Days Vacant",  # Color based on vacancy duration
+                 hover_data=["Count"],  # Units per bin on hover
+                 text_auto=True,
+                 color_continuous_scale="Viridis")  # Gradient color scheme
 
         # 🔹 Improve Layout & Style
     fig8.update_layout(
@@ -0,0 +1,194 @@
+"""
+Memory use per pipeline stage, with optional budgets.
+
+While a stage runs, a background thread samples the RSS of this process plus its
+children (Chrome from the scraper, Kaleido's renderer) every SAMPLE_INTERVAL seconds,
+so the stage's peak includes the browsers it starts. With trace_allocations=True,
+tracemalloc also records the Python heap peak and the top allocation sites (slower,
+so it's off by default). tracemalloc is process-wide, so the pipeline runs stages one
+at a time while it is on, and stops it again if it wasn't already running. Stages can report the size of the DataFrames they hold
+with note_dataframes().
+
+Stages in the same process share one RSS, so when stages run concurrently each
+one's peak includes whatever else was running at the time (see "overlapped" in
+the report).
+
+Budgets come from memory_budgets.json (or --memory-budget on the pipeline CLI):
+
+    {"render-images": {"peak_mb": 1500, "action": "fail"},
+     "clean": {"peak_mb": 800}}               # action defaults to "warn"
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+try:
+    import psutil
+except ImportError:  # Fall back to the process-lifetime peak from resource (no children, Unix only)
+    psutil = None
+
+MEMORY_BUDGETS_FILE = "memory_budgets.json"
+SAMPLE_INTERVAL = 0.05
+TOP_ALLOCATIONS = 10
+
+_current = threading.local()
+_tracing_lock = threading.Lock()
+_tracing_stages = 0  # Stages currently tracing allocations
+_started_tracing = False  # True when tracemalloc was started here (and should be stopped here)
+
+
+def _start_tracing():
+    global _tracing_stages, _started_tracing
+    with _tracing_lock:
+        if _tracing_stages == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _tracing_stages += 1
+
+
+def _stop_tracing():
+    global _tracing_stages, _started_tracing
+    with _tracing_lock:
+        _tracing_stages -= 1
+        if _tracing_stages == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+def rss_mb(include_children=True):
+    """Resident memory of this process (and its children) in MB."""
+    if psutil is None:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024  # KB on Linux
+    process = psutil.Process()
+    rss = process.memory_info().rss
+    if include_children:
+        for child in process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+    return rss / 1024 ** 2
+
+
+def dataframe_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def note_dataframes(dfs, prefix=""):
+    """Record {name: MB} of some DataFrames on the stage running in this thread (no-op outside a stage)."""
+    tracker = getattr(_current, "tracker", None)
+    if tracker is not None:
+        for name, df in dfs.items():
+            tracker.dataframes[f"{prefix}{name}"] = round(dataframe_mb(df), 2)
+
+
+class StageMemory:
+    """Context manager sampling peak RSS (and optionally tracemalloc) while one stage runs."""
+
+    def __init__(self, name, trace_allocations=False, interval=SAMPLE_INTERVAL, top=TOP_ALLOCATIONS):
+        self.name = name
+        self.trace_allocations = trace_allocations
+        self.interval = interval
+        self.top = top
+        self.dataframes = {}
+        self.start_mb = self.peak_mb = self.end_mb = 0.0
+        self.python_peak_mb = None
+        self.top_allocations = []
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, rss_mb())
+
+    def __enter__(self):
+        _current.tracker = self
+        self.start_mb = self.peak_mb = rss_mb()
+        if self.trace_allocations:
+            _start_tracing()
+            tracemalloc.reset_peak()
+            self._start_snapshot = tracemalloc.take_snapshot()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._sampler.join()
+        _current.tracker = None
+        self.end_mb = rss_mb()
+        self.peak_mb = max(self.peak_mb, self.end_mb)
+        if self.trace_allocations:
+            self.python_peak_mb = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+            growth = tracemalloc.take_snapshot().compare_to(self._start_snapshot, "lineno")
+            self.top_allocations = [
+                {"site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                 "size_mb": round(stat.size_diff / 1024 ** 2, 2), "count": stat.count_diff}
+                for stat in sorted(growth, key=lambda stat: stat.size_diff, reverse=True)[: self.top]
+            ]
+            self._start_snapshot = None
+            _stop_tracing()
+        return False
+
+    def report(self):
+        report = {
+            "start_rss_mb": round(self.start_mb, 1),
+            "peak_rss_mb": round(self.peak_mb, 1),
+            "end_rss_mb": round(self.end_mb, 1),
+            "peak_delta_mb": round(self.peak_mb - self.start_mb, 1),
+        }
+        if self.dataframes:
+            report["dataframes_mb"] = self.dataframes
+        if self.python_peak_mb is not None:
+            report["python_peak_mb"] = round(self.python_peak_mb, 1)
+            report["top_allocations"] = self.top_allocations
+        return report
+
+
+def load_budgets(path=MEMORY_BUDGETS_FILE):
+    """{stage: {"peak_mb": float, "action": "warn" | "fail"}} from a JSON file, {} if there is none."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def parse_budget(text):
+    """'render-images=1500' or 'render-images=1500:fail' -> ("render-images", {"peak_mb": 1500.0, "action": "fail"})"""
+    stage, _, limit = text.partition("=")
+    peak_mb, _, action = limit.partition(":")
+    if not stage or not peak_mb or action not in ("", "warn", "fail"):
+        raise ValueError(f"Bad memory budget {text!r}, expected STAGE=MB or STAGE=MB:fail")
+    return stage, {"peak_mb": float(peak_mb), "action": action or "warn"}
+
+
+def check_budget(stage, memory, budgets):
+    """(action, message) when the stage's peak RSS is over its budget, else (None, None)."""
+    budget = budgets.get(stage)
+    if not budget or memory["peak_rss_mb"] <= budget["peak_mb"]:
+        return None, None
+    return budget.get("action", "warn"), (
+        f"{stage} peaked at {memory['peak_rss_mb']:.0f} MB, over its {budget['peak_mb']:.0f} MB budget"
+    )
+
+
+def mark_overlaps(stage_reports):
+    """Add "overlapped": [other stages] to stages whose run time overlapped another's."""
+    ran = {name: r for name, r in stage_reports.items() if r.get("started_s") is not None and "memory" in r}
+    for name, r in ran.items():
+        start, end = r["started_s"], r["started_s"] + r["duration_s"]
+        others = [other for other, o in ran.items()
+                  if other != name and o["started_s"] < end and o["started_s"] + o["duration_s"] > start]
+        if others:
+            r["memory"]["overlapped"] = others
+
+
+if __name__ == "__main__":
+    print(f"RSS now: {rss_mb():.1f} MB ({'psutil' if psutil else 'resource'})")
+    with StageMemory("demo", trace_allocations=True) as tracker:
+        data = [list(range(1000)) for _ in range(2000)]
+        time.sleep(0.2)
+    print(json.dumps(tracker.report(), indent=4))
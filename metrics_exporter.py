@@ -0,0 +1,180 @@
+"""
+Prometheus metrics for the refresh pipeline and data freshness.
+
+Collected from what the pipeline already writes, no extra bookkeeping:
+  cache/pipeline_report.json   stage durations / status / peak RSS, last run and last success
+  scraper_telemetry.jsonl      last scraper run: step durations, download sizes, 2FA wait
+  data/*_cleaned_*.csv         snapshot age per report prefix
+  cache/snapshot.json          row counts per report
+
+Either written in the text exposition format for node_exporter's textfile collector
+(atomically, so a scrape never sees half a file), or served over HTTP:
+
+    python metrics_exporter.py                         # writes cache/appfolio.prom
+    python metrics_exporter.py --textfile /var/lib/node_exporter/appfolio.prom
+    python metrics_exporter.py --serve 9108            # http://localhost:9108/metrics
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dashboard_data import BASE_DIR, CACHE_DIR, SNAPSHOT_FILE, file_prefixes, extract_timestamp_from_filename, find_latest_files
+from telemetry import TELEMETRY_FILE
+
+PIPELINE_REPORT_FILE = os.path.join(CACHE_DIR, "pipeline_report.json")
+METRICS_TEXTFILE = os.getenv("APPFOLIO_METRICS_TEXTFILE", os.path.join(CACHE_DIR, "appfolio.prom"))
+
+STATUS_OK = ("ran", "skipped")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_metric(name, help_text, metric_type, samples):
+    """One metric family in the text exposition format; samples are (labels dict, value) pairs."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        if value is None:
+            continue
+        label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+        sample = f"{name}{{{label_text}}}" if label_text else name
+        lines.append(f"{sample} {float(value)!r}")
+    return "\n".join(lines)
+
+
+def _timestamp(iso_text):
+    return datetime.fromisoformat(iso_text).timestamp() if iso_text else None
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def pipeline_metrics(report_file=PIPELINE_REPORT_FILE):
+    report = _read_json(report_file)
+    if not report:
+        return []
+    stages = report["stages"]
+    return [
+        format_metric("appfolio_pipeline_success", "1 if the last pipeline run succeeded.", "gauge",
+                      [({}, int(report["ok"]))]),
+        format_metric("appfolio_pipeline_duration_seconds", "Wall time of the last pipeline run.", "gauge",
+                      [({}, report["total_s"])]),
+        format_metric("appfolio_pipeline_last_run_timestamp_seconds", "When the last pipeline run finished.", "gauge",
+                      [({}, _timestamp(report["finished_at"]))]),
+        format_metric("appfolio_pipeline_last_success_timestamp_seconds", "When the pipeline last finished without failures.",
+                      "gauge", [({}, _timestamp(report.get("last_success_at")))]),
+        format_metric("appfolio_pipeline_stage_duration_seconds", "Duration of each stage in the last run (0 when skipped).",
+                      "gauge", [({"stage": name}, stage["duration_s"]) for name, stage in stages.items()]),
+        format_metric("appfolio_pipeline_stage_success", "1 if the stage ran or was up to date, 0 if it failed or was blocked.",
+                      "gauge", [({"stage": name}, int(stage["status"] in STATUS_OK)) for name, stage in stages.items()]),
+        format_metric("appfolio_pipeline_stage_peak_rss_bytes", "Peak resident memory while the stage ran.", "gauge",
+                      [({"stage": name}, stage["memory"]["peak_rss_mb"] * 1024 ** 2)
+                       for name, stage in stages.items() if "memory" in stage]),
+    ]
+
+
+def scraper_metrics(telemetry_file=TELEMETRY_FILE):
+    """Metrics from the last scraper run in the telemetry file."""
+    if not os.path.exists(telemetry_file):
+        return []
+    with open(telemetry_file, encoding="utf-8") as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    summaries = [e for e in events if e["event"] == "run_summary"]
+    if not summaries:
+        return []
+    last = summaries[-1]
+    steps = [e for e in events if e["run_id"] == last["run_id"] and e["event"] == "step"]
+    code_wait = next((e["duration_s"] for e in steps if e["step"] == "2fa_code_wait"), None)
+    return [
+        format_metric("appfolio_scraper_success", "1 if the last AppFolio download run succeeded.", "gauge",
+                      [({}, int(last["success"]))]),
+        format_metric("appfolio_scraper_last_run_timestamp_seconds", "When the last AppFolio download run ended.", "gauge",
+                      [({}, _timestamp(last["at"]))]),
+        format_metric("appfolio_scraper_duration_seconds", "Wall time of the last AppFolio download run.", "gauge",
+                      [({}, last["total_s"])]),
+        format_metric("appfolio_scraper_2fa_wait_seconds", "Time from requesting the 2FA code to receiving it.", "gauge",
+                      [({}, code_wait)]),
+        format_metric("appfolio_scraper_step_duration_seconds", "Duration of each scraper step in the last run.", "gauge",
+                      [({"step": e["step"], "report": e.get("report", "")}, e["duration_s"]) for e in steps]),
+        format_metric("appfolio_scraper_download_bytes", "Size of each downloaded export in the last run.", "gauge",
+                      [({"report": e["report"]}, e["bytes"]) for e in steps if e["step"] == "download" and "bytes" in e]),
+    ]
+
+
+def freshness_metrics(data_dir=BASE_DIR, snapshot_file=SNAPSHOT_FILE, now=None):
+    """Age of the newest cleaned export per report, and rows per report in the ingested snapshot."""
+    now = now or time.time()
+    latest = find_latest_files(data_dir) if os.path.isdir(data_dir) else {}
+    stamps = {name: extract_timestamp_from_filename(os.path.basename(path)).timestamp() for name, path in latest.items()}
+    snapshot = _read_json(os.path.splitext(snapshot_file)[0] + ".json") or {}
+    return [
+        format_metric("appfolio_snapshot_timestamp_seconds", "Timestamp in the name of the newest cleaned CSV per report.", "gauge",
+                      [({"report": name, "prefix": file_prefixes[name]}, stamp) for name, stamp in stamps.items()]),
+        format_metric("appfolio_snapshot_age_seconds", "Seconds since the newest cleaned CSV per report was written.", "gauge",
+                      [({"report": name, "prefix": file_prefixes[name]}, now - stamp) for name, stamp in stamps.items()]),
+        format_metric("appfolio_report_rows", "Rows per report in the ingested snapshot.", "gauge",
+                      [({"report": name}, rows) for name, rows in snapshot.get("rows", {}).items()]),
+    ]
+
+
+def collect(data_dir=BASE_DIR, report_file=PIPELINE_REPORT_FILE, telemetry_file=TELEMETRY_FILE, snapshot_file=SNAPSHOT_FILE):
+    """Every metric as one exposition-format text."""
+    families = pipeline_metrics(report_file) + scraper_metrics(telemetry_file) + freshness_metrics(data_dir, snapshot_file)
+    return "\n".join(families) + "\n"
+
+
+def write_textfile(path=METRICS_TEXTFILE, **sources):
+    """Write the metrics for node_exporter's textfile collector (tmp file + rename, never half-written)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        f.write(collect(**sources))
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def serve(port, host="0.0.0.0", **sources):
+    """Serve /metrics, collected fresh on every scrape."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = collect(**sources).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    print(f"📡 Serving metrics on http://{host}:{port}/metrics")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        httpd.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export pipeline and data freshness metrics for Prometheus")
+    parser.add_argument("--textfile", default=METRICS_TEXTFILE, help="Where to write the .prom file")
+    parser.add_argument("--serve", type=int, default=None, metavar="PORT", help="Serve /metrics instead of writing a file")
+    parser.add_argument("--data-dir", default=BASE_DIR)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, data_dir=args.data_dir)
+    else:
+        print(f"✅ Metrics written to {write_textfile(args.textfile, data_dir=args.data_dir)}")
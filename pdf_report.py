@@ -0,0 +1,307 @@
+from fpdf import FPDF
+import io
+import os
+import json
+import hashlib
+
+try:
+    from PIL import Image  # Used to re-encode chart images before they go into the PDF
+except ImportError:
+    Image = None
+
+# Page layout for the dashboard report (Landscape A4 = 297mm wide)
+# Each image slot is (name, x, y, w, h) in mm; name matches the file stem in plotly_images/
+REPORT_PAGES = [
+    {
+        "title": "Tenant Analysis",
+        "metrics": "metrics1",
+        "images": [
+            ("combined_summary", 10, 35, 270, 55),  # Full width table
+            ("avg_rent", 10, 95, 140, 85),
+            ("status", 155, 95, 140, 85),
+        ],
+    },
+    {
+        "title": "Vacant Analysis",
+        "metrics": "metrics2",
+        "images": [
+            ("unit-count", 10, 35, 140, 85),
+            ("bed-bath-avg-day", 155, 35, 140, 85),
+            ("bed-bath-unit", 10, 120, 140, 85),
+            ("move-in-out", 155, 120, 140, 85),
+        ],
+    },
+    {
+        "title": "Work order Analysis",
+        "metrics": "metrics3",
+        "images": [
+            ("order-type", 10, 35, 140, 85),
+            ("order-issue", 155, 35, 140, 85),
+        ],
+    },
+]
+
+METRIC_X_POSITIONS = [10, 85, 160, 235]
+METRIC_Y_POSITION = 18
+
+# Resolution images are rendered at for their slot on the page
+TARGET_DPI = 150
+DEFAULT_SLOT_MM = (140, 85)  # Used for figures that have no slot in the report
+DEFAULT_LAYOUT_WIDTH = 1000  # Plotly layout width when a figure doesn't set one
+
+# Only switch a chart to JPEG when it is clearly smaller than the optimized PNG
+JPEG_QUALITY = 85
+JPEG_MIN_SAVING = 0.6
+
+
+def report_image_names():
+    """Names of every image placed in the report, in page order."""
+    return [slot[0] for page in REPORT_PAGES for slot in page["images"]]
+
+
+def report_slots():
+    """{name: (w_mm, h_mm)} for every image slot in the report."""
+    return {name: (w, h) for page in REPORT_PAGES for name, x, y, w, h in page["images"]}
+
+
+def slot_pixel_size(w_mm, h_mm, dpi=TARGET_DPI):
+    """Pixel size an image needs to fill a w_mm x h_mm slot at the given DPI."""
+    return round(w_mm / 25.4 * dpi), round(h_mm / 25.4 * dpi)
+
+
+def figure_to_png(fig, width=None, height=None):
+    """
+    Render a Plotly or Matplotlib figure to PNG bytes without touching the disk.
+
+    width/height are the target size in pixels. Plotly keeps its own layout width
+    (so fonts and margins look the same as on the dashboard) and is scaled up or
+    down to the target; its height follows the slot's aspect ratio.
+    """
+    if hasattr(fig, "to_image"):  # Plotly figure (needs kaleido)
+        if width is None or height is None:
+            return fig.to_image(format="png", width=width, height=height)
+        layout_width = fig.layout.width or DEFAULT_LAYOUT_WIDTH
+        layout_height = round(layout_width * height / width)
+        return fig.to_image(format="png", width=layout_width, height=layout_height,
+                            scale=width / layout_width)
+
+    if hasattr(fig, "savefig"):  # Matplotlib figure
+        dpi = 300
+        if width is not None:
+            dpi = max(50, width / fig.get_figwidth())
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight", pad_inches=0.1)
+        return buffer.getvalue()
+
+    raise TypeError(f"Unsupported figure type: {type(fig).__name__}")
+
+
+def encode_asset(png_bytes):
+    """
+    Pick the smallest sensible encoding for one chart image.
+
+    Charts with few colours become a palette PNG; images with many colours
+    (gradients, photos) switch to JPEG when that saves enough space.
+    Without Pillow the PNG is returned unchanged.
+    """
+    if Image is None:
+        return png_bytes
+
+    img = Image.open(io.BytesIO(png_bytes))
+    img = img.convert("RGBA") if img.mode in ("RGBA", "LA", "P") else img.convert("RGB")
+    if img.mode == "RGBA" and img.getextrema()[3][0] == 255:
+        img = img.convert("RGB")  # Drop a fully opaque alpha channel
+
+    candidates = []
+    colors = img.getcolors(maxcolors=256)
+    if colors is not None:
+        buffer = io.BytesIO()
+        img.quantize(colors=len(colors)).save(buffer, format="PNG", optimize=True)
+        candidates.append(buffer.getvalue())
+    else:
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG", optimize=True)
+        png_optimized = buffer.getvalue()
+        candidates.append(png_optimized)
+
+        if img.mode == "RGB":
+            buffer = io.BytesIO()
+            img.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+            if len(buffer.getvalue()) < len(png_optimized) * JPEG_MIN_SAVING:
+                candidates.append(buffer.getvalue())
+
+    candidates.append(png_bytes)
+    return min(candidates, key=len)
+
+
+def image_extension(data):
+    return "jpg" if data[:3] == b"\xff\xd8\xff" else "png"
+
+
+def render_images(figures, dpi=TARGET_DPI, encode=True):
+    """
+    Render a {name: figure} dict to a {name: image_bytes} dict.
+
+    Each figure is sized for its slot in REPORT_PAGES at `dpi`, then re-encoded
+    with encode_asset() unless encode=False.
+    """
+    slots = report_slots()
+    images = {}
+    for name, fig in figures.items():
+        width, height = slot_pixel_size(*slots.get(name, DEFAULT_SLOT_MM), dpi=dpi)
+        data = figure_to_png(fig, width=width, height=height)
+        images[name] = encode_asset(data) if encode else data
+    return images
+
+
+def write_images(images, image_dir):
+    """Optionally persist rendered images, e.g. to keep plotly_images/ up to date."""
+    os.makedirs(image_dir, exist_ok=True)
+    for name, data in images.items():
+        ext = image_extension(data)
+        path = os.path.join(image_dir, f"{name}.{ext}")
+        # tmp file + rename, so a reader never sees a half-written image
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+        # Remove a stale copy in the other format so load_images() can't pick it up
+        stale = os.path.join(image_dir, f"{name}.{'png' if ext == 'jpg' else 'jpg'}")
+        if os.path.exists(stale):
+            os.remove(stale)
+
+
+def load_images(image_dir):
+    """Read the report images back from a folder such as plotly_images/."""
+    images = {}
+    for name in report_image_names():
+        for ext in ("png", "jpg"):
+            path = os.path.join(image_dir, f"{name}.{ext}")
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    images[name] = f.read()
+                break
+        else:
+            print(f"Image not found, skipping: {name} in {image_dir}")
+    return images
+
+
+def asset_digest(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def size_report(images, pdf_bytes):
+    """
+    Final PDF size plus the size of every asset; identical assets share one digest
+    and are only stored once in the PDF.
+    """
+    assets = []
+    unique = {}
+    for name, data in images.items():
+        digest = asset_digest(data)
+        assets.append({
+            "name": name,
+            "format": image_extension(data),
+            "bytes": len(data),
+            "digest": digest[:12],
+            "duplicate_of": unique.get(digest),
+        })
+        unique.setdefault(digest, name)
+    return {
+        "pdf_bytes": len(pdf_bytes),
+        "asset_bytes": sum(len(images[name]) for name in unique.values()),
+        "unique_assets": len(unique),
+        "assets": assets,
+    }
+
+
+def print_size_report(report):
+    print(f"PDF size: {report['pdf_bytes'] / 1024:,.1f} KB "
+          f"({report['unique_assets']} unique images, {report['asset_bytes'] / 1024:,.1f} KB)")
+    for asset in report["assets"]:
+        note = f" (same as {asset['duplicate_of']})" if asset["duplicate_of"] else ""
+        print(f"  {asset['name']}.{asset['format']}: {asset['bytes'] / 1024:,.1f} KB{note}")
+
+
+def load_metrics(json_file="metrics.json"):
+    with open(json_file, "r") as f:
+        return json.load(f)
+
+
+def save_metrics(metrics_data, json_file="metrics.json"):
+    with open(json_file + ".tmp", "w") as f:
+        json.dump(metrics_data, f, indent=4)
+    os.replace(json_file + ".tmp", json_file)
+
+
+# Create PDF with FPDF in Landscape Mode
+class PDF(FPDF):
+    def header(self):
+        self.set_font("Arial", "B", 14)  # Title font
+        self.ln(1)  # Adjusted spacing for better alignment
+
+
+def _add_metrics(pdf, metrics):
+    pdf.set_font("Arial", "B", 9)
+    for i, (label, value) in enumerate(metrics):
+        pdf.set_xy(METRIC_X_POSITIONS[i], METRIC_Y_POSITION)
+        pdf.cell(50, 6, label, ln=True)
+        pdf.set_font("Arial", "", 10)
+        pdf.set_xy(METRIC_X_POSITIONS[i], METRIC_Y_POSITION + 5)
+        pdf.cell(50, 6, value, ln=True)
+        pdf.set_font("Arial", "B", 9)  # Reset font
+
+
+def build_pdf(images, metrics_data, output=None):
+    """
+    Build the dashboard PDF from in-memory PNG bytes and a metrics dict.
+
+    images: {name: image_bytes} keyed like REPORT_PAGES slots (PNG or JPEG)
+    metrics_data: same structure as metrics.json ({"metrics1": [{"label", "value"}], ...})
+    Returns the PDF as bytes and writes it to `output` when a path is given.
+    """
+    pdf = PDF(orientation="L", unit="mm", format="A4")  # Landscape Mode
+    pdf.set_auto_page_break(auto=True, margin=15)
+
+    # One buffer per distinct image, so identical charts are embedded once
+    buffers = {}
+
+    for page in REPORT_PAGES:
+        pdf.add_page()
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(280, 8, page["title"], ln=True, align="C")
+        pdf.ln(1)
+
+        metrics = [(m["label"], str(m["value"])) for m in metrics_data.get(page["metrics"], [])]
+        _add_metrics(pdf, metrics)
+        pdf.ln(8)  # Less space before graphs
+
+        for name, x, y, w, h in page["images"]:
+            if name not in images:
+                print(f"Missing image for slot '{name}', leaving it blank")
+                continue
+            digest = asset_digest(images[name])
+            if digest not in buffers:
+                buffers[digest] = io.BytesIO(images[name])
+            buffers[digest].seek(0)
+            pdf.image(buffers[digest], x=x, y=y, w=w, h=h)
+
+    pdf_bytes = bytes(pdf.output())
+    if output:
+        with open(output, "wb") as f:
+            f.write(pdf_bytes)
+    return pdf_bytes
+
+
+def build_report(figures, metrics_data, output=None, image_dir=None, metrics_file=None,
+                 dpi=TARGET_DPI):
+    """
+    Single-pass entry point: figures -> image buffers -> PDF, all in memory.
+
+    Pass image_dir / metrics_file to also write the intermediate files.
+    """
+    images = render_images(figures, dpi=dpi)
+    if image_dir:
+        write_images(images, image_dir)
+    if metrics_file:
+        save_metrics(metrics_data, metrics_file)
+    return build_pdf(images, metrics_data, output=output)
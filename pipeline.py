@@ -0,0 +1,387 @@
+"""
+Refresh pipeline as a small DAG: download -> clean -> ingest -> (aggregate, render-images) -> build-pdf.
+Alongside, the dashboard's derived caches each get their own stage with their own
+cache file as output (events, loss-to-lease, unit-index, search-index, histograms and
+sla-index from the ingested snapshot; work-orders, timeseries and diff straight from
+the cleaned exports), so a deleted or stale cache is rebuilt on the next run.
+
+render-images publishes the images and metrics of one snapshot as a version in
+artifacts/ (artifact_store.py) and build-pdf reads that version through
+artifacts/CURRENT, so the PDF never mixes half-written or differently-aged files.
+
+Each stage declares its inputs and outputs. A stage is skipped when its outputs
+exist, are newer than its inputs and none of its dependencies ran. Stages whose
+dependencies are done run concurrently. Timings and peak memory per stage go to
+cache/pipeline_report.json; memory budgets (memory_budgets.json) warn or fail a stage.
+
+    python pipeline.py               # only what's out of date
+    python pipeline.py --download    # force a fresh AppFolio download
+    python pipeline.py --force render-images
+    python pipeline.py --memory-budget render-images=1500:fail --trace-allocations
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
+
+from dashboard_data import (
+    BASE_DIR, CACHE_DIR, SNAPSHOT_FILE, file_prefixes, extract_timestamp_from_filename, find_latest_files, find_latest_raw_exports,
+    clean_csv, load_data, prepare_data, save_snapshot, load_snapshot, compute_metrics,
+)
+from snapshot_diff import DIFF_DIR, list_snapshots, diff_path, latest_diff, summarize_diff
+from timeseries import TIMESERIES_FILE, update_timeseries
+from forecast import events_path, load_or_build_events
+from loss_to_lease import loss_to_lease_path, load_or_build_loss_to_lease
+from unit_index import unit_index_path, load_or_build_unit_index
+from search_index import search_index_path, load_or_build_search_index
+from histograms import histogram_path, load_or_build_histograms
+from work_order_stream import WORK_ORDER_STATE_FILE, source_signature, update_work_order_state
+from work_order_sla import sla_index_path, load_or_build_sla_index
+from memory_tracking import StageMemory, note_dataframes, load_budgets, parse_budget, check_budget, mark_overlaps, MEMORY_BUDGETS_FILE
+from metrics_exporter import write_textfile, METRICS_TEXTFILE
+from pdf_report import report_image_names, render_images, write_images, save_metrics, build_pdf
+from artifact_store import ARTIFACT_DIR, publish, load_current, current_path
+
+IMG_DIR = "plotly_images"
+json_file = "metrics.json"
+pdf_file = "appfolio_dashboard.pdf"
+REPORT_FILE = os.path.join(CACHE_DIR, "pipeline_report.json")
+
+DOWNLOAD_MAX_AGE = timedelta(hours=6)  # Re-download when the newest export is older than this
+
+# Raw export prefix for each cleaned report ("tenant_data" -> "tenant_data_cleaned")
+RAW_PREFIXES = [prefix[: -len("_cleaned")] for prefix in file_prefixes.values()]
+
+
+class Stage:
+    """
+    One pipeline step.
+
+    inputs / outputs: callables returning file paths, evaluated when the stage is checked
+    not_before: optional callable; outputs older than this datetime are stale
+    """
+
+    def __init__(self, name, run, inputs=None, outputs=None, deps=(), not_before=None):
+        self.name = name
+        self.run = run
+        self.inputs = inputs or (lambda: [])
+        self.outputs = outputs or (lambda: [])
+        self.deps = list(deps)
+        self.not_before = not_before
+
+    def is_up_to_date(self):
+        outputs = self.outputs()
+        if not outputs or not all(path and os.path.exists(path) for path in outputs):
+            return False
+        oldest_output = min(os.path.getmtime(path) for path in outputs)
+
+        inputs = [path for path in self.inputs() if path and os.path.exists(path)]
+        if inputs and max(os.path.getmtime(path) for path in inputs) > oldest_output:
+            return False
+
+        if self.not_before and datetime.fromtimestamp(oldest_output) < self.not_before():
+            return False
+        return True
+
+
+def _run_stage(stage, trace_allocations=False):
+    start = time.perf_counter()
+    memory = StageMemory(stage.name, trace_allocations)
+    try:
+        with memory:
+            stage.run()
+    except BaseException as e:
+        e.memory = memory.report()  # Keep the figures of a stage that died (e.g. MemoryError)
+        raise
+    return time.perf_counter() - start, memory.report()
+
+
+def run_pipeline(stages, force=(), workers=4, report_file=REPORT_FILE, budgets=None, trace_allocations=False):
+    """
+    Run `stages` in dependency order and write a per-stage timing and memory report.
+    budgets: {stage: {"peak_mb": ..., "action": "warn" | "fail"}}; a stage over a "fail"
+    budget counts as failed (its dependents are blocked).
+    Returns the report dict; report["ok"] is False if any stage failed.
+    """
+    if trace_allocations:
+        print("🧠 Tracing allocations, running stages one at a time")
+    by_name = {stage.name: stage for stage in stages}
+    pending = dict(by_name)
+    results = {}
+    budgets = budgets or {}
+    pipeline_start = time.perf_counter()
+
+    def record(name, status, duration=0.0, started=None, error=None, memory=None):
+        results[name] = {
+            "status": status,
+            "started_s": round(started - pipeline_start, 3) if started else None,
+            "duration_s": round(duration, 3),
+        }
+        if memory:
+            results[name]["memory"] = memory
+            action, message = check_budget(name, memory, budgets)
+            if action == "fail":
+                status = results[name]["status"] = "failed"
+                error = error or message
+            elif action == "warn":
+                results[name]["warning"] = message
+                print(f"[WARNING] {message}")
+        if error:
+            results[name]["error"] = error
+        print(f"[{status.upper()}] {name}" + (f" ({duration:.2f}s)" if status == "ran" else "") + (f": {error}" if error else ""))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        while pending or running:
+            progressed = False
+            for name, stage in list(pending.items()):
+                dep_status = [results.get(dep, {}).get("status") for dep in stage.deps]
+                if any(status in ("failed", "blocked") for status in dep_status):
+                    del pending[name]
+                    record(name, "blocked")
+                    progressed = True
+                elif all(status in ("ran", "skipped") for status in dep_status):
+                    if trace_allocations and running:
+                        continue  # tracemalloc is process-wide, concurrent stages would report each other's heap
+                    del pending[name]
+                    progressed = True
+                    deps_ran = any(status == "ran" for status in dep_status)
+                    if name not in force and not deps_ran and stage.is_up_to_date():
+                        record(name, "skipped")
+                        continue
+                    running[pool.submit(_run_stage, stage, trace_allocations)] = (name, time.perf_counter())
+
+            if progressed:
+                continue  # Newly skipped stages may have unblocked others
+            if not running:
+                raise ValueError(f"Unknown dependency or cycle in stages: {', '.join(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, started = running.pop(future)
+                try:
+                    duration, memory = future.result()
+                    record(name, "ran", duration, started, memory=memory)
+                except BaseException as e:  # SystemExit from the scraper counts as a failure too
+                    record(name, "failed", time.perf_counter() - started, started, error=repr(e),
+                           memory=getattr(e, "memory", None))
+
+    mark_overlaps(results)
+    peaks = [result["memory"]["peak_rss_mb"] for result in results.values() if "memory" in result]
+    finished_at = datetime.now().isoformat(timespec="seconds")
+    ok = all(result["status"] in ("ran", "skipped") for result in results.values())
+    previous = {}
+    if report_file and os.path.exists(report_file):
+        with open(report_file) as f:
+            previous = json.load(f)
+    report = {
+        "finished_at": finished_at,
+        "last_success_at": finished_at if ok else previous.get("last_success_at"),  # Carried over failed runs
+        "total_s": round(time.perf_counter() - pipeline_start, 3),
+        "ok": ok,
+        "peak_rss_mb": max(peaks, default=None),
+        "memory_budgets": budgets,
+        "stages": {stage.name: results[stage.name] for stage in stages},
+    }
+    if report_file:
+        os.makedirs(os.path.dirname(report_file), exist_ok=True)
+        with open(report_file, "w") as f:
+            json.dump(report, f, indent=4)
+    return report
+
+
+def build_stages(data_dir=BASE_DIR, image_dir=IMG_DIR, metrics_file=json_file, output=pdf_file,
+                 snapshot_file=SNAPSHOT_FILE, today=None, artifact_dir=ARTIFACT_DIR):
+    """The standard refresh pipeline."""
+
+    def download():
+        import appfolio_data  # Selenium is only needed when we actually download
+        if not appfolio_data.get_data_from_appfolio(clean=False):
+            raise RuntimeError("AppFolio download failed, see test.log")
+
+    def raw_exports():
+        raw = find_latest_raw_exports(data_dir)
+        return [raw.get(prefix) for prefix in RAW_PREFIXES]
+
+    def clean():
+        cleaned = find_latest_files(data_dir)
+        cleaned_mtimes = {file_prefixes[name]: os.path.getmtime(path) for name, path in cleaned.items()}
+        for prefix, raw_path in find_latest_raw_exports(data_dir).items():
+            if prefix not in RAW_PREFIXES:
+                continue
+            if os.path.getmtime(raw_path) > cleaned_mtimes.get(f"{prefix}_cleaned", 0):
+                clean_csv(raw_path, prefix, data_dir)
+
+    def cleaned_files():
+        return list(find_latest_files(data_dir).values())
+
+    def latest_files():
+        files = find_latest_files(data_dir)
+        missing = [name for name in file_prefixes if name not in files]
+        if missing:
+            raise FileNotFoundError(f"No cleaned CSV in {data_dir} for: {', '.join(missing)}")
+        return files
+
+    def ingest():
+        files = latest_files()
+        snapshot = save_snapshot(files, prepare_data(load_data(files)), snapshot_file)
+        note_dataframes(snapshot["dfs"])
+
+    loaded = {}  # snapshot file mtime -> snapshot, so the stages after ingest unpickle it once per run
+    loaded_lock = threading.Lock()
+
+    def ingested():
+        with loaded_lock:
+            key = os.path.getmtime(snapshot_file)
+            if key not in loaded:
+                loaded.clear()
+                loaded[key] = load_snapshot(snapshot_file)
+            return loaded[key]
+
+    def snapshot_cache_stage(build, path):
+        """Stage body and outputs for a cache built from the ingested snapshot, e.g. the search index."""
+        def run():
+            snapshot = ingested()
+            build(snapshot["dfs"], snapshot["files"])
+
+        def outputs():
+            files = find_latest_files(data_dir)
+            return [path(files)] if files else []
+        return run, outputs
+
+    def work_orders_csv():
+        return [find_latest_files(data_dir).get("Work Orders")]
+
+    def work_orders():
+        update_work_order_state(latest_files()["Work Orders"])  # Only new or changed orders touch the counters
+
+    def work_orders_as_of(csv_path):
+        return extract_timestamp_from_filename(os.path.basename(csv_path))
+
+    def sla_index():
+        csv_path = latest_files()["Work Orders"]
+        load_or_build_sla_index(update_work_order_state(csv_path), work_orders_as_of(csv_path))
+
+    def sla_index_file():
+        csv_path = work_orders_csv()[0]
+        return [sla_index_path(source_signature(csv_path), work_orders_as_of(csv_path))] if csv_path else []
+
+    def timeseries():
+        update_timeseries(data_dir)  # Appends only exports that aren't in cache/timeseries.csv yet
+
+    def diff():
+        # Diff against the previous Tenant Data export; stored once per pair under cache/diffs
+        changes, old_path, new_path = latest_diff(data_dir)
+        if changes is not None:
+            print(f"Changes since {os.path.basename(old_path)}: {summarize_diff(changes)}")
+
+    def diff_file():
+        # With a single Tenant Data export there is nothing to write, so the (cheap) stage always runs
+        snapshots = list_snapshots(data_dir)
+        return [diff_path(snapshots[-2], snapshots[-1], DIFF_DIR)] if len(snapshots) >= 2 else []
+
+    def tenant_snapshots():
+        return list_snapshots(data_dir)[-2:]
+
+    def aggregate():
+        save_metrics(compute_metrics(ingested()["dfs"]), metrics_file)
+
+    def render_images_stage():
+        from dashboard_charts import build_figures  # Plotly/matplotlib only load for this stage
+        wanted = set(report_image_names())
+        snapshot = ingested()
+        dfs = snapshot["dfs"]
+        note_dataframes(dfs)
+        figures = build_figures(dfs, today=today)
+        images = render_images({name: fig for name, fig in figures.items() if name in wanted})
+        # Images and metrics of the same snapshot, published together
+        publish(snapshot["files"], images, compute_metrics(dfs), artifact_dir)
+        write_images(images, image_dir)  # Loose copies in plotly_images/ for browsing
+
+    def build_pdf_stage():
+        artifacts = load_current(artifact_dir)
+        if artifacts is None:
+            raise FileNotFoundError(f"Nothing published in {artifact_dir} yet, run render-images first")
+        build_pdf(artifacts["images"], artifacts["metrics"], output=output)
+
+    def published_manifest():
+        return [current_path(artifact_dir=artifact_dir)]
+
+    def start_of_today():
+        return datetime.combine(datetime.now().date(), datetime.min.time())
+
+    snapshot_caches = [
+        ("events", load_or_build_events, events_path),  # Forecast event stream
+        ("loss-to-lease", load_or_build_loss_to_lease, loss_to_lease_path),
+        ("unit-index", load_or_build_unit_index, unit_index_path),  # Stable Unit IDs + row -> ID mappings
+        ("search-index", load_or_build_search_index, search_index_path),
+        ("histograms", load_or_build_histograms, histogram_path),
+    ]
+
+    stages = [
+        Stage("download", download, outputs=raw_exports,
+              not_before=lambda: datetime.now() - DOWNLOAD_MAX_AGE),
+        Stage("clean", clean, inputs=raw_exports, outputs=cleaned_files, deps=["download"]),
+        Stage("ingest", ingest, inputs=cleaned_files, outputs=lambda: [snapshot_file], deps=["clean"]),
+    ]
+    for name, build, path in snapshot_caches:
+        run, outputs = snapshot_cache_stage(build, path)
+        # Inputs are the exports (caches are keyed on them), so re-ingesting the same files doesn't make them stale
+        stages.append(Stage(name, run, inputs=cleaned_files, outputs=outputs, deps=["ingest"]))
+    stages += [
+        Stage("work-orders", work_orders, inputs=work_orders_csv, outputs=lambda: [WORK_ORDER_STATE_FILE],
+              deps=["clean"]),
+        Stage("sla-index", sla_index, inputs=lambda: [WORK_ORDER_STATE_FILE], outputs=sla_index_file,
+              deps=["work-orders"]),
+        Stage("timeseries", timeseries, inputs=lambda: list_snapshots(data_dir)[-1:], outputs=lambda: [TIMESERIES_FILE],
+              deps=["clean"]),
+        Stage("diff", diff, inputs=tenant_snapshots, outputs=diff_file, deps=["clean"]),
+        Stage("aggregate", aggregate, inputs=lambda: [snapshot_file], outputs=lambda: [metrics_file],
+              deps=["ingest"]),
+        # The move-in/out chart depends on today's date, so images are redrawn daily
+        Stage("render-images", render_images_stage, inputs=lambda: [snapshot_file],
+              outputs=published_manifest, deps=["ingest"], not_before=start_of_today),
+        Stage("build-pdf", build_pdf_stage, inputs=published_manifest,
+              outputs=lambda: [output], deps=["aggregate", "render-images"]),
+    ]
+    return stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the AppFolio refresh pipeline")
+    parser.add_argument("--download", action="store_true", help="Force a fresh AppFolio download")
+    parser.add_argument("--skip-download", action="store_true", help="Never download, use what's in data/")
+    parser.add_argument("--force", nargs="*", default=[], help="Stage names to run even if up to date")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--data-dir", default=BASE_DIR)
+    parser.add_argument("--output", default=pdf_file)
+    parser.add_argument("--as-of", default=None, help="Date used for 'next 60 days' charts (default: today)")
+    parser.add_argument("--memory-budgets", default=MEMORY_BUDGETS_FILE, help="JSON file of per-stage memory budgets")
+    parser.add_argument("--memory-budget", nargs="*", default=[], metavar="STAGE=MB[:fail]",
+                        help="Per-stage peak RSS budget, overrides the budgets file")
+    parser.add_argument("--trace-allocations", action="store_true", help="Record top allocation sites with tracemalloc (slower)")
+    parser.add_argument("--metrics-textfile", default=METRICS_TEXTFILE, help="Prometheus textfile written after each run")
+    args = parser.parse_args()
+
+    stages = build_stages(data_dir=args.data_dir, output=args.output, today=args.as_of)
+    if args.skip_download:
+        download = next(stage for stage in stages if stage.name == "download")
+        download.is_up_to_date = lambda: True
+    force = set(args.force) | ({"download"} if args.download else set())
+
+    budgets = load_budgets(args.memory_budgets)
+    budgets.update(parse_budget(text) for text in args.memory_budget)
+
+    report = run_pipeline(stages, force=force, workers=args.workers, budgets=budgets,
+                          trace_allocations=args.trace_allocations)
+    print(f"Pipeline {'finished' if report['ok'] else 'FAILED'} in {report['total_s']:.2f}s. Report: {REPORT_FILE}")
+    write_textfile(args.metrics_textfile, data_dir=args.data_dir)
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Opt-in profiling of Streamlit reruns.
+
+A Profiler collects (kind, name, seconds) timings for one rerun: whole dashboard
+sections, CSV loading, each BD/BA summary, each figure build and each image render.
+Together with the memory footprint of every DataFrame it is shown in a sidebar
+panel and appended to a rolling log (cache/profile_log.jsonl, last MAX_LOG_ENTRIES
+reruns), so rerun cost can be followed over time. When profiling is off every hook
+is a no-op, and wrapped functions are returned unchanged.
+
+    APPFOLIO_PROFILE=1 streamlit run streamlit.py   # or tick "Profile reruns" in the sidebar
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from functools import wraps
+
+import pandas as pd
+
+from dashboard_data import CACHE_DIR
+
+PROFILE_LOG = os.path.join(CACHE_DIR, "profile_log.jsonl")
+MAX_LOG_ENTRIES = 500
+
+_log_lock = threading.Lock()  # Sessions share one server process, so reruns can log at the same time
+
+
+class Profiler:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self._last_lap = self.started
+        self.timings = []  # (kind, name, seconds)
+
+    def section(self, kind, name):
+        """Context manager timing one block."""
+        return self._section(kind, name) if self.enabled else nullcontext()
+
+    @contextmanager
+    def _section(self, kind, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.append((kind, name, time.perf_counter() - start))
+
+    def lap(self, name):
+        """Time since the previous lap (or the start) as one dashboard section."""
+        now = time.perf_counter()
+        if self.enabled:
+            self.timings.append(("section", name, now - self._last_lap))
+        self._last_lap = now
+
+    def timed(self, func, kind, name=None):
+        """func, timed on every call; unchanged when profiling is off."""
+        if not self.enabled:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with self._section(kind, name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def wrap_module(self, module, kind, suffix):
+        """The module, with every function ending in suffix timed (e.g. dashboard_charts' *_figure)."""
+        return _TimedModule(self, module, kind, suffix) if self.enabled else module
+
+    def table(self):
+        """Timings as a DataFrame, slowest first."""
+        table = pd.DataFrame(self.timings, columns=["Kind", "Name", "Seconds"])
+        return table.sort_values("Seconds", ascending=False, kind="stable").reset_index(drop=True)
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+
+class _TimedModule:
+    def __init__(self, profiler, module, kind, suffix):
+        self._profiler, self._module, self._kind, self._suffix = profiler, module, kind, suffix
+
+    def __getattr__(self, attr):
+        value = getattr(self._module, attr)
+        if callable(value) and attr.endswith(self._suffix):
+            return self._profiler.timed(value, self._kind, attr[: -len(self._suffix)])
+        return value
+
+
+def dataframe_memory(dfs):
+    """Rows, columns and deep memory use (MB) of every DataFrame in dfs."""
+    return pd.DataFrame([
+        {"Report": name, "Rows": len(df), "Columns": df.shape[1],
+         "MB": round(df.memory_usage(deep=True).sum() / 1024 ** 2, 2)}
+        for name, df in dfs.items()
+    ])
+
+
+def append_profile_log(profiler, memory, path=PROFILE_LOG, max_entries=MAX_LOG_ENTRIES):
+    """Append this rerun to the rolling log, keeping only the last max_entries reruns."""
+    entry = {
+        "at": datetime.now().isoformat(timespec="seconds"),
+        "total_s": round(profiler.total(), 3),
+        "timings": [[kind, name, round(seconds, 4)] for kind, name, seconds in profiler.timings],
+        "memory_mb": dict(zip(memory["Report"], memory["MB"])) if len(memory) else {},
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"  # Unique per writer, even across processes
+    with _log_lock:
+        lines = []
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                lines = f.read().splitlines()[-(max_entries - 1):]
+        lines.append(json.dumps(entry))
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, path)
+    return entry
+
+
+def load_profile_log(path=PROFILE_LOG):
+    """One row per logged rerun: time, total seconds and total DataFrame memory."""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=["at", "total_s", "memory_mb"])
+    with open(path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    return pd.DataFrame({
+        "at": pd.to_datetime([e["at"] for e in entries]),
+        "total_s": [e["total_s"] for e in entries],
+        "memory_mb": [sum(e["memory_mb"].values()) for e in entries],
+    })
+
+
+def show_profile_panel(st, profiler, dfs, log_path=PROFILE_LOG):
+    """Sidebar panel with this rerun's timings, DataFrame memory and recent rerun totals; also logs the rerun."""
+    memory = dataframe_memory(dfs)
+    append_profile_log(profiler, memory, log_path)
+    with st.sidebar.expander("🩺 Profiler", expanded=False):
+        st.metric(label="⏱️ This rerun", value=f"{profiler.total():.2f}s")
+        table = profiler.table()
+        st.dataframe(table.assign(Seconds=table["Seconds"].round(3)), use_container_width=True, hide_index=True)
+        st.write("By kind")
+        st.dataframe(table.groupby("Kind")["Seconds"].agg(["count", "sum"]).round(3), use_container_width=True)
+        st.write("DataFrame memory")
+        st.dataframe(memory, use_container_width=True, hide_index=True)
+        history = load_profile_log(log_path).tail(50)
+        if len(history) > 1:
+            st.write("Recent reruns (s)")
+            st.line_chart(history.set_index("at")["total_s"])
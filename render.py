@@ -0,0 +1,95 @@
+"""
+Headless report render: metrics, charts and PDF in one process, no Streamlit server.
+
+    python render.py
+    python render.py --data-dir data --output appfolio_dashboard.pdf --as-of 2025-03-21
+"""
+import argparse
+import sys
+import time
+
+from dashboard_data import BASE_DIR, file_prefixes, find_latest_files, load_data, prepare_data, compute_metrics
+from dashboard_charts import build_figures
+from pdf_report import size_report, print_size_report, render_images, write_images, build_pdf, save_metrics, TARGET_DPI
+from artifact_store import ARTIFACT_DIR, publish
+
+IMG_DIR = "plotly_images"
+json_file = "metrics.json"
+pdf_file = "appfolio_dashboard.pdf"
+
+
+def render(data_dir=BASE_DIR, output=pdf_file, image_dir=IMG_DIR, metrics_file=json_file,
+           today=None, dpi=TARGET_DPI, artifact_dir=ARTIFACT_DIR):
+    """
+    Compute metrics, render every chart and build the PDF from the latest cleaned CSVs.
+    Images and metrics are also published as one version in artifact_dir (unless it is None).
+    Returns {"pdf_bytes": ..., "timings": {...}}; raises FileNotFoundError if a report is missing.
+    """
+    timings = {}
+    start = time.perf_counter()
+
+    files = find_latest_files(data_dir)
+    missing = [name for name in file_prefixes if name not in files]
+    if missing:
+        raise FileNotFoundError(f"No cleaned CSV in {data_dir} for: {', '.join(missing)}")
+    dfs = prepare_data(load_data(files))
+    timings["load_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    metrics_data = compute_metrics(dfs)
+    figures = build_figures(dfs, today=today)
+    timings["aggregate_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    images = render_images(figures, dpi=dpi)
+    if artifact_dir:
+        publish(files, images, metrics_data, artifact_dir)
+    if image_dir:
+        write_images(images, image_dir)
+    if metrics_file:
+        save_metrics(metrics_data, metrics_file)
+    timings["render_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pdf_bytes = build_pdf(images, metrics_data, output=output)
+    timings["pdf_s"] = time.perf_counter() - start
+
+    return {"pdf_bytes": pdf_bytes, "images": images, "files": files, "timings": timings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the dashboard PDF without a Streamlit server")
+    parser.add_argument("--data-dir", default=BASE_DIR)
+    parser.add_argument("--output", default=pdf_file)
+    parser.add_argument("--image-dir", default=IMG_DIR, help="Where to also write the chart images")
+    parser.add_argument("--no-images", action="store_true", help="Don't write chart images to disk")
+    parser.add_argument("--metrics-file", default=json_file)
+    parser.add_argument("--artifact-dir", default=ARTIFACT_DIR, help="Where to publish the images + metrics version")
+    parser.add_argument("--no-publish", action="store_true", help="Don't publish to the artifact store")
+    parser.add_argument("--as-of", default=None, help="Date used for 'next 60 days' charts (default: today)")
+    parser.add_argument("--dpi", type=int, default=TARGET_DPI)
+    args = parser.parse_args()
+
+    try:
+        result = render(
+            data_dir=args.data_dir,
+            output=args.output,
+            image_dir=None if args.no_images else args.image_dir,
+            metrics_file=args.metrics_file,
+            today=args.as_of,
+            dpi=args.dpi,
+            artifact_dir=None if args.no_publish else args.artifact_dir,
+        )
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+    for category, file_path in result["files"].items():
+        print(f"Latest {category}: {file_path}")
+    print(f"PDF generated successfully: {args.output}")
+    print(" ".join(f"{name}={seconds:.2f}s" for name, seconds in result["timings"].items()))
+    print_size_report(size_report(result["images"], result["pdf_bytes"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+"""
+Record/replay harness for the AppFolio scraper.
+
+Record: run the scraper with APPFOLIO_RECORD_DIR=recordings/<name>. Recorder saves the
+login and 2FA pages, each report page, every downloaded CSV, the SimpleTexting
+messages and the run's step timings (from telemetry) with a manifest.json.
+
+Replay: StandInServer is a local HTTP stand-in for AppFolio and SimpleTexting. It serves
+minimal login / 2FA / report pages with the same element ids and buttons the scraper
+looks for (the recorded pages need AppFolio's own scripts, so they're only kept for
+reference and selector checks), returns the recorded CSVs on export and new 2FA codes
+on the SMS endpoint. Without a recording it serves synthetic_data exports instead.
+Latency and failures are injected deterministically (seeded):
+  latency_s / jitter_s   added to every page and API response
+  export_delay_s         slow exports
+  rate_limit_429         the first N SMS API calls answer 429
+  export_errors          the first N exports answer 500
+  partial_downloads      reports whose CSV is cut off mid-transfer
+
+    python scraper_replay.py check recordings/20250321                 # selectors still on the recorded pages?
+    python scraper_replay.py serve recordings/20250321 --export-delay 5 --partial vacancy
+    python scraper_replay.py bench --runs 3 --rate-limit-429 2          # runs appfolio_data.py against the stand-in
+"""
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, quote
+
+# Element ids / XPaths appfolio_data.py relies on, per recorded page
+SELECTORS = {
+    "login": [r'id="user_email"', r'id="user_password"', r'name="commit"'],
+    "two_factor": [r"verification_code", r'value="Send Verification Code"'],
+    "report": [r">\s*Update\s*<", r"js-actions-dropdown", r"js-export-csv-button"],
+}
+
+DEFAULT_FAULTS = {
+    "latency_s": 0.0,
+    "jitter_s": 0.0,
+    "export_delay_s": 0.0,
+    "rate_limit_429": 0,
+    "export_errors": 0,
+    "partial_downloads": [],
+    "partial_fraction": 0.5,
+    "code_delay_s": 1.0,  # Time between "Send Verification Code" and the SMS showing up
+    "two_factor": True,
+    "seed": 0,
+}
+
+
+class Recorder:
+    """Saves what the scraper sees into a recording directory. With directory=None every method is a no-op."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest = {"created": datetime.now().isoformat(timespec="seconds"),
+                         "pages": {}, "reports": {}, "sms": [], "latency_s": {}}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def page(self, name, html):
+        if self.directory:
+            self._write(f"{name}.html", html)
+            self.manifest["pages"][name] = f"{name}.html"
+
+    def report_csv(self, prefix, path):
+        if self.directory:
+            # Every rent roll downloads as rent_roll-<date>.csv, so keep the report prefix in the name
+            name = f"{prefix}-{os.path.basename(path)}"
+            shutil.copyfile(path, os.path.join(self.directory, name))
+            self.manifest["reports"][prefix] = name
+
+    def sms(self, message):
+        if self.directory and message:
+            self.manifest["sms"].append(message)
+
+    def finish(self, telemetry):
+        """Keep the recorded run's step durations (default replay latencies) and write manifest.json."""
+        if not self.directory:
+            return
+        for step, report, duration, ok in telemetry.steps:
+            self.manifest["latency_s"][f"{report}/{step}" if report else step] = round(duration, 3)
+        self.manifest["run_id"] = telemetry.run_id
+        self._write("manifest.json", json.dumps(self.manifest, indent=4, default=str))
+        print(f"🎙️ Recording saved to {self.directory}")
+
+    def _write(self, name, text):
+        with open(os.path.join(self.directory, name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def load_recording(directory):
+    with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest["directory"] = directory
+    return manifest
+
+
+def check_selectors(recording):
+    """{page: [missing selector patterns]} for recorded pages that no longer have what the scraper clicks."""
+    missing = {}
+    for name, filename in recording["pages"].items():
+        kind = name if name in SELECTORS else "report"
+        with open(os.path.join(recording["directory"], filename), encoding="utf-8") as f:
+            html = f.read()
+        gone = [pattern for pattern in SELECTORS[kind] if not re.search(pattern, html)]
+        if gone:
+            missing[name] = gone
+    return missing
+
+
+def synthetic_recording(units=500, directory=None):
+    """A recording-shaped dict backed by synthetic exports, for replays without a real recording."""
+    from synthetic_data import generate_exports
+    directory = directory or tempfile.mkdtemp(prefix="appfolio_replay_")
+    exports = generate_exports(units, directory)
+    return {"directory": directory, "pages": {}, "sms": [], "latency_s": {},
+            "reports": {prefix: os.path.basename(path) for prefix, path in exports.items()}}
+
+
+def rent_roll_prefix(as_of, today=None):
+    """Which rent roll an as-of date asks for, using the same dates the scraper types in."""
+    today = today or datetime.today()
+    dates = {
+        (today - timedelta(days=90)).strftime("%m/%d/%Y"): "t_rent",
+        today.replace(year=today.year - 1).strftime("%m/%d/%Y"): "same_day",
+        datetime(today.year, 1, 1).strftime("%m/%d/%Y"): "beg_year",
+    }
+    return dates.get(as_of or "", "tenant_data")
+
+
+LOGIN_PAGE = """<html><body><form method="post" action="/login">
+<input id="user_email" name="email"><input id="user_password" name="password" type="password">
+<input type="submit" name="commit" value="Log In"></form></body></html>"""
+
+TWO_FACTOR_PAGE = """<html><body><p>Enter your verification_code</p>
+<form method="post" action="/2fa/send"><input type="submit" value="Send Verification Code"></form>
+<form method="post" action="/2fa/verify"><input id="user_verification_code" name="code">
+<button id="sign_in_button" type="submit">Sign In</button></form></body></html>"""
+
+REPORT_PAGE = """<html><body><h1>{title}</h1>
+<form method="get" action="{path}"><input id="filters_as_of_to" name="as_of" value="{as_of}">
+<button type="submit">Update</button></form>
+<div class="dropdown-div js-actions-dropdown"><button type="button"
+ onclick="document.getElementById('actions').style.display='block'">Actions</button>
+<div id="actions" style="display:none"><button class="js-export-csv-button" type="button"
+ onclick="window.location='/export/{prefix}.csv'">Export CSV</button></div></div></body></html>"""
+
+
+class StandInServer:
+    """Local AppFolio + SimpleTexting stand-in. Use start()/stop() or as a context manager."""
+
+    def __init__(self, recording, faults=None, host="127.0.0.1", port=0):
+        self.recording = recording
+        self.faults = {**DEFAULT_FAULTS, **(faults or {})}
+        self.rng = random.Random(self.faults["seed"])
+        self.lock = threading.Lock()
+        self.sessions = {}  # cookie -> "2fa" | "ok"
+        self.messages = list(recording.get("sms") or [])
+        self.counters = {"sms_calls": 0, "exports": 0, "requests": 0}
+        self.expected_code = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self):
+        """Environment variables that point appfolio_data.py at this stand-in."""
+        return {
+            "APPFOLIO_LOGIN_URL": f"{self.base_url}/login",
+            "WORK_ORDER_URL": f"{self.base_url}/work_orders",
+            "VACANCY_URL": f"{self.base_url}/vacancies",
+            "APPFOLIO_USERNAME": "replay@example.com",
+            "APPFOLIO_PASSWORD": "replay",
+            "SIMPLE_TEXTING_API_URL": f"{self.base_url}/sms",
+            "SIMPLE_TEXTING_API_TOKEN": "replay",
+            "SIMPLE_TEXTING_ACCOUNT_PHONE": "0000000000",
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def delay(self, extra=0.0):
+        with self.lock:
+            jitter = self.rng.uniform(0, self.faults["jitter_s"]) if self.faults["jitter_s"] else 0.0
+        time.sleep(self.faults["latency_s"] + jitter + extra)
+
+    def send_code(self):
+        """Queue a new SMS with a fresh code; it shows up after code_delay_s."""
+        with self.lock:
+            code = f"{self.rng.randrange(10 ** 6):06d}"
+            self.expected_code = code
+        template = self.messages[-1]["text"] if self.messages else "Your AppFolio verification code is 000000"
+        message = {"id": f"replay-{len(self.messages) + 1}", "text": re.sub(r"\b\d{6}\b", code, template)}
+
+        def deliver():
+            with self.lock:
+                self.messages.append(message)
+        threading.Timer(self.faults["code_delay_s"], deliver).start()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):  # Quiet; the scraper's telemetry has the timings
+                pass
+
+            def session(self):
+                match = re.search(r"session=([\w-]+)", self.headers.get("Cookie", ""))
+                return match.group(1) if match else None
+
+            def send_html(self, html, status=200, cookie=None):
+                body = html.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                if cookie:
+                    self.send_header("Set-Cookie", f"session={cookie}; Path=/")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def redirect(self, location, cookie=None):
+                self.send_response(303)
+                self.send_header("Location", location)
+                if cookie:
+                    self.send_header("Set-Cookie", f"session={cookie}; Path=/")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                with server.lock:
+                    server.counters["requests"] += 1
+                    state = server.sessions.get(self.session())
+
+                if url.path == "/sms":
+                    return self.sms()
+                if url.path.startswith("/export/"):
+                    return self.export(url.path[len("/export/"):-len(".csv")], state)
+
+                server.delay()
+                if url.path == "/login":
+                    if state is None:
+                        return self.send_html(LOGIN_PAGE)
+                    if state == "2fa":
+                        return self.send_html(TWO_FACTOR_PAGE)
+                    prefix = rent_roll_prefix(query.get("as_of"))
+                    return self.report_page("Rent Roll", url.path, prefix, query.get("as_of", ""))
+                if url.path in ("/work_orders", "/vacancies") and state == "ok":
+                    prefix = "work_order" if url.path == "/work_orders" else "vacancy"
+                    return self.report_page(prefix.replace("_", " ").title(), url.path, prefix, query.get("as_of", ""))
+                if url.path.startswith("/recorded/"):
+                    name = os.path.basename(url.path)
+                    path = os.path.join(server.recording["directory"], name)
+                    if name in server.recording["pages"].values() and os.path.exists(path):
+                        with open(path, encoding="utf-8") as f:
+                            return self.send_html(f.read())
+                self.send_html("<html><body>Not found</body></html>", status=404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+                server.delay()
+                if self.path == "/login":
+                    cookie = f"s{server.rng.randrange(10 ** 9)}"
+                    with server.lock:
+                        server.sessions[cookie] = "2fa" if server.faults["two_factor"] else "ok"
+                    return self.redirect("/login", cookie=cookie)
+                if self.path == "/2fa/send":
+                    server.send_code()
+                    return self.redirect("/login")
+                if self.path == "/2fa/verify":
+                    with server.lock:
+                        if form.get("code") == server.expected_code:
+                            server.sessions[self.session()] = "ok"
+                    return self.redirect("/login")
+                self.send_html("<html><body>Not found</body></html>", status=404)
+
+            def report_page(self, title, path, prefix, as_of):
+                self.send_html(REPORT_PAGE.format(title=title, path=path, prefix=prefix, as_of=as_of))
+
+            def sms(self):
+                with server.lock:
+                    server.counters["sms_calls"] += 1
+                    limited = server.counters["sms_calls"] <= server.faults["rate_limit_429"]
+                    latest = server.messages[-1:]
+                server.delay()
+                body = json.dumps({"content": latest} if not limited else {"error": "Too many requests"}).encode()
+                self.send_response(429 if limited else 200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def export(self, prefix, state):
+                with server.lock:
+                    server.counters["exports"] += 1
+                    failing = server.counters["exports"] <= server.faults["export_errors"]
+                server.delay(server.faults["export_delay_s"])
+                filename = server.recording["reports"].get(prefix)
+                if state != "ok" or filename is None:
+                    return self.send_html("<html><body>Not found</body></html>", status=404)
+                if failing:
+                    return self.send_html("<html><body>Export failed</body></html>", status=500)
+
+                with open(os.path.join(server.recording["directory"], filename), "rb") as f:
+                    body = f.read()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/csv")
+                self.send_header("Content-Disposition", f"attachment; filename=\"{quote(filename)}\"")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if prefix in server.faults["partial_downloads"]:
+                    # Promise the whole file, send part of it and hang up
+                    self.wfile.write(body[: int(len(body) * server.faults["partial_fraction"])])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+
+        return Handler
+
+
+def run_scraper(server, work_dir, timeout=600):
+    """
+    Run appfolio_data.py once against the stand-in in a subprocess (so its module-level
+    settings pick up the stand-in URLs) and return that run's telemetry summary.
+    """
+    from telemetry import TELEMETRY_FILE, load_events
+
+    download_dir = os.path.join(work_dir, "data")
+    os.makedirs(download_dir, exist_ok=True)
+    env = {**os.environ, **server.env(), "APPFOLIO_DOWNLOAD_FOLDER": download_dir, "APPFOLIO_HEADLESS": "1",
+           "PYTHONPATH": os.pathsep.join([os.path.dirname(os.path.abspath(__file__)), os.environ.get("PYTHONPATH", "")])}
+    before = len(load_events(os.path.join(work_dir, TELEMETRY_FILE)))
+    subprocess.run([sys.executable, "-c", "import appfolio_data; appfolio_data.get_data_from_appfolio(clean=False)"],
+                   cwd=work_dir, env=env, timeout=timeout)
+    events = load_events(os.path.join(work_dir, TELEMETRY_FILE)).iloc[before:]
+    summaries = events[events["event"] == "run_summary"] if len(events) else events
+    return summaries.iloc[-1].dropna().to_dict() if len(summaries) else {"success": False, "error": "no telemetry"}
+
+
+def bench(recording, faults, runs=3, output=None):
+    """Replay the scraper `runs` times against one stand-in configuration and save the summaries."""
+    work_dir = tempfile.mkdtemp(prefix="appfolio_bench_")
+    results = {"faults": {**DEFAULT_FAULTS, **faults}, "recording": recording["directory"], "runs": []}
+    with StandInServer(recording, faults) as server:
+        for run in range(runs):
+            summary = run_scraper(server, work_dir)
+            results["runs"].append(summary)
+            print(f"Run {run + 1}: {'ok' if summary.get('success') else 'FAILED'}"
+                  + (f" in {summary['total_s']:.1f}s" if "total_s" in summary else f" ({summary.get('error')})"))
+        results["server"] = dict(server.counters)
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = output or os.path.join("benchmarks", f"scraper-replay-{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=4, default=str)
+    print(f"✅ Results saved to {output}")
+    return results
+
+
+def _faults_from_args(args):
+    faults = {}
+    if args.faults:
+        with open(args.faults, encoding="utf-8") as f:
+            faults = json.load(f)
+    for key, value in [("latency_s", args.latency), ("jitter_s", args.jitter), ("export_delay_s", args.export_delay),
+                       ("rate_limit_429", args.rate_limit_429), ("export_errors", args.export_errors),
+                       ("code_delay_s", args.code_delay), ("seed", args.seed)]:
+        if value is not None:
+            faults[key] = value
+    if args.partial:
+        faults["partial_downloads"] = args.partial
+    if args.no_2fa:
+        faults["two_factor"] = False
+    return faults
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay the AppFolio scraper against a local stand-in")
+    parser.add_argument("command", choices=["serve", "bench", "check"])
+    parser.add_argument("recording", nargs="?", default=None, help="Recording directory (default: synthetic exports)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--units", type=int, default=500, help="Units in the synthetic exports when there's no recording")
+    parser.add_argument("--faults", default=None, help="JSON file with fault settings")
+    parser.add_argument("--latency", type=float, default=None)
+    parser.add_argument("--jitter", type=float, default=None)
+    parser.add_argument("--export-delay", type=float, default=None)
+    parser.add_argument("--rate-limit-429", type=int, default=None)
+    parser.add_argument("--export-errors", type=int, default=None)
+    parser.add_argument("--partial", nargs="*", default=[], help="Reports whose download gets cut off")
+    parser.add_argument("--code-delay", type=float, default=None)
+    parser.add_argument("--no-2fa", action="store_true")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    if args.command == "check":
+        missing = check_selectors(load_recording(args.recording))
+        print(json.dumps(missing, indent=4) if missing else "✅ Every selector the scraper uses is on the recorded pages.")
+        sys.exit(1 if missing else 0)
+
+    recording = load_recording(args.recording) if args.recording else synthetic_recording(args.units)
+    faults = _faults_from_args(args)
+    if args.command == "bench":
+        bench(recording, faults, args.runs, args.output)
+    else:
+        server = StandInServer(recording, faults, port=args.port)
+        for key, value in server.env().items():
+            print(f"{key}={value}")
+        print(f"🎭 Stand-in running on {server.base_url} (Ctrl+C to stop)")
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            server.stop()
@@ -0,0 +1,162 @@
+"""
+Full-text search over tenants, units, tags, work order issues and descriptions.
+
+An inverted index (term -> sorted array of document numbers) is built once per
+snapshot at ingest and cached in cache/search_index/. A query then never touches
+the DataFrames:
+  exact   term lookup in a dict
+  prefix  bisect on the sorted vocabulary ("mai" -> maintenance, mail, ...)
+  fuzzy   bounded Levenshtein against terms of similar length, only when a word
+          has no exact or prefix match ("plumbng" -> plumbing)
+Words are ANDed; documents are ranked by how well each word matched.
+"""
+import pandas as pd
+import numpy as np
+import os
+import re
+from bisect import bisect_left
+
+from dashboard_data import CACHE_DIR, snapshot_id
+
+SEARCH_INDEX_DIR = os.path.join(CACHE_DIR, "search_index")
+
+# Searchable fields per report, and the column shown as the result title
+SEARCH_FIELDS = {
+    "Tenant Data": ["Tenant", "Unit", "Tags"],
+    "Vacancies": ["Unit", "Tags", "Description"],
+    "Work Orders": ["Work Order Number", "Unit", "Primary Resident", "Work Order Issue", "Job Description"],
+}
+TITLE_FIELDS = {"Tenant Data": "Tenant", "Vacancies": "Unit Status", "Work Orders": "Work Order Issue"}
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Scores per kind of match; a document's score is the sum over the query words
+EXACT_SCORE, PREFIX_SCORE, FUZZY_SCORE = 3, 2, 1
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def build_search_index(dfs):
+    """
+    Returns {"docs": DataFrame (Report, Unit, Title, Text) with one row per document,
+             "terms": sorted list of terms, "postings": {term: int32 array of doc numbers}}.
+    """
+    docs, texts = [], []
+    for report, fields in SEARCH_FIELDS.items():
+        if report not in dfs:
+            continue
+        df = dfs[report]
+        fields = [f for f in fields if f in df.columns]
+        columns = [df[f].fillna("").astype(str) for f in fields]
+        text = columns[0].str.cat(columns[1:], sep=" ").str.strip()
+        title_field = TITLE_FIELDS[report] if TITLE_FIELDS[report] in df.columns else fields[0]
+        title = df[title_field].fillna("").astype(str)
+        title = title.where(title != "", text.str.slice(0, 80))  # e.g. work orders without an issue
+        docs.append(pd.DataFrame({
+            "Report": report,
+            "Unit": df["Unit"].fillna("").astype(str).to_numpy() if "Unit" in df.columns else "",
+            "Title": title.to_numpy(),
+            "Text": text.to_numpy(),
+        }))
+        texts.append(text)
+    docs = pd.concat(docs, ignore_index=True)
+
+    # (term, doc) pairs for every document at once, sorted by term then doc and cut into posting lists
+    tokens = pd.concat(texts, ignore_index=True).str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+    codes, vocabulary = pd.factorize(tokens.to_numpy())
+    doc_ids = tokens.index.to_numpy(dtype="int32")
+    order = np.lexsort((doc_ids, codes))
+    codes, doc_ids = codes[order], doc_ids[order]
+    first = np.ones(len(codes), dtype=bool)
+    first[1:] = (codes[1:] != codes[:-1]) | (doc_ids[1:] != doc_ids[:-1])  # Drop repeated words within a doc
+    codes, doc_ids = codes[first], doc_ids[first]
+
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    postings = dict(zip(vocabulary[codes[starts]], np.split(doc_ids, starts[1:])))
+    return {"docs": docs, "terms": sorted(postings), "postings": postings}
+
+
+def search_index_path(files, index_dir=SEARCH_INDEX_DIR):
+    return os.path.join(index_dir, f"{snapshot_id({name: files.get(name) for name in SEARCH_FIELDS})}.pkl")
+
+
+def load_or_build_search_index(dfs, files, index_dir=SEARCH_INDEX_DIR):
+    """Search index for this snapshot, built once and then read from cache/search_index/<snapshot id>.pkl."""
+    path = search_index_path(files, index_dir)
+    if os.path.exists(path):
+        return pd.read_pickle(path)
+
+    index = build_search_index(dfs)
+    os.makedirs(index_dir, exist_ok=True)
+    pd.to_pickle(index, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return index
+
+
+def bounded_levenshtein(a, b, max_distance):
+    """Edit distance between a and b, or max_distance + 1 as soon as it's clear it will be larger."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def prefix_terms(terms, prefix):
+    """Terms starting with prefix, from the sorted vocabulary."""
+    start = bisect_left(terms, prefix)
+    end = bisect_left(terms, prefix + "￿")
+    return terms[start:end]
+
+
+def fuzzy_terms(terms, word, max_distance=None):
+    """Terms within a small edit distance of word (1 for short words, 2 otherwise) sharing its first letter."""
+    max_distance = max_distance if max_distance is not None else (1 if len(word) <= 4 else 2)
+    candidates = prefix_terms(terms, word[0])
+    return [term for term in candidates if bounded_levenshtein(word, term, max_distance) <= max_distance]
+
+
+def _word_scores(index, word):
+    """(sorted doc numbers, best score per doc) for one query word (exact > prefix > fuzzy)."""
+    postings, terms = index["postings"], index["terms"]
+    matches = [(postings[word], EXACT_SCORE)] if word in postings else []
+    matches += [(postings[term], PREFIX_SCORE) for term in prefix_terms(terms, word) if term != word]
+    if not matches:
+        matches = [(postings[term], FUZZY_SCORE) for term in fuzzy_terms(terms, word)]
+    if not matches:
+        return np.empty(0, dtype="int32"), np.empty(0, dtype="int8")
+
+    docs = np.concatenate([doc_ids for doc_ids, _ in matches])
+    scores = np.concatenate([np.full(len(doc_ids), score, dtype="int8") for doc_ids, score in matches])
+    order = np.lexsort((-scores, docs))  # By doc, best score first
+    docs, first = np.unique(docs[order], return_index=True)
+    return docs, scores[order][first]
+
+
+def search(index, query, limit=50, report=None):
+    """Documents matching every word of query, best matches first."""
+    words = tokenize(query)
+    if not words:
+        return index["docs"].iloc[:0]
+
+    docs, total = _word_scores(index, words[0])
+    for word in words[1:]:
+        word_docs, word_scores = _word_scores(index, word)
+        # AND: keep docs matching every word (both arrays are sorted and unique)
+        docs, keep, keep_word = np.intersect1d(docs, word_docs, assume_unique=True, return_indices=True)
+        total = total[keep] + word_scores[keep_word]
+    if len(docs) == 0:
+        return index["docs"].iloc[:0]
+
+    results = index["docs"].iloc[docs].assign(Score=total)
+    if report is not None:
+        results = results[results["Report"] == report]
+    return results.sort_values("Score", ascending=False, kind="stable").head(limit)
@@ -0,0 +1,97 @@
+"""
+Process-wide, read-only data shared by every dashboard session.
+
+Streamlit runs streamlit.py separately for each browser session, so five viewers
+meant five parses of the same CSVs, five copies of every DataFrame and five sets of
+Kaleido renders all writing to plotly_images/*.png. Instead, everything that only
+depends on the export snapshot is built once per server process and reused:
+
+    shared = shared_snapshot(latest_files)
+    dfs = shared.session_dfs()                              # this session's copy-on-write views
+    loss = shared.get("loss_to_lease", load_or_build_loss_to_lease, shared.dfs, latest_files)
+
+get() builds a value the first time it is asked for in a snapshot; sessions asking
+while it is being built wait for that build instead of starting their own. Shared
+values are read-only. Sessions work on session_dfs(): with pandas Copy-on-Write on
+(streamlit.py turns it on, this module leaves the option alone) those are shallow
+copies, and a session that adds or changes a column copies just that column and
+never writes into the shared frames; without it they are deep copies. The last KEEP_SNAPSHOTS snapshots
+are kept, so sessions still rerunning on the previous export can finish after a new
+one arrives.
+"""
+import threading
+from collections import Counter, OrderedDict
+
+import pandas as pd
+
+from dashboard_data import load_data, prepare_data, snapshot_id
+
+KEEP_SNAPSHOTS = 2
+
+_lock = threading.Lock()
+_snapshots = OrderedDict()  # snapshot id -> SharedSnapshot, oldest first
+
+
+class SharedSnapshot:
+    def __init__(self, files):
+        self.files = dict(files)
+        self.snapshot_id = snapshot_id(files)
+        self.stats = Counter()  # "builds" / "hits"
+        self._values = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, build, *args, **kwargs):
+        """build(*args, **kwargs) the first time key is asked for in this snapshot, the shared value after that."""
+        if key in self._values:
+            self.stats["hits"] += 1
+            return self._values[key]
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:  # One build per key, concurrent sessions wait for it
+            if key not in self._values:
+                self._values[key] = build(*args, **kwargs)
+                self.stats["builds"] += 1
+                return self._values[key]
+        self.stats["hits"] += 1
+        return self._values[key]
+
+    @property
+    def dfs(self):
+        """Prepared DataFrames for this snapshot, loaded once. Read-only; sessions use session_dfs()."""
+        return self.get("dfs", lambda: prepare_data(load_data(self.files)))
+
+    def session_dfs(self):
+        """
+        Per-session copies of the shared frames. Under Copy-on-Write these are views and
+        nothing is copied until a session changes one; otherwise they are full copies.
+        """
+        deep = not pd.get_option("mode.copy_on_write")
+        return {name: df.copy(deep=deep) for name, df in self.dfs.items()}
+
+    def keys(self):
+        return list(self._values)
+
+
+def shared_snapshot(files):
+    """The SharedSnapshot for these files, created on first use and kept for the life of the process."""
+    key = snapshot_id(files)
+    with _lock:
+        if key not in _snapshots:
+            _snapshots[key] = SharedSnapshot(files)
+            while len(_snapshots) > KEEP_SNAPSHOTS:
+                old_key, _ = _snapshots.popitem(last=False)
+                print(f"🧹 Dropped shared snapshot {old_key}")
+        _snapshots.move_to_end(key)
+        return _snapshots[key]
+
+
+def shared_stats():
+    """{snapshot id: {"values": n, "builds": n, "hits": n}} for every snapshot held in this process."""
+    with _lock:
+        return {key: {"values": len(s.keys()), **s.stats} for key, s in _snapshots.items()}
+
+
+def clear():
+    with _lock:
+        _snapshots.clear()
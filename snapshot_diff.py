@@ -0,0 +1,142 @@
+import pandas as pd
+import numpy as np
+import os
+
+from dashboard_data import BASE_DIR, CACHE_DIR, OCCUPIED_STATUSES, file_prefixes, extract_timestamp_from_filename, to_number
+
+DIFF_DIR = os.path.join(CACHE_DIR, "diffs")
+
+# Columns compared between two Tenant Data snapshots
+DIFF_COLUMNS = ["Tenant", "Status", "BD/BA", "Rent", "Past Due"]
+
+# Highest number of rows one unit can have in a single export
+MAX_DUPLICATES = 1024
+
+# Order the change types are listed in
+CHANGE_TYPES = ["Move-in", "Move-out", "Status change", "Rent change", "Past due change", "Unit added", "Unit removed"]
+
+
+def list_snapshots(base_dir=BASE_DIR, category="Tenant Data"):
+    """All cleaned CSVs for a category, oldest first."""
+    prefix = file_prefixes[category]
+    files = [f for f in os.listdir(base_dir) if f.startswith(prefix) and f.endswith(".csv")]
+    return [os.path.join(base_dir, f) for f in sorted(files, key=extract_timestamp_from_filename)]
+
+
+def _prepare(df, unit_codes):
+    """
+    Keep the compared columns, parse the amounts and index by an integer unit key.
+    Units that appear more than once (e.g. two leases on one unit) are told apart
+    by their order in the export.
+    """
+    df = df.reindex(columns=DIFF_COLUMNS)
+    df = df.assign(Rent=to_number(df["Rent"]), **{"Past Due": to_number(df["Past Due"]).fillna(0)})
+    occurrence = pd.Series(unit_codes).groupby(unit_codes).cumcount().to_numpy()
+    df.index = pd.Index(unit_codes.astype("int64") * MAX_DUPLICATES + occurrence, name="key")
+    return df
+
+
+def diff_snapshots(old_df, new_df):
+    """
+    Per-unit changes between two Tenant Data snapshots.
+
+    Returns one row per change: Unit, Change, Old, New, Delta (numeric changes only).
+    Both snapshots share one unit -> integer code table, so the join is a hash join
+    on int64 keys rather than a comparison of unit names.
+    """
+    units = pd.concat([old_df["Unit"], new_df["Unit"]], ignore_index=True).astype(str).str.strip()
+    codes, unit_names = pd.factorize(units)
+    old = _prepare(old_df, codes[:len(old_df)])
+    new = _prepare(new_df, codes[len(old_df):])
+    joined = old.join(new, how="outer", lsuffix=" old", rsuffix=" new")
+
+    in_old = joined.index.isin(old.index)
+    in_new = joined.index.isin(new.index)
+    both = in_old & in_new
+
+    occupied_old = joined["Status old"].isin(OCCUPIED_STATUSES).to_numpy()
+    occupied_new = joined["Status new"].isin(OCCUPIED_STATUSES).to_numpy()
+    tenant_old = joined["Tenant old"].fillna("").astype(str).str.strip()
+    tenant_new = joined["Tenant new"].fillna("").astype(str).str.strip()
+    tenant_changed = (tenant_old != tenant_new).to_numpy() & (tenant_old != "").to_numpy() & (tenant_new != "").to_numpy()
+
+    rent_old, rent_new = joined["Rent old"], joined["Rent new"]
+    due_old, due_new = joined["Past Due old"], joined["Past Due new"]
+
+    masks = {
+        # A new tenant in a unit counts as a move-out of the old one plus a move-in
+        "Move-in": both & ((~occupied_old & occupied_new) | (occupied_new & tenant_changed)),
+        "Move-out": both & ((occupied_old & ~occupied_new) | (occupied_old & tenant_changed)),
+        "Status change": both & (joined["Status old"].fillna("") != joined["Status new"].fillna("")).to_numpy(),
+        "Rent change": both & ~np.isclose(rent_old.fillna(0), rent_new.fillna(0)),
+        "Past due change": both & ~np.isclose(due_old.fillna(0), due_new.fillna(0)),
+        "Unit added": ~in_old & in_new,
+        "Unit removed": in_old & ~in_new,
+    }
+    values = {
+        "Move-in": (tenant_old.where(occupied_old, ""), tenant_new),
+        "Move-out": (tenant_old, tenant_new.where(occupied_new, "")),
+        "Status change": (joined["Status old"], joined["Status new"]),
+        "Rent change": (rent_old, rent_new),
+        "Past due change": (due_old, due_new),
+        "Unit added": (joined["Status old"], joined["Status new"]),
+        "Unit removed": (joined["Status old"], joined["Status new"]),
+    }
+
+    frames = []
+    for change in CHANGE_TYPES:
+        mask = masks[change]
+        if not mask.any():
+            continue
+        old_values, new_values = values[change]
+        frame = pd.DataFrame({
+            "Unit": unit_names[joined.index.to_numpy()[mask] // MAX_DUPLICATES],
+            "Change": change,
+            "Old": old_values[mask].to_numpy(),
+            "New": new_values[mask].to_numpy(),
+        })
+        if change in ("Rent change", "Past due change"):
+            frame["Delta"] = (new_values[mask] - old_values[mask]).round(2).to_numpy()
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=["Unit", "Change", "Old", "New", "Delta"])
+    return pd.concat(frames, ignore_index=True).reindex(columns=["Unit", "Change", "Old", "New", "Delta"])
+
+
+def diff_path(old_path, new_path, diff_dir=DIFF_DIR):
+    old_name = os.path.splitext(os.path.basename(old_path))[0]
+    new_name = os.path.splitext(os.path.basename(new_path))[0]
+    return os.path.join(diff_dir, f"{old_name}__{new_name}.csv")
+
+
+def load_or_compute_diff(old_path, new_path, diff_dir=DIFF_DIR):
+    """Diff two snapshot files, computing it once per pair and reusing the stored CSV after that."""
+    path = diff_path(old_path, new_path, diff_dir)
+    if os.path.exists(path):
+        return pd.read_csv(path)
+
+    diff = diff_snapshots(pd.read_csv(old_path), pd.read_csv(new_path))
+    os.makedirs(diff_dir, exist_ok=True)
+    tmp_path = path + ".tmp"
+    diff.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)  # Readers never see a half-written diff
+    return diff
+
+
+def latest_diff(base_dir=BASE_DIR, diff_dir=DIFF_DIR):
+    """
+    Changes between the two most recent Tenant Data snapshots.
+    Returns (diff, old_path, new_path), or (None, None, None) with fewer than two snapshots.
+    """
+    snapshots = list_snapshots(base_dir)
+    if len(snapshots) < 2:
+        return None, None, None
+    old_path, new_path = snapshots[-2], snapshots[-1]
+    return load_or_compute_diff(old_path, new_path, diff_dir), old_path, new_path
+
+
+def summarize_diff(diff):
+    """Count of changes per change type, in CHANGE_TYPES order."""
+    counts = diff["Change"].value_counts()
+    return {change: int(counts.get(change, 0)) for change in CHANGE_TYPES}
@@ -1,13 +1,27 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.io as pio
-import plotly.graph_objects as go
-import json
 import os
-from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
+from datetime import date
+import pandas as pd
+from pdf_report import build_report, render_images
+from dashboard_data import BASE_DIR, file_prefixes, extract_timestamp_from_filename, find_latest_files, combined_summary, compute_metrics
+import dashboard_charts
+from profiling import Profiler, show_profile_panel
+from snapshot_diff import latest_diff, summarize_diff
+from timeseries import update_timeseries, load_timeseries
+from forecast import load_or_build_events, forecast_occupancy
+from rent_simulator import simulate_rent_roll
+from loss_to_lease import load_or_build_loss_to_lease, top_units
+from unit_index import load_or_build_unit_index, unit_table, work_orders_by_occupancy, blocked_vacancies
+from search_index import load_or_build_search_index, search
+from histograms import load_or_build_histograms
+from work_order_stream import update_work_order_state, counts_table
+from work_order_sla import load_or_build_sla_index, aging_table, sla_summary
+from shared_store import shared_snapshot
+from artifact_store import publish
+
+# Sessions share one set of DataFrames (shared_store): with Copy-on-Write, anything a session
+# derives from them (copies, slices, new columns) copies on write instead of writing into them
+pd.set_option("mode.copy_on_write", True)
 
 # Set page layout
 st.set_page_config(page_title="Appfolio Dashboards", layout="wide")
@@ -18,887 +32,316 @@ except ImportError:
     st.warning("Installing required package: kaleido")
     os.system("pip install kaleido")
 
-BASE_DIR = os.path.join(os.getcwd(), "data")  # Use relative path
-IMG_DIR = "plotly_pdf_images"
 st.title("📊 Appfolio Dashboards")
-# Define file prefixes
-file_prefixes = {
-    "Tenant Data": "tenant_data_cleaned",
-    "Work Orders": "work_order_cleaned",
-    "Vacancies": "vacancy_cleaned",
-    "T_rent": "t_rent_cleaned",
-    "Beg Year": "beg_year_cleaned",
-    "Sameday": "same_day_cleaned",
-}
-
-# Initialize a dictionary to store the latest file for each category
-latest_files = {}
-
-# List all files in the BASE_DIR
-files_in_directory = os.listdir(BASE_DIR)
-
-# Function to extract date from the filename
-def extract_timestamp_from_filename(filename):
-    """
-    Extracts datetime object from filenames like 'tenant_data_cleaned_20250321_115751.csv'
-    """
-    try:
-        # Extract the last two underscore-separated parts before .csv
-        parts = filename.rsplit("_", 2)  # ['tenant_data_cleaned', '20250321', '115751.csv']
-        if len(parts) < 3:
-            raise ValueError("Invalid filename format")
-        
-        date_str, time_str = parts[-2], parts[-1].split(".")[0]  # Get YYYYMMDD and HHMMSS
-
-        # Convert to datetime object
-        return datetime.strptime(f"{date_str}_{time_str}", "%Y%m%d_%H%M%S")
-    except ValueError as e:
-        print(f"Error parsing date from {filename}: {e}")
-        return datetime.min  # Return a minimal datetime to avoid crashing
-
-# Iterate through each category and find the latest file
-for category, prefix in file_prefixes.items():
-    # Filter files based on the prefix
-    relevant_files = [f for f in files_in_directory if f.startswith(prefix) and f.endswith(".csv")]
-    
-    if relevant_files:
-        # Sort the files by timestamp extracted from their filenames in descending order (latest first)
-        latest_file = max(relevant_files, key=extract_timestamp_from_filename)
-        latest_files[category] = os.path.join(BASE_DIR, latest_file)
+
+# 🔹 Opt-in profiling: section, BD/BA, figure and image timings in a sidebar panel + cache/profile_log.jsonl
+profiler = Profiler(enabled=st.sidebar.checkbox("🩺 Profile reruns", value=os.getenv("APPFOLIO_PROFILE", "0") == "1"))
+charts = profiler.wrap_module(dashboard_charts, "figure", "_figure")
+
+# 🔹 1. Find the latest file for each category
+latest_files = find_latest_files(BASE_DIR)
 
 # Print the latest files for each category
 for category, file_path in latest_files.items():
     print(f"Latest {category}: {file_path}")
 
-# Store latest files in a dictionary
-FILES = {
-    "Tenant Data": latest_files.get("Tenant Data"),
-    "Work Orders": latest_files.get("Work Orders"),
-    "Vacancies": latest_files.get("Vacancies"),
-    "T_rent": latest_files.get("T_rent"),
-    "Beg Year": latest_files.get("Beg Year"),
-    "Sameday": latest_files.get("Sameday")
-}
-# 🔹 2. Load DataFrames
-dfs = {}
-for name, path in FILES.items():
-    if os.path.exists(path):  # Check if file exists
-        dfs[name] = pd.read_csv(path)
+# 🔹 2. Load DataFrames once per snapshot for the whole server (numeric columns are cleaned once in prepare_data).
+# Every session shares them read-only through shared_store and works on its own copy-on-write views.
+shared = shared_snapshot(latest_files)
+with profiler.section("load", "CSV load & prepare_data"):
+    dfs = shared.session_dfs()
+for category in file_prefixes:
+    if category not in dfs:
+        st.warning(f"⚠️ File not found for: {category}")
+
+# 🔍 Search tenants, units and work orders (inverted index cached per snapshot)
+query = st.text_input("🔍 Search tenants, units, tags and work orders", placeholder="e.g. rice, T104, leak, plumbng")
+if query and dfs:
+    results = search(shared.get("search_index", load_or_build_search_index, shared.dfs, latest_files), query)
+    if results.empty:
+        st.info(f"No matches for '{query}'.")
     else:
-        st.warning(f"⚠️ File not found: {path}")
-# Create folder for images
-IMG_DIR = "plotly_images"
-os.makedirs(IMG_DIR, exist_ok=True)
+        st.dataframe(results.drop(columns="Score"), use_container_width=True, hide_index=True)
+
+# 🔹 Generate Plotly Charts and render them as images (published to artifacts/ as one set, see artifact_store.py)
+report_figures = {}  # Figures kept in memory for the PDF report
+report_images = {}  # Rendered images, published together with the metrics at the end of the run
+
+# Set APPFOLIO_WRITE_IMAGES=0 to skip rendering and publishing the chart images
+WRITE_IMAGES = os.getenv("APPFOLIO_WRITE_IMAGES", "1") != "0"
+
+def shared_figure(key, build, *args):
+    """Charts that only depend on the snapshot are built once per process and shared by every session."""
+    return shared.get(("figure", key), build, *args)
+
+def save_chart(fig, name):
+    """Keep the figure for the in-memory PDF and optionally render it for artifacts/."""
+    report_figures[name] = fig
+    if WRITE_IMAGES:
+        # Sized for the figure's slot in the PDF and encoded as PNG or JPEG. Rendered once per shared
+        # figure, not once per session (a rebuilt figure, e.g. move-in-out the next day, gets a new render)
+        with profiler.section("render_image", name):
+            report_images.update(shared.get(("image", name, id(fig)), render_images, {name: fig}))
+
+# Same metric cards as the headless render / PDF
+with profiler.section("aggregate", "compute_metrics"):
+    metrics_data_fixed = shared.get("metrics", compute_metrics, shared.dfs)
+metric_values = {m["label"]: m["value"] for group in metrics_data_fixed.values() for m in group}
+profiler.lap("Load, search & metric cards")
 
-# 🔹 Generate and Save Plotly Charts as Images
-image_paths = []
 # 🔹 3. Display DataFrames in Tabs
 if dfs:
     tab1, tab2, tab3 = st.tabs(["🏠 Tenant Data", "🔧 Work Orders", "🏢 Vacancies"])
 
 with tab1:
     col1, col2, col3, col4 = st.columns(4)
-    
-    # Filter rows where Status == 'Current' and count them
-    current = dfs["Tenant Data"][dfs["Tenant Data"]["Status"] == "Current"].shape[0]
-    unrented = dfs["Tenant Data"][dfs["Tenant Data"]["Status"] == "Notice-Unrented"].shape[0]
-    current_units = current+unrented
-    vacant_units = dfs["Tenant Data"][dfs["Tenant Data"]["Status"] == "Vacant-Rented"].shape[0]
-    # Count total rows (all units)
-    all_units = dfs["Tenant Data"].shape[0]
-
-    # Calculate occupancy percentage
-    occupied = (current_units / all_units) * 100
-    
-    dfs["Tenant Data"]["Rent"] = dfs["Tenant Data"]["Rent"].replace("[\$,]", "", regex=True)  # Remove $ and ,
-    dfs["Tenant Data"]["Rent"] = pd.to_numeric(dfs["Tenant Data"]["Rent"], errors="coerce")  # Convert to number
-    dfs["Tenant Data"]["Market Rent"] = dfs["Tenant Data"]["Market Rent"].replace("[\$,]", "", regex=True)  # Remove $ and ,
-    dfs["Tenant Data"]["Market Rent"] = pd.to_numeric(dfs["Tenant Data"]["Market Rent"], errors="coerce")  # Convert to number
-
-    # Calculate total rent
-    total_rent = dfs["Tenant Data"]["Rent"].sum()
-    market_total_rent = dfs["Tenant Data"]["Market Rent"].sum()
-    total_move_out = dfs["Tenant Data"]["Move-out"].notnull().sum()
 
     # Display the metric card
-    col1.metric(label="🏠Total Unit", value=f"{all_units}")
-    col2.metric(label="📊 Occupancy Rate", value=f"{occupied:.2f}%")
-    col3.metric(label="💵 Total Rent ", value=f"${(total_rent):,.0f}")
-    col4.metric(label="🚪Total Move-outs (Next 60 days)", value=f"{total_move_out}")
+    col1.metric(label="🏠Total Unit", value=metric_values["Total Unit"])
+    col2.metric(label="📊 Occupancy Rate", value=metric_values["Occupancy Rate"])
+    col3.metric(label="💵 Total Rent ", value=metric_values["Total Rent"])
+    col4.metric(label="🚪Total Move-outs (Next 60 days)", value=metric_values["Total Move-outs (Next 60 days)"])
+
+    # 🔹 What changed between the last two Tenant Data exports (cached per pair in cache/diffs)
+    with st.expander("🔄 What changed since last run", expanded=True):
+        diff, old_path, new_path = shared.get("diff", latest_diff, BASE_DIR)
+        if diff is None:
+            st.info("Only one Tenant Data export so far, changes show up after the next download.")
+        else:
+            st.caption(f"{os.path.basename(old_path)} → {os.path.basename(new_path)}")
+            counts = summarize_diff(diff)
+            for col, (change, count) in zip(st.columns(len(counts)), counts.items()):
+                col.metric(label=change, value=count)
+            # Old/New mix names, statuses and amounts, so show them as text
+            st.dataframe(diff.astype({"Old": str, "New": str}).replace("nan", ""), use_container_width=True, hide_index=True)
+    profiler.lap("What changed")
 
-    col5 = st.columns(1)[0] 
-    
+    col5 = st.columns(1)[0]
 
     with col5:
+        summary_df = shared.get("combined_summary", combined_summary, shared.dfs, profiler)
 
-        tenant_df = dfs["Tenant Data"]  # Ensure the correct dataset key
-        tenant_df["Rent"] = pd.to_numeric(tenant_df["Rent"], errors="coerce")
-        total_units = tenant_df.groupby("BD/BA").size()
-        occupied_units = tenant_df[tenant_df["Status"].isin(["Current", "Notice-Unrented", "Notice-Rented"])].groupby("BD/BA").size()
-        bd_ba_summary = pd.DataFrame({
-            "Total_Rent": tenant_df.groupby("BD/BA")["Rent"].sum(),
-            "Total_Units": total_units,
-            "Occupied_Units": occupied_units
-        }).fillna(0)  # Fill NaN for BD/BA groups without occupied units
-
-        bd_ba_summary["Occupancy_Rate"] = (bd_ba_summary["Occupied_Units"] / bd_ba_summary["Total_Units"]) * 100
-        bd_ba_summary["Occupancy_Rate"] = bd_ba_summary["Occupancy_Rate"].round(2).astype(str) + "%"
-
-
-        total_rent = bd_ba_summary["Total_Rent"].sum()
-        total_units_all = bd_ba_summary["Total_Units"].sum()
-        occupied_units_all = bd_ba_summary["Occupied_Units"].sum()
-
-        overall_occupancy_rate = (occupied_units_all / total_units_all) * 100 if total_units_all > 0 else 0
-        overall_occupancy_rate = f"{round(overall_occupancy_rate, 2)}%"
-        bd_ba_summary["Total_Rent"] = bd_ba_summary["Total_Rent"].apply(lambda x: f"${x:,.2f}")
-
-        # 🔹 **Append "Total" Row**
-        total_row = pd.DataFrame([{
-            "BD/BA": "Total",
-            "Total_Rent": f"${total_rent:,.2f}",
-            "Occupancy_Rate": overall_occupancy_rate
-        }])
-
-        bd_ba_summary = bd_ba_summary.drop(columns=["Total_Units", "Occupied_Units"])
-        bd_ba_summary = bd_ba_summary.reset_index()
-        bd_ba_summary = pd.concat([bd_ba_summary, total_row], ignore_index=True)
-
-        three_month_df = dfs["T_rent"]  # Ensure the correct dataset key
-
-        # 1. Clean the Rent column (remove $ and ,)
-        three_month_df["Rent"] = (
-            three_month_df["Rent"]
-            .astype(str)
-            .str.replace(r"[$,]", "", regex=True)
-            .str.strip()
-        )
-
-        # 2. Then convert to numeric
-        three_month_df["Rent"] = pd.to_numeric(three_month_df["Rent"], errors="coerce")
-
-        # ✅ Print to confirm
-        three_month_total_units = three_month_df.groupby("BD/BA").size()
-        three_month_occupied_units = three_month_df[three_month_df["Status"].isin(["Current", "Notice-Unrented", "Notice-Rented"])].groupby("BD/BA").size()
-        three_month_bd_ba_summary = pd.DataFrame({
-            "Total_Rent": three_month_df.groupby("BD/BA")["Rent"].sum(),
-            "Total_Units": three_month_total_units,
-            "Occupied_Units": three_month_occupied_units
-        }).fillna(0)  # Fill NaN for BD/BA groups without occupied units
-
-        three_month_bd_ba_summary["Occupancy_Rate"] = (three_month_bd_ba_summary["Occupied_Units"] / three_month_bd_ba_summary["Total_Units"]) * 100
-        three_month_bd_ba_summary["Occupancy_Rate"] = three_month_bd_ba_summary["Occupancy_Rate"].round(2).astype(str) + "%"
-
-        three_month_total_rent = three_month_bd_ba_summary["Total_Rent"].sum()
-        three_month_total_units_all = three_month_bd_ba_summary["Total_Units"].sum()
-        three_month_occupied_units_all = three_month_bd_ba_summary["Occupied_Units"].sum()
-
-        three_month_overall_occupancy_rate = (three_month_occupied_units_all / three_month_total_units_all) * 100 if three_month_total_units_all > 0 else 0
-        three_month_overall_occupancy_rate = f"{round(three_month_overall_occupancy_rate, 2)}%"
-        three_month_bd_ba_summary["Total_Rent"] = three_month_bd_ba_summary["Total_Rent"].apply(lambda x: f"${x:,.2f}")
-
-        # 🔹 **Append "Total" Row**
-        three_month_total_row = pd.DataFrame([{
-            "BD/BA": "Total",
-            "Total_Rent": f"${three_month_total_rent:,.2f}",
-            "Occupancy_Rate": three_month_overall_occupancy_rate
-        }])
-
-        three_month_bd_ba_summary = three_month_bd_ba_summary.drop(columns=["Total_Units", "Occupied_Units"])
-        three_month_bd_ba_summary = three_month_bd_ba_summary.reset_index()
-        three_month_bd_ba_summary = pd.concat([three_month_bd_ba_summary, three_month_total_row], ignore_index=True)
-
-        beg_year_df = dfs["Beg Year"]  # Ensure the correct dataset key
-
-        # 1. Clean the Rent column (remove $ and ,)
-        beg_year_df["Rent"] = (
-            beg_year_df["Rent"]
-            .astype(str)
-            .str.replace(r"[$,]", "", regex=True)
-            .str.strip()
-        )
-
-        # 2. Then convert to numeric
-        beg_year_df["Rent"] = pd.to_numeric(beg_year_df["Rent"], errors="coerce")
-
-        # ✅ Print to confirm
-        beg_year_total_units = beg_year_df.groupby("BD/BA").size()
-        beg_year_occupied_units = beg_year_df[beg_year_df["Status"].isin(["Current", "Notice-Unrented", "Notice-Rented"])].groupby("BD/BA").size()
-        beg_year_bd_ba_summary = pd.DataFrame({
-            "Total_Rent": beg_year_df.groupby("BD/BA")["Rent"].sum(),
-            "Total_Units": beg_year_total_units,
-            "Occupied_Units": beg_year_occupied_units
-        }).fillna(0)  # Fill NaN for BD/BA groups without occupied units
-
-        beg_year_bd_ba_summary["Occupancy_Rate"] = (beg_year_bd_ba_summary["Occupied_Units"] / beg_year_bd_ba_summary["Total_Units"]) * 100
-        beg_year_bd_ba_summary["Occupancy_Rate"] = beg_year_bd_ba_summary["Occupancy_Rate"].round(2).astype(str) + "%"
-
-
-        beg_year_total_rent = beg_year_bd_ba_summary["Total_Rent"].sum()
-        beg_year_total_units_all = beg_year_bd_ba_summary["Total_Units"].sum()
-        beg_year_occupied_units_all = beg_year_bd_ba_summary["Occupied_Units"].sum()
-
-        beg_year_overall_occupancy_rate = (beg_year_occupied_units_all / beg_year_total_units_all) * 100 if beg_year_total_units_all > 0 else 0
-        beg_year_overall_occupancy_rate = f"{round(beg_year_overall_occupancy_rate, 2)}%"
-        beg_year_bd_ba_summary["Total_Rent"] = beg_year_bd_ba_summary["Total_Rent"].apply(lambda x: f"${x:,.2f}")
-
-        # 🔹 **Append "Total" Row**
-        beg_year_total_row = pd.DataFrame([{
-            "BD/BA": "Total",
-            "Total_Rent": f"${beg_year_total_rent:,.2f}",
-            "Occupancy_Rate": beg_year_overall_occupancy_rate
-        }])
-
-        beg_year_bd_ba_summary = beg_year_bd_ba_summary.drop(columns=["Total_Units", "Occupied_Units"])
-        beg_year_bd_ba_summary = beg_year_bd_ba_summary.reset_index()
-        beg_year_bd_ba_summary = pd.concat([beg_year_bd_ba_summary, beg_year_total_row], ignore_index=True)
-
-        same_day_df = dfs["Sameday"]  # Ensure the correct dataset key
-
-        # 1. Clean the Rent column (remove $ and ,)
-        same_day_df["Rent"] = (
-            same_day_df["Rent"]
-            .astype(str)
-            .str.replace(r"[$,]", "", regex=True)
-            .str.strip()
-        )
-
-        # 2. Then convert to numeric
-        same_day_df["Rent"] = pd.to_numeric(same_day_df["Rent"], errors="coerce")
-
-        # ✅ Print to confirm
-        same_day_total_units = same_day_df.groupby("BD/BA").size()
-        same_day_occupied_units = same_day_df[same_day_df["Status"].isin(["Current", "Notice-Unrented", "Notice-Rented"])].groupby("BD/BA").size()
-        same_day_bd_ba_summary = pd.DataFrame({
-            "Total_Rent": same_day_df.groupby("BD/BA")["Rent"].sum(),
-            "Total_Units": same_day_total_units,
-            "Occupied_Units": same_day_occupied_units
-        }).fillna(0)  # Fill NaN for BD/BA groups without occupied units
-
-        same_day_bd_ba_summary["Occupancy_Rate"] = (same_day_bd_ba_summary["Occupied_Units"] / same_day_bd_ba_summary["Total_Units"]) * 100
-        same_day_bd_ba_summary["Occupancy_Rate"] = same_day_bd_ba_summary["Occupancy_Rate"].round(2).astype(str) + "%"
-
-
-        same_day_total_rent = same_day_bd_ba_summary["Total_Rent"].sum()
-        same_day_total_units_all = same_day_bd_ba_summary["Total_Units"].sum()
-        same_day_occupied_units_all = same_day_bd_ba_summary["Occupied_Units"].sum()
-
-        same_day_overall_occupancy_rate = (same_day_occupied_units_all / same_day_total_units_all) * 100 if same_day_total_units_all > 0 else 0
-        same_day_overall_occupancy_rate = f"{round(same_day_overall_occupancy_rate, 2)}%"
-        same_day_bd_ba_summary["Total_Rent"] = same_day_bd_ba_summary["Total_Rent"].apply(lambda x: f"${x:,.2f}")
-
-        # 🔹 **Append "Total" Row**
-        same_day_total_row = pd.DataFrame([{
-            "BD/BA": "Total",
-            "Total_Rent": f"${same_day_total_rent:,.2f}",
-            "Occupancy_Rate": same_day_overall_occupancy_rate
-        }])
-
-        same_day_bd_ba_summary = same_day_bd_ba_summary.drop(columns=["Total_Units", "Occupied_Units"])
-        same_day_bd_ba_summary = same_day_bd_ba_summary.reset_index()
-        same_day_bd_ba_summary = pd.concat([same_day_bd_ba_summary, same_day_total_row], ignore_index=True)
-
-            # Rename columns before merging
-        bd_ba_summary = bd_ba_summary.rename(columns={
-            "Total_Rent": "Cur Total",
-            "Occupancy_Rate": "Cur Oc. Rate"
-        })
-
-        three_month_bd_ba_summary = three_month_bd_ba_summary.rename(columns={
-            "Total_Rent": "T3 Total",
-            "Occupancy_Rate": "T3 Oc. Rate"
-        })
-        beg_year_bd_ba_summary = beg_year_bd_ba_summary.rename(columns={
-            "Total_Rent": "BOY Total",
-            "Occupancy_Rate": "BOY Oc. Rate"
-        })
-        same_day_bd_ba_summary = same_day_bd_ba_summary.rename(columns={
-            "Total_Rent": "SDLY Total",
-            "Occupancy_Rate": "SDLY Oc. Rate"
-        })
-
-
-        # Merge on "BD/BA"
-        combined_summary = pd.merge(
-            bd_ba_summary,
-            three_month_bd_ba_summary,
-            on="BD/BA",
-            how="outer"
-        )
-
-        # Then merge with beginning of year summary
-        combined_summary = pd.merge(
-            combined_summary,
-            beg_year_bd_ba_summary,
-            on="BD/BA",
-            how="outer"
-        )
-
-        combined_summary = pd.merge(
-            combined_summary,
-            same_day_bd_ba_summary,
-            on="BD/BA",
-            how="outer"
-        )
-
-        # Optional: Fill missing with "-"
-        combined_summary = combined_summary.fillna("-")
-     
-          # Display in Streamlit
+        # Display in Streamlit
         st.write("### 📊 Comparison: Current vs 3-Month-Ago Rent & Occupancy")
 
         # Display without the automatic index
-        st.dataframe(combined_summary.reset_index(drop=True), use_container_width=True)
-        
-        def save_table_as_image(df, path):
-            
-            fig, ax = plt.subplots(figsize=(12, max(1.2, len(df) * 0.3)))  # Min height control
-            ax.axis('tight')
-            ax.axis('off')
-            
-            table = ax.table(cellText=df.values,
-                            colLabels=df.columns,
-                            loc='center',
-                            cellLoc='center')
-            
-            table.auto_set_font_size(False)
-            table.set_fontsize(12)
-            table.auto_set_column_width([i for i in range(len(df.columns))])  # Adjust column width
-
-            fig.tight_layout()
-            plt.savefig(path, dpi=300, bbox_inches='tight', pad_inches=0.1)
-            plt.close(fig)
+        st.dataframe(summary_df, use_container_width=True)
 
         # Save the table with better formatting
-        table_img_path = os.path.join(IMG_DIR, "combined_summary.png")
-        save_table_as_image(combined_summary.reset_index(drop=True), table_img_path)
+        save_chart(shared_figure("combined_summary", charts.table_figure, summary_df), "combined_summary")
 
-            
     col7, col8 = st.columns(2)
 
     # Use col2 and col5 for two separate charts
     with col7:
-            # Ensure Rent and Market Rent are numeric
-        dfs["Tenant Data"]["Rent"] = pd.to_numeric(dfs["Tenant Data"]["Rent"], errors="coerce")
-        dfs["Tenant Data"]["Market Rent"] = pd.to_numeric(dfs["Tenant Data"]["Market Rent"], errors="coerce")
-
-        # Drop invalid rows where Rent or Market Rent is NaN
-        filtered_df = dfs["Tenant Data"].dropna(subset=["Rent", "Market Rent"])
-
-        # Group by BD/BA and Calculate Avg Rent and Market Rent
-        avg_rent_df = filtered_df.groupby("BD/BA")[["Rent", "Market Rent"]].mean().round(0).reset_index()
-
-        # Count the number of units per BD/BA
-        unit_count_df = filtered_df.groupby("BD/BA").size().reset_index(name="Unit Count")
-
-        # Merge DataFrames to align BD/BA categories
-        final_df = avg_rent_df.merge(unit_count_df, on="BD/BA")
-
-        # Create figure with Bar Chart for Rent & Market Rent
-        fig3 = go.Figure()
-
-        # Add Rent bars
-        fig3.add_trace(go.Bar(
-            x=final_df["BD/BA"], 
-            y=final_df["Rent"], 
-            name="Avg Rent",
-            marker_color="blue",
-            text=final_df["Rent"], 
-            textposition="auto"
-        ))
-
-        # Add Market Rent bars
-        fig3.add_trace(go.Bar(
-            x=final_df["BD/BA"], 
-            y=final_df["Market Rent"], 
-            name="Avg Market Rent",
-             marker_color="green",
-            text=final_df["Market Rent"], 
-            textposition="auto"
-        ))
-
-        # Add Line Chart for Unit Count (Secondary Y-Axis)
-        fig3.add_trace(go.Scatter(
-            x=final_df["BD/BA"], 
-            y=final_df["Unit Count"], 
-            name="Unit Count",
-            mode="lines+markers",
-            yaxis="y2",
-            line=dict(color="red", width=2),
-            marker=dict(size=8, symbol="circle"),
-        ))
-
-        fig3.update_layout(
-            title="📊 Avg Rent vs. Market Rent with Unit Count by BD/BA",
-            xaxis=dict(
-                title=dict(text="Bedroom/Bathroom"), 
-                tickangle=-45, 
-                tickfont=dict(size=12)
-            ),
-            yaxis=dict(
-                title=dict(text="Amount ($)"), 
-                gridcolor="lightgray"
-            ),
-            yaxis2=dict(
-                title=dict(text="Unit Count"), 
-                overlaying="y", 
-                side="right", 
-                showgrid=False
-            ),
-            legend=dict(title=dict(text="Legend")),
-            width=1000, height=600,
-            bargap=0.15,  # Reduce gap between bars
-            barmode="group"
-        )
-                # Display in Streamlit
+        fig3 = shared_figure("avg_rent", charts.avg_rent_figure, shared.dfs["Tenant Data"])
         st.plotly_chart(fig3, use_container_width=True)
-        img_path3 = os.path.join(IMG_DIR, "avg_rent.png")
-        fig3.write_image(img_path3)
+        save_chart(fig3, "avg_rent")
 
     with col8:
         # Ensure "Status" column exists
         if "Status" in dfs["Tenant Data"].columns:
-            status_counts = dfs["Tenant Data"]["Status"].value_counts().reset_index()
-            status_counts.columns = ["Status", "Count"]
-
-            # **Create Pie Chart**
-            fig4 = px.pie(status_counts, 
-             values="Count", 
-             names="Status", 
-             title="🏠 Tenant Status Distribution", 
-             hole=0.4,  # Creates a donut-style pie chart
-             color_discrete_sequence=px.colors.qualitative.Set3)  # Custom colors
-
-            # 🔹 Improve Layout & Style
-            fig4.update_layout(
-                width=800, height=600,  # Bigger chart
-            )
-
-            # 🔹 Customize Legend
-            fig4.update_layout(
-                legend=dict(
-                    font=dict(size=14),  # Bigger font for legend
-                    x=1, y=0.9,  # Position legend to the right
-                    xanchor="right"
-                )
-            )
-
-            # 🔹 Show Percentages & Labels
-            fig4.update_traces(
-                textinfo="percent+label",  # Display both labels and percentages
-                pull=[0.1 if i == 0 else 0 for i in range(len(status_counts))],  # Slightly pull out the first slice
-
-            )   
+            fig4 = shared_figure("status", charts.tenant_status_figure, shared.dfs["Tenant Data"])
 
             # Display the Pie Chart
             st.plotly_chart(fig4, use_container_width=True)
-            img_path4 = os.path.join(IMG_DIR, "status.png")
-            fig4.write_image(img_path4)
- 
+            save_chart(fig4, "status")
         else:
             st.warning("⚠️ 'Status' column not found in dataset.")
+    profiler.lap("Tenant summary & charts")
+
+    # 🔹 Trends across every Tenant Data export (cache/timeseries.csv only grows by the new ones)
+    shared.get("timeseries", update_timeseries, BASE_DIR)
+    ts = load_timeseries()
+    st.write("### 📈 Occupancy & Rent Trends")
+    if ts["Snapshot"].nunique() < 2:
+        st.info("Trends appear once there are at least two Tenant Data exports.")
+    else:
+        trend_col1, trend_col2 = st.columns([2, 1])
+        first_day, last_day = ts["As Of"].min().date(), ts["As Of"].max().date()
+        date_range = trend_col1.date_input("Date range", value=(first_day, last_day),
+                                           min_value=first_day, max_value=last_day)
+        metric = trend_col2.selectbox("Metric", ["Occupancy Rate", "Total Rent", "Market Rent", "Avg Rent", "Occupied"])
+        if len(date_range) == 2:
+            ts = load_timeseries(start=date_range[0], end=date_range[1])
+        st.plotly_chart(charts.trend_figure(ts, metric), use_container_width=True)
+    profiler.lap("Trends")
+
+    # 🔹 Loss to lease (per-unit gap index precomputed per snapshot, sorted by gap)
+    st.write("### 💸 Loss to Lease")
+    loss = shared.get("loss_to_lease", load_or_build_loss_to_lease, shared.dfs, latest_files)
+    loss_totals = loss["by_bd_ba"][["Market Rent", "Loss to Lease"]].sum()
+    col42, col43 = st.columns(2)
+    col42.metric(label="💸 Monthly Loss to Lease", value=f"${loss_totals['Loss to Lease']:,.0f}")
+    col43.metric(label="📉 Loss % of Market", value=f"{loss_totals['Loss to Lease'] / loss_totals['Market Rent'] * 100:.1f}%")
+
+    loss_tab1, loss_tab2, loss_tab3, loss_tab4 = st.tabs(["Furthest below market", "By BD/BA", "By lease expiry", "By tenure"])
+    with loss_tab1:
+        col44, col45, col46 = st.columns(3)
+        top_n = col44.number_input("Units", min_value=5, max_value=100, value=10, step=5)
+        expiring = col45.selectbox("Lease ends within", ["Any time", "30 days", "60 days", "90 days", "180 days"], index=3)
+        bd_ba_filter = col46.selectbox("BD/BA", ["All"] + list(loss["index"]["BD/BA"].cat.categories))
+        st.dataframe(
+            top_units(loss["index"], int(top_n),
+                      expiring_within=None if expiring == "Any time" else int(expiring.split()[0]),
+                      bd_ba=None if bd_ba_filter == "All" else bd_ba_filter),
+            use_container_width=True, hide_index=True,
+        )
+    loss_tab2.dataframe(loss["by_bd_ba"], use_container_width=True, hide_index=True)
+    loss_tab3.dataframe(loss["by_expiry"], use_container_width=True, hide_index=True)
+    loss_tab4.dataframe(loss["by_tenure"], use_container_width=True, hide_index=True)
+    profiler.lap("Loss to lease")
+
+    # 🔹 Rent what-if: settings in the sidebar, Monte Carlo run over all occupied units
+    st.sidebar.header("📈 Rent What-If")
+    sim_increase_pct = st.sidebar.slider("Move renewals toward market (%)", 0, 100, 50, step=5)
+    sim_renewal_pct = st.sidebar.slider("Renewal probability (%)", 0, 100, 60, step=5)
+    bd_ba_choices = sorted(dfs["Tenant Data"]["BD/BA"].dropna().unique())
+    override_bd_ba = st.sidebar.multiselect("Different increase for BD/BA", bd_ba_choices)
+    override_pct = st.sidebar.slider("Increase for those BD/BA (%)", 0, 100, 100, step=5) if override_bd_ba else None
+    sim_months = st.sidebar.slider("Months", 3, 24, 12)
+    sim_scenarios = st.sidebar.select_slider("Scenarios", [1000, 5000, 10000], value=10000)
+
+    sim_summary, _ = simulate_rent_roll(
+        dfs["Tenant Data"],
+        increase_rules={bd_ba: override_pct / 100 for bd_ba in override_bd_ba},
+        default_increase=sim_increase_pct / 100,
+        default_renewal=sim_renewal_pct / 100,
+        months=sim_months,
+        scenarios=sim_scenarios,
+        seed=0,  # Same settings -> same chart on every rerun
+    )
+    st.plotly_chart(charts.rent_simulation_figure(sim_summary), use_container_width=True)
+    profiler.lap("Rent what-if")
 
-    col9 = st.columns(1)[0] 
+    col9 = st.columns(1)[0]
 
-    # Use col2 and col5 for two separate charts
     with col9:
-        df_filtered = dfs["Tenant Data"].dropna(subset=["Tenant", "Late Count"]).copy()
-
-        # **Convert "Late Count" to numeric**
-        df_filtered["Late Count"] = pd.to_numeric(df_filtered["Late Count"], errors="coerce")
-        df_filtered = df_filtered[df_filtered["Late Count"] > 2]
-        df_filtered = df_filtered.sort_values(by="Late Count", ascending=False)
-
-        # **Create Bar Chart**
-        fig1 = px.bar(df_filtered, x="Tenant", y="Late Count", 
-                    title="📊 Late Payment Frequency by Tenant",
-                    labels={"Late Count": "Late Payment Count", "Tenant": "Tenant Name"},
-                    color="Late Count",
-                    text_auto=True,
-                    color_continuous_scale="Blues")
-        fig1.update_layout(
-        height=600, width=1000,  # Bigger figure
-        margin=dict(l=50, r=50, t=50, b=150)  # Adjust margins
-    )
-
-# 🔹 Rotate x-axis labels
-        fig1.update_xaxes(tickangle=-45) 
+        fig1 = shared_figure("late", charts.late_payment_figure, shared.dfs["Tenant Data"])
         st.plotly_chart(fig1, use_container_width=True)
-        img_path1 = os.path.join(IMG_DIR, "late.png")
-        fig1.write_image(img_path1)
+        save_chart(fig1, "late")
+    profiler.lap("Late payments")
 
 with tab2:
     col21, col22, col23, col24 = st.columns(4)
-    
-    # Filter rows where Status == 'Current' and count them
-    new_work_orders = dfs["Work Orders"][dfs["Work Orders"]["Status"] == "New"].shape[0]
-    urgent_work_orders = dfs["Work Orders"][dfs["Work Orders"]["Priority"] == "Urgent"].shape[0]
-    # Count total rows (all units)
-    all_work_order= dfs["Work Orders"].shape[0]
-
-    
-    dfs["Work Orders"]["Amount"] = dfs["Work Orders"]["Amount"].replace("[\$,]", "", regex=True)  # Remove $ and ,
-    dfs["Work Orders"]["Amount"] = pd.to_numeric(dfs["Work Orders"]["Amount"], errors="coerce")  # Convert to number
-
-    # Calculate total rent
-    total_amount = dfs["Work Orders"]["Amount"].sum()
-    market_total_rent = dfs["Tenant Data"]["Market Rent"].sum()
-    total_move_out = dfs["Tenant Data"]["Move-out"].notnull().sum()
 
     # Display the metric card
-    col21.metric(label="🛠️ Total work order", value=f"{all_work_order}")
-    col22.metric(label="🆕New work orders", value=f"{new_work_orders}")
-    col23.metric(label="⚠️Urgent work order ", value=f"{urgent_work_orders}")
-    col24.metric(label="💰Total Amounts", value=f"${total_amount}")
+    col21.metric(label="🛠️ Total work order", value=metric_values["Total Workorder"])
+    col22.metric(label="🆕New work orders", value=metric_values["New work orders"])
+    col23.metric(label="⚠️Urgent work order ", value=metric_values["Urgent Work Orders"])
+    col24.metric(label="💰Total Amounts", value=metric_values["Total Amounts"])
+
+    # Type / issue counts come from the chunked work order counters, not a scan of the export
+    # (they track the current export, so they match the cards above and the PDF)
+    wo_state = shared.get("work_order_state", update_work_order_state, latest_files["Work Orders"])
 
     col26, col27 = st.columns(2)
 
-    # Use col2 and col5 for two separate charts
-        
     with col26:
-
         if "Work Order Type" in dfs["Work Orders"].columns:
-            status_counts = dfs["Work Orders"]["Work Order Type"].value_counts().reset_index()
-            status_counts.columns = ["Work Order Type", "Count"]
-
-            # **Create Pie Chart**
-            fig5 = px.pie(status_counts, 
-             values="Count", 
-             names="Work Order Type", 
-             title="🏠 Work Order Type Distribution", 
-             hole=0.3,  # Donut chart effect
-             color_discrete_sequence=px.colors.sequential.Viridis)  # Custom color scale
-
-            # 🔹 Improve Layout & Style
-            fig5.update_layout(
-                width=800, height=600,  # Bigger size
-
-            )
-
-            # 🔹 Customize Legend
-            fig5.update_layout(
-                legend=dict(
-                    font=dict(size=14),  # Bigger legend font
-                    orientation="h",  # Horizontal legend
-                    x=0.5, y=-0.2,  # Centered below chart
-                    xanchor="center"
-                )
-            )
-
-            # 🔹 Show Percentage & Labels
-            fig5.update_traces(
-                textinfo="percent+label",  # Show % and category
-                pull=[0.1 if i == 0 else 0 for i in range(len(status_counts))],  # Emphasize the first slice
-            )
+            fig5 = shared_figure("order-type", lambda: charts.work_order_type_counts_figure(
+                counts_table(wo_state, "Work Order Type")))
 
             # Display the Pie Chart
             st.plotly_chart(fig5, use_container_width=True)
-            img_path5 = os.path.join(IMG_DIR, "order-type.png")
-            fig5.write_image(img_path5)
-
+            save_chart(fig5, "order-type")
         else:
             st.warning("⚠️ 'Status' column not found in dataset.")
-    with col27:
-        df_filtered = dfs["Work Orders"].dropna(subset=["Work Order Issue"]).copy()
-
-        # **Count work order frequency per unit**
-        work_order_issue_counts = df_filtered["Work Order Issue"].value_counts().reset_index()
-        work_order_issue_counts.columns = ["Work Order Issue", "Work Order Issue Count"]  # Rename columns
-
-        # **Sort by Work Order Count in Descending Order & Show Top 20**
-        work_order_issue_counts = work_order_issue_counts.sort_values(by="Work Order Issue Count", ascending=True).tail(20)
-
-        fig6 = px.bar(
-            work_order_issue_counts, 
-            x="Work Order Issue Count", 
-            y="Work Order Issue", 
-            title="📊 Work Order Frequency by Issue",
-            labels={"Work Order Issue Count": "Work Order Issue Count", "Work Order Issue": "Work Order Issue"},
-            color="Work Order Issue Count",
-            color_continuous_scale="Viridis",  # Gradient color
-            text_auto=True,
-            orientation='h'  # Horizontal bars
-        )
 
-        # 🔹 Improve Layout & Style
-        fig6.update_layout(
-            width=1100, height=600,  # Bigger size
-            coloraxis_showscale=False,  # Hide the color scale bar
-            margin=dict(t=50, b=50, l=200, r=50)  # Adjust margins to give more space
-        )
-
-        # 🔹 Customize X-Axis
-        fig6.update_xaxes(
-            title_text="Work Order Issue Count",
-            tickangle=0,  # Keep horizontal for clarity
-            showgrid=True,
-            gridcolor="lightgray"
-        )
-
-        # 🔹 Customize Y-Axis
-        fig6.update_yaxes(
-            title_text="Work Order Issue",
-            showgrid=False,  # Remove grid to keep it clean
-            tickmode="array",  # Ensure that each label is spaced out properly
-        )
-        fig6.update_traces(
-            textposition="outside",  # Position text outside the bars
-            textfont=dict(size=12),  # Reduce font size to prevent overlap
-        )
-        # Display the chart
+    with col27:
+        fig6 = shared_figure("order-issue", lambda: charts.work_order_issue_counts_figure(
+            counts_table(wo_state, "Work Order Issue", "Work Order Issue Count")))
         st.plotly_chart(fig6, use_container_width=True)
-        img_path6 = os.path.join(IMG_DIR, "order-issue.png")
-        fig6.write_image(img_path6)
+        save_chart(fig6, "order-issue")
+    profiler.lap("Work order counters & charts")
+
+    # 🔹 Aging & SLA (index built from the work order state, aged from the export time)
+    st.write("### ⏱️ Aging & SLA")
+    sla_index = shared.get("sla_index", load_or_build_sla_index, wo_state,
+                           extract_timestamp_from_filename(os.path.basename(latest_files["Work Orders"])))
+    sla = shared.get("sla_summary", sla_summary, sla_index)
+    col28, col29, col30 = st.columns(3)
+    col28.metric(label="📂 Open work orders", value=int(sla["Open"].sum()))
+    col29.metric(label="🚨 Open past SLA", value=int(sla["Open Past SLA"].sum()))
+    closed_days = sla_index["Days To Close"].dropna()
+    col30.metric(label="⏳ Median days to close", value=f"{closed_days.median():.1f}" if len(closed_days) else "-")
+
+    aging_by = st.radio("Aging by", ["Priority", "Work Order Type"], horizontal=True)
+    st.plotly_chart(charts.work_order_aging_figure(aging_table(sla_index, aging_by)), use_container_width=True)
+    st.dataframe(sla, use_container_width=True, hide_index=True)
+    profiler.lap("Aging & SLA")
 
 
 with tab3:
     col31, col32, col33, col34 = st.columns(4)
 
-        # **Filter Vacancy and Work Order Counts**
-    rent_ready = dfs["Vacancies"][dfs["Vacancies"]["Rent Ready"] == "Yes"].shape[0]
-    urgent_work_orders = dfs["Work Orders"][dfs["Work Orders"]["Priority"] == "Urgent"].shape[0]
-    next_move_in = dfs["Vacancies"]["Next Move In"].notnull().sum()
-    
-    total_vacancy = dfs["Vacancies"].shape[0]
-
-        # **Convert "Days Vacant" to Numeric**
-    dfs["Vacancies"]["Days Vacant"] = pd.to_numeric(
-        dfs["Vacancies"]["Days Vacant"].replace("[\$,]", "", regex=True), 
-        errors="coerce"
-    )
-
-        # **Calculate Average Days Vacant**
-    avg_days_vacant = dfs["Vacancies"]["Days Vacant"].mean()
-
         # **Display Metric Cards**
-    col31.metric(label="🏠 Total Vacancy", value=f"{total_vacancy}")
-    col32.metric(label="✅ Rent Ready Units", value=f"{rent_ready}")
-    col33.metric(label="🆕 Upcoming Move In", value=f"{next_move_in}")
-    col34.metric(label="📉 Avg Days Vacant", value=f"{avg_days_vacant:.1f} days")
+    col31.metric(label="🏠 Total Vacancy", value=metric_values["Total Vacancy"])
+    col32.metric(label="✅ Rent Ready Units", value=metric_values["Rent Ready Units"])
+    col33.metric(label="🆕 Upcoming Move In", value=metric_values["Upcoming Move In"])
+    col34.metric(label="📉 Avg Days Vacant", value=metric_values["Avg Days Vacant"])
 
         # **Create Another Row for More Metrics**
     col36, col37 = st.columns(2)
 
     with col36:
-       
-        status_counts = dfs["Vacancies"]["Unit Status"].value_counts().reset_index()
-        status_counts.columns = ["Unit Status", "Count"]
-
-            # **Create Pie Chart**
-        fig9 = px.pie(status_counts, 
-              values="Count", 
-              names="Unit Status", 
-              title="🏠 Unit Status Distribution", 
-              hole=0.4,  # Creates a donut-style pie chart
-              color_discrete_sequence=px.colors.qualitative.Set3)  # Custom colors
-
-        # 🔹 Improve Layout & Style
-        fig9.update_layout(
-            width=800, height=600,  # Bigger chart
-            margin=dict(l=50, r=50, t=50, b=50)  # Adjust margins
-        )
-
-        # 🔹 Customize Legend
-        fig9.update_layout(
-            legend=dict(
-                font=dict(size=14),  # Bigger font for legend
-                x=1, y=0.9,  # Position legend to the right
-                xanchor="right"
-            )
-        )
-
-        # 🔹 Show Percentages & Labels
-        fig9.update_traces(
-            textinfo="percent+label",  # Display both labels and percentages
-            pull=[0.1 if i == 0 else 0 for i in range(len(status_counts))]  # Slightly pull out the first slice
-        )
-
+        fig9 = shared_figure("unit-count", charts.unit_status_figure, shared.dfs["Vacancies"])
         st.plotly_chart(fig9, use_container_width=True)
-        img_path9 = os.path.join(IMG_DIR, "unit-count.png")
-        fig9.write_image(img_path9)
+        save_chart(fig9, "unit-count")
 
     with col37:
-       
-        df1 = dfs["Vacancies"]  # Ensure you're using the correct dataset key
-
-        # Convert "Days Vacant" to numeric
-        df1["Days Vacant"] = pd.to_numeric(df1["Days Vacant"], errors="coerce")
-
-        # Drop missing values
-        df_filtered1 = df1.dropna(subset=["Bed/Bath", "Days Vacant"])
-
-        # Aggregate data: Calculate average "Days Vacant" per "Bed/Bath"
-        df_avg_vacancy = df_filtered1.groupby("Bed/Bath", as_index=False)["Days Vacant"].mean().round(1)
-
-        # Aggregate data: Count the number of units per "Bed/Bath"
-        df_units_count = df_filtered1.groupby("Bed/Bath", as_index=False).size()
-
-        # Merge both datasets for consistency in sorting
-        df_combined = df_avg_vacancy.merge(df_units_count, on="Bed/Bath").sort_values(by="Bed/Bath")
-
-        # Create Bar Chart for "Avg Days Vacant"
-        fig8 = go.Figure()
-
-        fig8.add_trace(
-            go.Bar(
-                x=df_combined["Bed/Bath"],
-                y=df_combined["Days Vacant"],
-                name="Avg Days Vacant",
-                marker=dict(color=df_combined["Days Vacant"], colorscale="Blugrn"),  # Color scale
-                text=df_combined["Days Vacant"],
-                textposition="auto"
-            )
-        )
-
-        # Add Line Chart for "Number of Units"
-        fig8.add_trace(
-            go.Scatter(
-                x=df_combined["Bed/Bath"],
-                y=df_combined["size"],  # Number of units
-                name="Number of Units",
-                mode="lines+markers",
-                line=dict(color="red", width=2),
-                marker=dict(size=8, symbol="circle"),
-                yaxis="y2"  # Use secondary y-axis
-            )
-        )
-
-        # 🔹 Improve Layout & Style
-        fig8.update_layout(
-            title="📊 Average Days Vacant & Number of Units by Bed/Bath",
-            xaxis=dict(title="Bedroom/Bathroom", title_font=dict(size=14), tickfont=dict(size=12)),
-            yaxis=dict(title="Avg Days Vacant", title_font=dict(size=14), tickfont=dict(size=12), gridcolor="lightgray"),
-            yaxis2=dict(
-                title="Number of Units",
-                overlaying="y",
-                side="right",
-                showgrid=False,
-                title_font=dict(size=14),
-                tickfont=dict(size=12),
-            ),
-            legend=dict(title="Metrics", font=dict(size=12)),
-            width=1000, height=600,  # Bigger size
-            margin=dict(l=50, r=50, t=50, b=50)
-        )
-
-        # Show the chart in Streamlit
+        fig8 = shared_figure("bed-bath-avg-day", charts.days_vacant_figure, shared.dfs["Vacancies"])
         st.plotly_chart(fig8, use_container_width=True)
-        img_path8 = os.path.join(IMG_DIR, "bed-bath-avg-day.png")
-        fig8.write_image(img_path8)
-
+        save_chart(fig8, "bed-bath-avg-day")
 
     col38, col39 = st.columns(2)
 
-    # Use col2 and col5 for two separate charts
-        
     with col38:
-
-        df3 = dfs["Vacancies"]  # Ensure you're using the correct dataset key
-
-        # Drop rows missing key info
-        df3 = df3.dropna(subset=["Bed/Bath", "Unit Status"])
-     
-        # Group by unit type and status
-        status_counts = df3.groupby(["Bed/Bath", "Unit Status"]).size().unstack(fill_value=0)
-        status_counts = status_counts.reset_index()
-
-       # Create a stacked bar chart
-        fig7 = go.Figure()
-        custom_colors = {
-            "Vacant-Unrented": "#72c0a7",  # Deep orange
-            "Vacant-Rented": "#1E90FF",  # Blue
-            "Notice-Unrented": "#87CEFA"  # Light blue
-        }
-        # Loop through each status column to stack bars
-        for status in status_counts.columns[1:]:
-            fig7.add_trace(go.Bar(
-                x=status_counts["Bed/Bath"],
-                y=status_counts[status],
-                name=status,
-                marker=dict(color=custom_colors.get(status, "#CCCCCC")),  # Apply color here
-                text=status_counts[status],  # Add data labels
-            ))
-    
-        # Customize layout
-        fig7.update_layout(
-            barmode="stack",
-            title="🏘️ Unit Type Breakdown by Status",
-            xaxis_title="Unit Type (BD/BA)",
-            yaxis_title="Number of Units",
-            width=1000,
-            height=600,
-            legend_title="Unit Status",
-            margin=dict(l=40, r=40, t=60, b=40)
-        )
-
-        # Show in Streamlit
+        fig7 = shared_figure("bed-bath-unit", charts.unit_type_status_figure, shared.dfs["Vacancies"])
         st.plotly_chart(fig7, use_container_width=True)
-        img_path7 = os.path.join(IMG_DIR, "bed-bath-unit.png")
-        fig7.write_image(img_path7)
-     
-       
-    with col39:
-                # Today's date
-        today = pd.Timestamp.today()
-
-        # 60 days from now
-        future_cutoff = today + pd.Timedelta(days=60)
-        rent_ready_df = dfs["Vacancies"]
-
-            # Parse the relevant date columns
-        rent_ready_df["Last Move Out"] = pd.to_datetime(rent_ready_df["Last Move Out"], errors="coerce")
-        rent_ready_df["Next Move In"] = pd.to_datetime(rent_ready_df["Next Move In"], errors="coerce")
-
-        # Filter for the next 60 days
-        upcoming_move_outs = rent_ready_df[
-            (rent_ready_df["Last Move Out"].notna()) &
-            (rent_ready_df["Last Move Out"] >= today) &
-            (rent_ready_df["Last Move Out"] <= future_cutoff)
-        ]
-
-        upcoming_move_ins = rent_ready_df[
-            (rent_ready_df["Next Move In"].notna()) &
-            (rent_ready_df["Next Move In"] >= today) &
-            (rent_ready_df["Next Move In"] <= future_cutoff)
-        ]
-
-        # Count per day
-        move_out_counts = upcoming_move_outs["Last Move Out"].dt.date.value_counts().sort_index()
-        move_in_counts = upcoming_move_ins["Next Move In"].dt.date.value_counts().sort_index()
-
-        # Combine counts into a DataFrame
-        move_summary_df = pd.DataFrame({
-            "Last Move Out": move_out_counts,
-            "Next Move In": move_in_counts
-        }).fillna(0)
-
-        # Convert index to string for plotting
-        move_summary_df.index = move_summary_df.index.astype(str)
-
-        # 🔹 **Plot the improved bar chart**
-        fig10 = px.bar(
-            move_summary_df,
-            x=move_summary_df.index,
-            y=["Last Move Out", "Next Move In"],
-            title="📊 Upcoming Move-Outs and Move-Ins (Next 60 Days)",
-            labels={"value": "Count of Units", "index": "Date"},
-            barmode="group",
-            text_auto=True,
-            color_discrete_sequence=["#EF553B", "#636EFA"]  # Red & Blue
-        )
-
-        fig10.update_layout(
-            xaxis=dict(title="Date", tickangle=45),
-            yaxis=dict(title="Count of Units", gridcolor="lightgray"),
-            width=1000, height=600,
-            margin=dict(l=50, r=50, t=50, b=50)
-                )
+        save_chart(fig7, "bed-bath-unit")
 
-        # Display in Streamlit
+    with col39:
+        # Counts from today, so shared per day
+        fig10 = shared_figure(("move-in-out", date.today()), charts.move_in_out_figure, shared.dfs["Vacancies"])
         st.plotly_chart(fig10, use_container_width=True)
-        img_path10 = os.path.join(IMG_DIR, "move-in-out.png")
-        fig10.write_image(img_path10)
-                
+        save_chart(fig10, "move-in-out")
+    profiler.lap("Vacancy charts")
+
+    # 🔹 Occupancy forecast from lease ends and scheduled move-ins/outs (events cached per snapshot)
+    st.write("### 🔮 Occupancy Forecast")
+    col40, col41 = st.columns(2)
+    horizon = col40.slider("Horizon (days)", min_value=30, max_value=180, value=90, step=15)
+    renewal_pct = col41.slider("Expected renewals of expiring leases (%)", min_value=0, max_value=100, value=0, step=5)
+    events = shared.get("forecast_events", load_or_build_events, shared.dfs, latest_files)
+    projected = forecast_occupancy(dfs["Tenant Data"], events, horizon=horizon, renewal_rate=renewal_pct / 100)
+    st.plotly_chart(charts.forecast_figure(projected, horizon), use_container_width=True)
+    profiler.lap("Forecast")
+
+    # 🔹 Distributions over fixed bins (histograms precomputed per snapshot)
+    st.write("### 📊 Distributions")
+    histograms = shared.get("histograms", load_or_build_histograms, shared.dfs, latest_files)
+    col49, col50 = st.columns(2)
+    hist_name = col49.selectbox("Histogram", list(histograms))
+    hist_stat = col50.selectbox("Show", ["Count"] + [f"Avg {c}" for c in histograms[hist_name].value_columns])
+    st.plotly_chart(charts.histogram_figure(histograms[hist_name], hist_stat), use_container_width=True)
+    profiler.lap("Distributions")
+
+    # 🔹 Vacancies x work orders, joined on integer Unit IDs
+    st.write("### 🔗 Units Across Reports")
+    units = shared.get("units", lambda: unit_table(shared.dfs, load_or_build_unit_index(shared.dfs, latest_files)))
+    col47, col48 = st.columns(2)
+    with col47:
+        st.write("Work orders per occupied vs vacant unit")
+        st.dataframe(shared.get("work_orders_by_occupancy", work_orders_by_occupancy, units), use_container_width=True, hide_index=True)
+    with col48:
+        st.write("Vacant units not rent ready with open work orders")
+        blocked = shared.get("blocked_vacancies", blocked_vacancies, units)
+        if blocked.empty:
+            st.info("No vacant unit is waiting on an open work order.")
+        else:
+            st.dataframe(blocked, use_container_width=True, hide_index=True)
+    profiler.lap("Units across reports")
 
     with tab1:
         st.subheader("🏠 Tenant Data")
@@ -911,40 +354,23 @@ with tab3:
     with tab3:
         st.subheader("🏢 Vacancies")
         st.write(dfs["Vacancies"])
+    profiler.lap("Raw tables")
+
+    # Publish images + metrics as one version in artifacts/ (make_pdf.py reads them through artifacts/CURRENT).
+    # Once per snapshot and day, since the move-in/out chart changes daily
+    if WRITE_IMAGES:
+        shared.get(("artifacts", date.today()), publish, latest_files, report_images, metrics_data_fixed)
+
+    # 🔹 Build the PDF report in memory from the figures above (no plotly_images/ round trip)
+    if st.sidebar.button("📄 Build PDF report"):
+        with st.spinner("Rendering PDF..."):
+            pdf_bytes = shared.get(("pdf", date.today()), build_report, report_figures, metrics_data_fixed)
+        st.sidebar.download_button(
+            "⬇️ Download PDF",
+            data=pdf_bytes,
+            file_name="appfolio_dashboard.pdf",
+            mime="application/pdf",
+        )
 
-
-    # Define the metrics dictionary
-    def convert_values(data):
-        return {key: [{"label": item["label"], "value": str(item["value"])} for item in value] for key, value in data.items()}
-
-    # Convert metrics data
-    metrics_data = {
-        "metrics1": [
-            {"label": "Total Unit", "value": int(all_units)},
-            {"label": "Occupancy Rate", "value": f"{occupied:.2f}%"},
-            {"label": "Total Rent", "value": f"${(total_rent):,.0f}"},
-            {"label": "Total Move-outs (Next 60 days)", "value": int(total_move_out)}
-        ],
-        "metrics2": [
-            {"label": "Total Vacancy", "value": int(total_vacancy)},
-            {"label": "Rent Ready Units", "value": int(rent_ready)},
-            {"label": "Upcoming Move In", "value": int(next_move_in)},
-            {"label": "Avg Days Vacant", "value": f"{avg_days_vacant:.1f} days"}
-        ],
-        "metrics3": [
-            {"label": "Total Workorder", "value": int(all_work_order)},
-            {"label": "New work orders", "value": int(new_work_orders)},
-            {"label": "Urgent Work Orders", "value": int(urgent_work_orders)},
-            {"label": "Total Amounts", "value": f"${total_amount}"}
-        ]
-    }
-
-    # Convert to JSON-friendly format
-    metrics_data_fixed = convert_values(metrics_data)
-
-    # Save to JSON file
-    json_file = "metrics.json"
-    with open(json_file, "w") as f:
-        json.dump(metrics_data_fixed, f, indent=4)
-
-
+if profiler.enabled:
+    show_profile_panel(st, profiler, dfs)
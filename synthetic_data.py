@@ -0,0 +1,260 @@
+"""
+Synthetic AppFolio exports for testing at scale.
+
+Writes raw (uncleaned) exports in the same layout AppFolio gives us: header row,
+blank line, "-> PROPERTY" row, data rows, a totals row, blank line and a "Total" row
+(the rows clean_csv strips), with amounts like "2,999.00" and MM/DD/YYYY dates.
+Files are named like the downloads the pipeline cleans, e.g. tenant_data-20250321_115751.csv.
+
+    python synthetic_data.py --units 100000 --output-dir bench_data/100k
+"""
+import argparse
+import csv
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from dashboard_data import raw_export_path
+
+PROPERTY_NAME = "TOPAZ HOUSE - 4400 E WEST Hwy BETHESDA, MD 20814"
+
+TENANT_COLUMNS = ["Unit", "Tags", "BD/BA", "Tenant", "Status", "Sqft", "Market Rent", "Rent", "Deposit",
+                  "Deposit Authorized", "Lease From", "Lease To", "Move-in", "Move-out", "Past Due", "NSF Count", "Late Count"]
+VACANCY_COLUMNS = ["Unit", "Tags", "Bed/Bath", "Sqft", "Unit Status", "Rent Ready", "Days Vacant", "Last Rent",
+                   "Scheduled Rent", "New Rent", "Last Move In", "Last Move Out", "Available On", "Next Move In", "Description"]
+WORK_ORDER_COLUMNS = ["Property", "Priority", "Work Order Type", "Home Warranty Expiration", "Work Order Number",
+                      "Job Description", "Instructions", "Status", "Vendor", "Unit", "Primary Resident", "Created At",
+                      "Estimate Req On", "Estimated On", "Estimate Amount", "Estimate Approval Status", "Estimate Approved On",
+                      "Estimate Approval Last Requested On", "Scheduled Start", "Scheduled End", "Work Done On",
+                      "Completed On", "Amount", "Invoice", "Unit Turn ID", "Recurring", "Work Order Issue"]
+
+# BD/BA mix, median Sqft and Market Rent, roughly as in our own rent roll
+UNIT_TYPES = pd.DataFrame({
+    "BD/BA": ["1/1.00", "--/1.00", "2/2.00", "3/2.00", "3/3.00", "--/--"],
+    "Share": [0.50, 0.20, 0.20, 0.06, 0.02, 0.02],
+    "Sqft": [845, 558, 1075, 1755, 1384, 1000],
+    "Market Rent": [2650, 2299, 3399, 4794, 4400, 2999],
+})
+STATUS_SHARES = {"Current": 0.84, "Notice-Unrented": 0.02, "Vacant-Unrented": 0.12, "Vacant-Rented": 0.02}
+
+FIRST_NAMES = ["JAMES", "MARY", "ROBERT", "PATRICIA", "JOHN", "JENNIFER", "MICHAEL", "LINDA", "DAVID", "ELIZABETH",
+               "WILLIAM", "BARBARA", "RICHARD", "SUSAN", "JOSEPH", "JESSICA", "THOMAS", "SARAH", "CHARLES", "KAREN"]
+LAST_NAMES = ["SMITH", "JOHNSON", "WILLIAMS", "BROWN", "JONES", "GARCIA", "MILLER", "DAVIS", "RODRIGUEZ", "MARTINEZ",
+              "HERNANDEZ", "LOPEZ", "GONZALEZ", "WILSON", "ANDERSON", "THOMAS", "TAYLOR", "MOORE", "JACKSON", "MARTIN"]
+WORK_ORDER_ISSUES = ["Window", "Heater", "Furniture", "Internet", "Toilet Paper Holder", "Plumbing", "Leak", "Appliance",
+                     "Electrical", "HVAC", "Pest Control", "Lock/Key", "Paint", "Flooring", "Blinds"]
+WORK_ORDER_STATUSES = ["New", "Assigned", "Scheduled", "Waiting", "Work Done", "Completed", "Canceled"]
+
+
+def money(values):
+    """1234.5 -> "1,234.50"; NaN -> empty."""
+    return pd.Series(values).map(lambda v: "" if pd.isna(v) else f"{v:,.2f}")
+
+
+def dates(values):
+    """Timestamps -> MM/DD/YYYY; NaT -> empty. Only the distinct days are formatted."""
+    codes, days = pd.factorize(pd.Series(pd.to_datetime(values)).dt.normalize())
+    labels = np.append(days.strftime("%m/%d/%Y").to_numpy(dtype=object), "")
+    return pd.Series(labels[codes])  # code -1 (NaT) picks the trailing ""
+
+
+def _days(rng, low, high, size):
+    return pd.to_timedelta(rng.integers(low, high, size), unit="D")
+
+
+def generate_units(n_units, rng):
+    """The unit list every report is generated from."""
+    types = UNIT_TYPES.iloc[rng.choice(len(UNIT_TYPES), size=n_units, p=UNIT_TYPES["Share"])].reset_index(drop=True)
+    floors = np.arange(n_units) // 40 + 1
+    return pd.DataFrame({
+        "Unit": [f"{floor}{i % 40 + 1:02d}" for i, floor in enumerate(floors)],
+        "BD/BA": types["BD/BA"],
+        "Sqft": (types["Sqft"] * rng.normal(1, 0.08, n_units)).round().astype(int),
+        "Market Rent": (types["Market Rent"] * rng.normal(1, 0.05, n_units)).round(),
+    })
+
+
+def generate_rent_roll(units, as_of, rng):
+    """Rent roll (Tenant Data, T_rent, Beg Year, Sameday layout) as of a date."""
+    n = len(units)
+    as_of = pd.Timestamp(as_of)
+    status = rng.choice(list(STATUS_SHARES), size=n, p=list(STATUS_SHARES.values()))
+    occupied = np.isin(status, ["Current", "Notice-Unrented"])
+
+    move_in = as_of - _days(rng, 30, 365 * 12, n)
+    lease_from = np.maximum(as_of - _days(rng, 0, 365, n), move_in)
+    lease_to = lease_from + pd.to_timedelta(rng.choice([365, 395, 730], n) - 1, unit="D")
+    month_to_month = rng.random(n) < 0.1
+    rent = (units["Market Rent"] * rng.normal(0.97, 0.05, n)).round()
+    past_due = np.where(rng.random(n) < 0.1, rng.gamma(2, 300, n).round(2), 0.0)
+    late_count = np.where(rng.random(n) < 0.15, rng.poisson(2, n), 0)
+    names = pd.Series(rng.choice(FIRST_NAMES, n)) + " " + pd.Series(rng.choice(LAST_NAMES, n))
+
+    return pd.DataFrame({
+        "Unit": units["Unit"],
+        "Tags": "",
+        "BD/BA": units["BD/BA"],
+        "Tenant": names.where(occupied, ""),
+        "Status": status,
+        "Sqft": units["Sqft"].map("{:,}".format),
+        "Market Rent": money(units["Market Rent"]),
+        "Rent": money(np.where(occupied, rent, np.nan)),
+        "Deposit": money(np.where(occupied, (rent * 0.8).round(), 0)),
+        "Deposit Authorized": money(np.zeros(n)),
+        "Lease From": dates(pd.Series(lease_from).where(occupied)),
+        "Lease To": dates(pd.Series(lease_to).where(occupied & ~month_to_month)),
+        "Move-in": dates(pd.Series(move_in).where(occupied)),
+        "Move-out": dates(pd.Series(as_of + _days(rng, 1, 60, n)).where(status == "Notice-Unrented")),
+        "Past Due": money(np.where(occupied, past_due, np.nan)),
+        "NSF Count": np.where(occupied, rng.poisson(0.05, n), 0),
+        "Late Count": np.where(occupied, late_count, 0),
+    })[TENANT_COLUMNS]
+
+
+def generate_vacancies(units, rent_roll, as_of, rng):
+    """Unit Vacancy Detail for the vacant and on-notice units of a rent roll."""
+    as_of = pd.Timestamp(as_of)
+    vacant = rent_roll["Status"].isin(["Vacant-Unrented", "Vacant-Rented", "Notice-Unrented"]).to_numpy()
+    units, status = units[vacant].reset_index(drop=True), rent_roll.loc[vacant, "Status"].reset_index(drop=True)
+    n = len(units)
+
+    days_vacant = rng.integers(0, 300, n)
+    last_move_out = as_of - pd.to_timedelta(days_vacant, unit="D")
+    on_notice = (status == "Notice-Unrented").to_numpy()
+    last_move_out = pd.Series(last_move_out).where(~on_notice, as_of + _days(rng, 1, 60, n))
+    last_rent = (units["Market Rent"] * rng.normal(0.97, 0.05, n)).round()
+
+    return pd.DataFrame({
+        "Unit": units["Unit"],
+        "Tags": "",
+        "Bed/Bath": units["BD/BA"].str.replace("--/", "", regex=False).replace("--", ""),
+        "Sqft": units["Sqft"].map("{:,}".format),
+        "Unit Status": status,
+        "Rent Ready": rng.choice(["Yes", "No"], n),
+        "Days Vacant": np.where(on_notice, 0, days_vacant),
+        "Last Rent": money(last_rent),
+        "Scheduled Rent": money(units["Market Rent"]),
+        "New Rent": "",
+        "Last Move In": dates(last_move_out - _days(rng, 180, 2000, n)),
+        "Last Move Out": dates(last_move_out),
+        "Available On": dates(last_move_out + pd.Timedelta(days=10)),
+        "Next Move In": dates(pd.Series(as_of + _days(rng, 1, 45, n)).where((status == "Vacant-Rented").to_numpy())),
+        "Description": "",
+    })[VACANCY_COLUMNS]
+
+
+def generate_work_orders(units, as_of, rng, years=3, per_unit_per_year=3, properties=(PROPERTY_NAME,)):
+    """Work order history over the last `years` years; older orders are mostly closed."""
+    as_of = pd.Timestamp(as_of)
+    n = int(len(units) * years * per_unit_per_year)
+    age_days = rng.integers(0, 365 * years, n)
+    created = as_of - pd.to_timedelta(age_days, unit="D")
+    # Orders older than a month are almost always closed
+    closed = rng.random(n) < np.where(age_days > 30, 0.97, 0.3)
+    status = np.where(closed, rng.choice(["Completed", "Completed", "Completed", "Canceled"], n),
+                      rng.choice(["New", "Assigned", "Scheduled", "Waiting"], n))
+    completed = pd.Series(created + pd.to_timedelta(rng.gamma(1.5, 4, n).round(), unit="D")).where(status == "Completed")
+    issue = rng.choice(WORK_ORDER_ISSUES, n)
+    unit = rng.choice(units["Unit"].to_numpy(), n)
+    amount = np.where(status == "Completed", rng.gamma(1.2, 150, n).round(2), 0.0)
+
+    return pd.DataFrame({
+        "Property": rng.choice(list(properties), n),
+        "Priority": rng.choice(["Normal", "Urgent"], n, p=[0.95, 0.05]),
+        "Work Order Type": rng.choice(["Resident", "Internal"], n, p=[0.6, 0.4]),
+        "Home Warranty Expiration": "",
+        "Work Order Number": [f"{i + 1000}-1" for i in range(n)],
+        "Job Description": pd.Series(issue).str.lower().radd("Please fix the ") + " in unit " + pd.Series(unit),
+        "Instructions": "",
+        "Status": status,
+        "Vendor": "",
+        "Unit": unit,
+        "Primary Resident": pd.Series(rng.choice(LAST_NAMES, n)).str.title() + ", " + pd.Series(rng.choice(FIRST_NAMES, n)).str.title(),
+        "Created At": dates(created),
+        **{column: "" for column in ["Estimate Req On", "Estimated On", "Estimate Amount", "Estimate Approval Status",
+                                     "Estimate Approved On", "Estimate Approval Last Requested On", "Scheduled Start",
+                                     "Scheduled End", "Work Done On"]},
+        "Completed On": dates(completed),
+        "Amount": money(amount),
+        "Invoice": "",
+        "Unit Turn ID": "",
+        "Recurring": "No",
+        "Work Order Issue": pd.Series(issue).where(rng.random(n) < 0.6, ""),
+    })[WORK_ORDER_COLUMNS]
+
+
+def write_raw_export(df, path, totals, property_name=PROPERTY_NAME):
+    """
+    Write df the way AppFolio exports it: header, blank line, property row, rows,
+    totals row, blank line, "Total" row. `totals` maps column -> value for the totals rows.
+    """
+    columns = list(df.columns)
+    total_row = [totals.get(column, "") for column in columns]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        f.write("\n")
+        f.write(",".join([f'"-> {property_name}"'] + ['""'] * (len(columns) - 1)) + "\n")  # Every field quoted, like AppFolio
+        df.to_csv(f, header=False, index=False)
+        writer.writerow(total_row)
+        f.write("\n")
+        writer.writerow([f"Total {total_row[0]}".strip()] + total_row[1:])
+    return path
+
+
+def _rent_roll_totals(rent_roll):
+    amounts = {column: pd.to_numeric(rent_roll[column].str.replace(",", ""), errors="coerce").sum()
+               for column in ["Market Rent", "Rent", "Deposit", "Past Due"]}
+    occupied = rent_roll["Status"].isin(["Current", "Notice-Unrented", "Notice-Rented"]).mean() * 100
+    return {"Unit": f"{len(rent_roll)} Units", "Status": f"{occupied:.1f}% Occupied",
+            **{column: f"{value:,.2f}" for column, value in amounts.items()}}
+
+
+def generate_exports(n_units, output_dir, as_of=None, seed=0, work_order_years=3):
+    """
+    Write one raw export per report for a portfolio of n_units units.
+    Returns {raw prefix: path}, e.g. {"tenant_data": ".../tenant_data-20250321_115751.csv"}.
+    """
+    rng = np.random.default_rng(seed)
+    as_of = pd.Timestamp(as_of) if as_of is not None else pd.Timestamp.today().normalize()
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    os.makedirs(output_dir, exist_ok=True)
+    units = generate_units(n_units, rng)
+
+    paths = {}
+    # Current rent roll plus the three comparison snapshots (3 months ago, start of year, same day last year)
+    rent_rolls = {
+        "tenant_data": as_of,
+        "t_rent": as_of - pd.DateOffset(months=3),
+        "beg_year": pd.Timestamp(as_of.year, 1, 1),
+        "same_day": as_of - pd.DateOffset(years=1),
+    }
+    for prefix, snapshot_date in rent_rolls.items():
+        rent_roll = generate_rent_roll(units, snapshot_date, rng)
+        paths[prefix] = write_raw_export(rent_roll, raw_export_path(output_dir, prefix, timestamp), _rent_roll_totals(rent_roll))
+        if prefix == "tenant_data":
+            current = rent_roll
+
+    vacancies = generate_vacancies(units, current, as_of, rng)
+    paths["vacancy"] = write_raw_export(vacancies, raw_export_path(output_dir, "vacancy", timestamp), {"Sqft": ""})
+
+    work_orders = generate_work_orders(units, as_of, rng, years=work_order_years)
+    amount_total = pd.to_numeric(work_orders["Amount"].str.replace(",", ""), errors="coerce").sum()
+    paths["work_order"] = write_raw_export(work_orders, raw_export_path(output_dir, "work_order", timestamp),
+                                           {"Amount": f"{amount_total:,.2f}", "Estimate Amount": "0.00"})
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic AppFolio exports")
+    parser.add_argument("--units", type=int, default=10000)
+    parser.add_argument("--output-dir", default=os.path.join("bench_data", "10k"))
+    parser.add_argument("--as-of", default=None, help="Report date (default: today)")
+    parser.add_argument("--work-order-years", type=float, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for prefix, path in generate_exports(args.units, args.output_dir, args.as_of, args.seed, args.work_order_years).items():
+        print(f"{prefix}: {path}")
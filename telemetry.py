@@ -0,0 +1,122 @@
+"""
+Structured step timings for the AppFolio scraper.
+
+Each step (driver start, login, 2FA request, waiting for the code, and per report
+navigate / update / export / download) is written as one JSON line to
+scraper_telemetry.jsonl, timed with time.monotonic() so clock changes don't skew
+durations. Every run ends with a summary event (total time, time per step and per
+report, downloaded bytes). Fixed sleeps between steps aren't inside any step; they
+show up in the summary as "untimed_s".
+
+    python telemetry.py          # per-step durations of the last 10 runs, to compare
+"""
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+TELEMETRY_FILE = "scraper_telemetry.jsonl"
+
+
+class RunTelemetry:
+    """Collects the events of one scraper run and appends them to a JSONL file as they happen."""
+
+    def __init__(self, path=TELEMETRY_FILE, run_id=None):
+        self.path = path
+        self.run_id = run_id or f"{datetime.now():%Y%m%d_%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self.started = time.monotonic()
+        self.steps = []  # (step, report, duration_s, ok) per finished step
+        self.downloaded_bytes = 0
+        self.event("run_start")
+
+    def event(self, name, level=logging.INFO, **fields):
+        """Write one event: run id, wall-clock time, seconds since the run started, plus fields."""
+        record = {
+            "run_id": self.run_id,
+            "event": name,
+            "at": datetime.now().isoformat(timespec="milliseconds"),
+            "t_s": round(time.monotonic() - self.started, 3),
+            **{key: value for key, value in fields.items() if value is not None},
+        }
+        line = json.dumps(record, default=str)
+        logging.log(level, line)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        return record
+
+    @contextmanager
+    def step(self, name, report=None, **fields):
+        """
+        Time a block as one step. Yields a dict; keys added to it (e.g. bytes=...) are logged
+        with the step. An exception marks the step failed, is logged at ERROR and re-raised.
+        """
+        extra = dict(fields)
+        start = time.monotonic()
+        try:
+            yield extra
+        except BaseException as e:
+            self._finish(name, report, start, False, extra, error=f"{type(e).__name__}: {e}")
+            raise
+        self._finish(name, report, start, extra.pop("ok", True), extra)
+
+    def _finish(self, name, report, start, ok, extra, error=None):
+        duration = time.monotonic() - start
+        self.steps.append((name, report, duration, ok))
+        self.downloaded_bytes += extra.get("bytes", 0)
+        self.event("step", level=logging.INFO if ok else logging.ERROR, step=name, report=report,
+                   started_s=round(start - self.started, 3), duration_s=round(duration, 3),
+                   ok=ok, error=error, **extra)
+
+    def summary(self, success, **fields):
+        """Final event of the run: totals per step and per report."""
+        total = time.monotonic() - self.started
+        steps = pd.DataFrame(self.steps, columns=["step", "report", "duration_s", "ok"])
+        per_report = steps.dropna(subset=["report"]).groupby("report", sort=False)["duration_s"].sum()
+        return self.event(
+            "run_summary",
+            level=logging.INFO if success else logging.ERROR,
+            success=success,
+            total_s=round(total, 3),
+            steps_s={step: round(seconds, 3) for step, seconds in steps.groupby("step", sort=False)["duration_s"].sum().items()},
+            reports_s={report: round(seconds, 3) for report, seconds in per_report.items()},
+            downloaded_bytes=self.downloaded_bytes,
+            untimed_s=round(float(total - steps["duration_s"].sum()), 3),
+            failed_steps=[f"{report} / {step}" if report else step
+                          for step, report, _, ok in self.steps if not ok],
+            **fields,
+        )
+
+
+def load_events(path=TELEMETRY_FILE):
+    """Every telemetry event as a DataFrame (one row per JSON line)."""
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    with open(path, encoding="utf-8") as f:
+        return pd.DataFrame([json.loads(line) for line in f if line.strip()])
+
+
+def step_durations(events, last_runs=10):
+    """Seconds per step (rows: step or report/step) for the last runs (columns), to spot regressions."""
+    steps = events[events["event"] == "step"] if len(events) else events
+    if steps.empty:
+        return pd.DataFrame()
+    runs = steps["run_id"].drop_duplicates().tail(last_runs)
+    steps = steps[steps["run_id"].isin(runs)]
+    label = steps["step"].where(steps["report"].isna(), steps["report"].fillna("") + " / " + steps["step"])
+    return steps.assign(label=label).pivot_table(index="label", columns="run_id", values="duration_s", aggfunc="sum", sort=False)
+
+
+if __name__ == "__main__":
+    events = load_events()
+    table = step_durations(events)
+    if table.empty:
+        print(f"No scraper telemetry in {TELEMETRY_FILE} yet.")
+    else:
+        print(table.round(2).to_string())
+        summaries = events[events["event"] == "run_summary"].tail(10)
+        print(summaries[["run_id", "success", "total_s", "untimed_s"]].to_string(index=False))
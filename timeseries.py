@@ -0,0 +1,83 @@
+import pandas as pd
+import os
+
+from dashboard_data import BASE_DIR, CACHE_DIR, OCCUPIED_STATUSES, extract_timestamp_from_filename, to_number
+from snapshot_diff import list_snapshots
+
+TIMESERIES_FILE = os.path.join(CACHE_DIR, "timeseries.csv")
+
+# One row per (snapshot, BD/BA). Rows are only ever appended.
+TIMESERIES_COLUMNS = ["Snapshot", "As Of", "BD/BA", "Units", "Occupied", "Total Rent", "Market Rent"]
+
+
+def snapshot_rows(path):
+    """Units, occupied units, total rent and market rent per BD/BA for one Tenant Data export."""
+    df = pd.read_csv(path, usecols=lambda c: c in ("BD/BA", "Status", "Rent", "Market Rent"))
+    df = df.assign(
+        Occupied=df["Status"].isin(OCCUPIED_STATUSES),
+        Rent=to_number(df["Rent"]),
+        **{"Market Rent": to_number(df["Market Rent"]) if "Market Rent" in df.columns else 0.0},
+    )
+    rows = df.groupby("BD/BA").agg(
+        Units=("Status", "size"),
+        Occupied=("Occupied", "sum"),
+        **{"Total Rent": ("Rent", "sum"), "Market Rent": ("Market Rent", "sum")},
+    ).reset_index()
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    rows.insert(0, "As Of", extract_timestamp_from_filename(os.path.basename(path)))
+    rows.insert(0, "Snapshot", name)
+    return rows[TIMESERIES_COLUMNS]
+
+
+def processed_snapshots(path=TIMESERIES_FILE):
+    """Snapshot names already in the time series (only the Snapshot column is read)."""
+    if not os.path.exists(path):
+        return set()
+    return set(pd.read_csv(path, usecols=["Snapshot"])["Snapshot"])
+
+
+def update_timeseries(base_dir=BASE_DIR, path=TIMESERIES_FILE):
+    """
+    Append rows for Tenant Data exports that aren't in the time series yet.
+    Existing rows are never recomputed, so an update only costs the new exports.
+    Returns the number of snapshots added.
+    """
+    done = processed_snapshots(path)
+    new_files = [f for f in list_snapshots(base_dir) if os.path.splitext(os.path.basename(f))[0] not in done]
+    if not new_files:
+        return 0
+
+    rows = pd.concat([snapshot_rows(f) for f in new_files], ignore_index=True)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    rows.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+    print(f"📈 Added {len(new_files)} snapshot(s) to {path}")
+    return len(new_files)
+
+
+def load_timeseries(path=TIMESERIES_FILE, start=None, end=None):
+    """
+    The time series between start and end (inclusive dates), with a Total row per snapshot
+    and Occupancy Rate (%) / Avg Rent columns added.
+    """
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=TIMESERIES_COLUMNS + ["Occupancy Rate", "Avg Rent"])
+
+    ts = pd.read_csv(path, parse_dates=["As Of"])
+    if start is not None:
+        ts = ts[ts["As Of"] >= pd.Timestamp(start)]
+    if end is not None:
+        ts = ts[ts["As Of"] < pd.Timestamp(end) + pd.Timedelta(days=1)]
+
+    totals = ts.groupby(["Snapshot", "As Of"], as_index=False)[["Units", "Occupied", "Total Rent", "Market Rent"]].sum()
+    totals["BD/BA"] = "Total"
+    ts = pd.concat([ts, totals[TIMESERIES_COLUMNS]], ignore_index=True)
+
+    ts["Occupancy Rate"] = (ts["Occupied"] / ts["Units"] * 100).round(2)
+    ts["Avg Rent"] = (ts["Total Rent"] / ts["Occupied"].where(ts["Occupied"] > 0)).round(2)
+    return ts.sort_values(["As Of", "BD/BA"]).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    update_timeseries()
+    print(load_timeseries().query("`BD/BA` == 'Total'").to_string(index=False))
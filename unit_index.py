@@ -0,0 +1,135 @@
+"""
+Unit dimension shared by Tenant Data, Vacancies and Work Orders.
+
+Every unit name seen in any export gets a stable integer Unit ID in cache/unit_dim.csv
+(IDs are only ever added, never renumbered). At ingest each report's rows are mapped
+to those IDs once, so cross-report questions are integer joins (np.bincount / array
+indexing) instead of string merges on unit names that are spelled slightly
+differently from one export to the next.
+"""
+import pandas as pd
+import numpy as np
+import os
+
+from dashboard_data import CACHE_DIR, OCCUPIED_STATUSES, CLOSED_WORK_ORDER_STATUSES, snapshot_id
+
+UNIT_DIM_FILE = os.path.join(CACHE_DIR, "unit_dim.csv")
+UNIT_INDEX_DIR = os.path.join(CACHE_DIR, "unit_index")
+
+# Reports with a Unit column
+UNIT_REPORTS = ["Tenant Data", "Vacancies", "Work Orders"]
+
+
+def normalize_unit(series):
+    """'  suite  b ' -> 'SUITE B'; missing units stay NaN."""
+    return series.astype("string").str.strip().str.upper().str.replace(r"\s+", " ", regex=True).replace("", pd.NA)
+
+
+def load_unit_dim(path=UNIT_DIM_FILE):
+    if not os.path.exists(path):
+        return pd.DataFrame({"Unit ID": pd.Series(dtype="int32"), "Unit Key": pd.Series(dtype="string"),
+                             "Unit": pd.Series(dtype="string")})
+    return pd.read_csv(path, dtype={"Unit ID": "int32", "Unit Key": "string", "Unit": "string"}, keep_default_na=False)
+
+
+def update_unit_dim(dfs, path=UNIT_DIM_FILE):
+    """Add IDs for unit names not seen before. Existing IDs never change. Returns the full dimension."""
+    dim = load_unit_dim(path)
+    names = pd.concat([dfs[name]["Unit"] for name in UNIT_REPORTS if name in dfs], ignore_index=True).astype("string")
+    seen = pd.DataFrame({"Unit Key": normalize_unit(names), "Unit": names.str.strip()}).dropna()
+    new_units = seen[~seen["Unit Key"].isin(dim["Unit Key"])].drop_duplicates("Unit Key")
+    if new_units.empty:
+        return dim
+
+    new_units.insert(0, "Unit ID", np.arange(len(dim), len(dim) + len(new_units), dtype="int32"))
+    dim = pd.concat([dim, new_units], ignore_index=True)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    dim.to_csv(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+    print(f"🏷️ Added {len(new_units)} unit(s) to {path}")
+    return dim
+
+
+def unit_ids(series, dim):
+    """Unit ID for each row (-1 where there is no unit), via a hash lookup on the normalized name."""
+    keys = pd.Index(dim["Unit Key"])
+    return keys.get_indexer(normalize_unit(series).fillna("")).astype("int32")
+
+
+def build_unit_index(dfs, dim):
+    """{report: int32 array of Unit IDs, one per row} for the reports that have units."""
+    return {name: unit_ids(dfs[name]["Unit"], dim) for name in UNIT_REPORTS if name in dfs}
+
+
+def unit_index_path(files, index_dir=UNIT_INDEX_DIR):
+    return os.path.join(index_dir, f"{snapshot_id({name: files.get(name) for name in UNIT_REPORTS})}.pkl")
+
+
+def load_or_build_unit_index(dfs, files, dim_path=UNIT_DIM_FILE, index_dir=UNIT_INDEX_DIR):
+    """Row -> Unit ID mappings for this snapshot, built once at ingest and read from cache after that."""
+    path = unit_index_path(files, index_dir)
+    if os.path.exists(path):
+        return pd.read_pickle(path)
+
+    index = {"dim": update_unit_dim(dfs, dim_path)}
+    index["rows"] = build_unit_index(dfs, index["dim"])
+    os.makedirs(index_dir, exist_ok=True)
+    pd.to_pickle(index, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return index
+
+
+def unit_table(dfs, index):
+    """
+    One row per unit of the current snapshot with facts from all three reports:
+    Status / Occupied / Rent (Tenant Data), Days Vacant / Rent Ready (Vacancies),
+    Work Orders / Open Work Orders (Work Orders). Built with integer indexing only.
+    Units the append-only dimension still holds but no current report lists are left
+    out, so they don't count as vacant.
+    """
+    dim, rows = index["dim"], index["rows"]
+    n_units = len(dim)
+    table = dim[["Unit ID", "Unit"]].copy()
+
+    def scatter(report, column, fill):
+        values = np.full(n_units, fill, dtype=object)
+        ids = rows[report]
+        has_unit = ids >= 0
+        values[ids[has_unit]] = dfs[report][column].to_numpy()[has_unit]
+        return values
+
+    if "Tenant Data" in rows:
+        table["Status"] = scatter("Tenant Data", "Status", None)
+        table["Rent"] = pd.to_numeric(scatter("Tenant Data", "Rent", np.nan), errors="coerce")
+    table["Occupied"] = table.get("Status", pd.Series(dtype=object)).isin(OCCUPIED_STATUSES)
+
+    if "Vacancies" in rows:
+        table["Days Vacant"] = pd.to_numeric(scatter("Vacancies", "Days Vacant", np.nan), errors="coerce")
+        table["Rent Ready"] = scatter("Vacancies", "Rent Ready", None)
+
+    if "Work Orders" in rows:
+        ids = rows["Work Orders"]
+        is_open = ~dfs["Work Orders"]["Status"].isin(CLOSED_WORK_ORDER_STATUSES).to_numpy()
+        table["Work Orders"] = np.bincount(ids[ids >= 0], minlength=n_units)
+        table["Open Work Orders"] = np.bincount(ids[(ids >= 0) & is_open], minlength=n_units)
+
+    present = np.zeros(n_units, dtype=bool)
+    for ids in rows.values():
+        present[ids[ids >= 0]] = True
+    return table[present].reset_index(drop=True)
+
+
+def work_orders_by_occupancy(table):
+    """Units, work orders and work orders per unit for occupied vs vacant units."""
+    summary = table.groupby(table["Occupied"].map({True: "Occupied", False: "Vacant"})).agg(
+        Units=("Unit ID", "size"),
+        **{"Work Orders": ("Work Orders", "sum"), "Open Work Orders": ("Open Work Orders", "sum")},
+    )
+    summary["Work Orders per Unit"] = (summary["Work Orders"] / summary["Units"]).round(2)
+    return summary.rename_axis("Occupancy").reset_index()
+
+
+def blocked_vacancies(table):
+    """Vacant units that aren't rent ready and still have open work orders, longest vacant first."""
+    blocked = table[(table["Rent Ready"] == "No") & (table["Open Work Orders"] > 0)]
+    return blocked[["Unit", "Days Vacant", "Open Work Orders"]].sort_values("Days Vacant", ascending=False)
@@ -0,0 +1,98 @@
+"""
+Work order aging and SLA metrics.
+
+Built from the per-order state kept by work_order_stream (status, priority, type,
+Created At, Completed On), not from the raw export. The state only holds the orders
+of the current export (orders AppFolio no longer lists have been closed and are
+dropped), so open and past-SLA counts don't pile up across snapshots. The index is computed once per
+state version, stored in cache/work_orders/, and is sorted by open/closed and
+priority, so every metric below is a groupby over a few compact columns.
+"""
+import pandas as pd
+import numpy as np
+import os
+import hashlib
+
+from dashboard_data import CLOSED_WORK_ORDER_STATUSES
+from work_order_stream import WORK_ORDER_STATE_FILE, STATE_VERSION
+
+SLA_INDEX_DIR = os.path.dirname(WORK_ORDER_STATE_FILE)
+
+# Days allowed from Created At to Completed On, per priority
+SLA_DAYS = {"Urgent": 1, "High": 3, "Normal": 7, "Low": 14}
+DEFAULT_SLA_DAYS = 7
+
+AGE_BUCKETS = [-np.inf, 2, 7, 14, 30, np.inf]
+AGE_LABELS = ["0-2 days", "3-7 days", "8-14 days", "15-30 days", "30+ days"]
+
+TIME_TO_CLOSE_PERCENTILES = [50, 90, 95]
+
+
+def build_sla_index(orders, as_of, sla_days=SLA_DAYS):
+    """One row per work order with Open, Age Days, Days To Close, SLA Days and Breached."""
+    as_of = pd.Timestamp(as_of).normalize()
+    created = orders["Created At"]
+    completed = orders["Completed On"]
+    is_open = ~orders["Status"].isin(CLOSED_WORK_ORDER_STATUSES).to_numpy()
+
+    index = pd.DataFrame({
+        "Open": is_open,
+        "Priority": pd.Categorical(orders["Priority"].fillna("Normal")),
+        "Work Order Type": pd.Categorical(orders["Work Order Type"].fillna("Unknown")),
+        "Status": pd.Categorical(orders["Status"].fillna("Unknown")),
+        "Created At": created.to_numpy(),
+        "Age Days": (as_of - created).dt.days.to_numpy(dtype="float32"),
+        "Days To Close": np.where(is_open, np.nan, (completed - created).dt.days).astype("float32"),
+    }, index=orders.index)
+    index["SLA Days"] = index["Priority"].map(sla_days).astype("float32").fillna(DEFAULT_SLA_DAYS)
+    # Open orders breach once they're older than the SLA; closed ones if they took longer
+    elapsed = np.where(index["Open"], index["Age Days"], index["Days To Close"])
+    index["Breached"] = elapsed > index["SLA Days"].to_numpy()
+    index["Age Bucket"] = pd.cut(index["Age Days"].where(index["Open"]), AGE_BUCKETS, labels=AGE_LABELS)
+    return index.sort_values(["Open", "Priority"], ascending=[False, True], kind="stable")
+
+
+def sla_index_path(source, as_of, index_dir=SLA_INDEX_DIR):
+    """Cache file for a state version (work_order_stream.source_signature of its export) and as-of date."""
+    key = hashlib.sha1(f"{STATE_VERSION}|{source or ('', 0, 0)}|{pd.Timestamp(as_of).date()}".encode("utf-8")).hexdigest()[:12]
+    return os.path.join(index_dir, f"sla_{key}.pkl")
+
+
+def load_or_build_sla_index(state, as_of, index_dir=SLA_INDEX_DIR):
+    """SLA index for the orders in the current export (the state's source) and as-of date."""
+    path = sla_index_path(state["source"], as_of, index_dir)
+    if os.path.exists(path):
+        return pd.read_pickle(path)
+
+    index = build_sla_index(state["orders"], as_of)
+    os.makedirs(index_dir, exist_ok=True)
+    index.to_pickle(path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return index
+
+
+def aging_table(index, by="Priority"):
+    """Open work orders per age bucket, one row per `by` value (Priority or Work Order Type)."""
+    open_orders = index[index["Open"]]
+    return pd.crosstab(open_orders[by], open_orders["Age Bucket"]).reindex(columns=AGE_LABELS, fill_value=0)
+
+
+def sla_summary(index):
+    """Per priority: open, open past SLA, closed, closed late, % closed on time and time-to-close percentiles."""
+    grouped = index.groupby("Priority", observed=True)
+    summary = pd.DataFrame({
+        "SLA Days": grouped["SLA Days"].first(),
+        "Open": grouped["Open"].sum(),
+        "Open Past SLA": (index["Open"] & index["Breached"]).groupby(index["Priority"], observed=True).sum(),
+        "Closed": (~index["Open"]).groupby(index["Priority"], observed=True).sum(),
+        "Closed Late": (~index["Open"] & index["Breached"]).groupby(index["Priority"], observed=True).sum(),
+    })
+    summary["On Time %"] = (100 - summary["Closed Late"] / summary["Closed"].where(summary["Closed"] > 0) * 100).round(1)
+
+    closed = index[~index["Open"]].dropna(subset=["Days To Close"])
+    if len(closed):
+        percentiles = closed.groupby("Priority", observed=True)["Days To Close"].quantile(
+            [p / 100 for p in TIME_TO_CLOSE_PERCENTILES]).unstack()
+        percentiles.columns = [f"P{p} Days To Close" for p in TIME_TO_CLOSE_PERCENTILES]
+        summary = summary.join(percentiles)
+    return summary.reset_index()
@@ -0,0 +1,169 @@
+"""
+Bounded-memory aggregation of the Work Orders export.
+
+The export is read in chunks and folded into running counters (type, issue,
+priority, status, Amount sums). Alongside the counters we keep one small row per
+work order (a fingerprint of the row plus the fields the counters and the SLA view
+need), persisted in cache/work_orders/state.pkl. On the next export only orders
+that are new or whose fingerprint changed touch the counters: a changed order's
+old contribution is subtracted and the new one added. AppFolio's export only lists
+current (open) orders, so an order missing from a new export has been closed: its
+contribution is subtracted and it is dropped from the state. The counters and the
+state therefore always describe the latest export.
+"""
+import pandas as pd
+import numpy as np
+import os
+
+from dashboard_data import CACHE_DIR, to_number
+
+WORK_ORDER_STATE_FILE = os.path.join(CACHE_DIR, "work_orders", "state.pkl")
+CHUNK_SIZE = 50_000
+
+# Columns counted per value
+COUNTED_COLUMNS = ["Work Order Type", "Work Order Issue", "Priority", "Status"]
+# Per-order fields kept in the state (besides the fingerprint)
+STATE_COLUMNS = COUNTED_COLUMNS + ["Amount", "Created At", "Completed On"]
+KEY = "Work Order Number"
+STATE_VERSION = 2  # States saved before orders were dropped kept closed orders forever; rebuilt from scratch
+
+
+def empty_state():
+    return {
+        "version": STATE_VERSION,
+        "source": None,  # (path, size, mtime) of the last export folded in
+        "orders": pd.DataFrame(columns=["Fingerprint"] + STATE_COLUMNS, index=pd.Index([], name=KEY)),
+        "counts": {column: pd.Series(dtype="int64") for column in COUNTED_COLUMNS},
+        "amount_by_type": pd.Series(dtype="float64"),
+        "amount_total": 0.0,
+    }
+
+
+def load_state(path=WORK_ORDER_STATE_FILE):
+    state = pd.read_pickle(path) if os.path.exists(path) else None
+    return state if state is not None and state.get("version") == STATE_VERSION else empty_state()
+
+
+def save_state(state, path=WORK_ORDER_STATE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pd.to_pickle(state, path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+
+def source_signature(csv_path):
+    stat = os.stat(csv_path)
+    return (os.path.abspath(csv_path), stat.st_size, stat.st_mtime)
+
+
+def _add_counts(counter, values, sign):
+    return counter.add(sign * values.value_counts(), fill_value=0).astype("int64")
+
+
+def _update_counters(state, added, removed):
+    """Add the contribution of `added` orders to the counters and subtract that of `removed` ones."""
+    for column in COUNTED_COLUMNS:
+        counter = _add_counts(state["counts"][column], added[column], 1)
+        state["counts"][column] = _add_counts(counter, removed[column], -1)
+    state["amount_by_type"] = (
+        state["amount_by_type"]
+        .add(added.groupby("Work Order Type")["Amount"].sum(), fill_value=0)
+        .sub(removed.groupby("Work Order Type")["Amount"].sum(), fill_value=0)
+    )
+
+    state["amount_total"] += added["Amount"].sum() - removed["Amount"].sum()
+
+
+def fold_chunk(state, chunk):
+    """Fold one chunk of raw export rows into state. Returns (new orders, changed orders)."""
+    chunk = chunk.dropna(subset=[KEY]).drop_duplicates(KEY, keep="last").set_index(KEY)
+    chunk = chunk.reindex(columns=STATE_COLUMNS)
+    chunk["Fingerprint"] = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+    chunk["Amount"] = to_number(chunk["Amount"]).fillna(0)
+    for column in ["Created At", "Completed On"]:
+        chunk[column] = pd.to_datetime(chunk[column], format="%m/%d/%Y", errors="coerce")
+    chunk[COUNTED_COLUMNS] = chunk[COUNTED_COLUMNS].astype("string")
+
+    orders = state["orders"]
+    previous = orders["Fingerprint"].reindex(chunk.index)
+    is_new = previous.isna().to_numpy()
+    is_changed = ~is_new & (previous.to_numpy() != chunk["Fingerprint"].to_numpy())
+    if not (is_new | is_changed).any():
+        return 0, 0
+
+    added = chunk[is_new | is_changed]
+    removed = orders.loc[chunk.index[is_changed]]
+    _update_counters(state, added, removed)
+
+    # Changed orders are overwritten in place, new ones appended
+    columns = ["Fingerprint"] + STATE_COLUMNS
+    if is_changed.any():
+        orders.loc[removed.index, columns] = chunk.loc[removed.index, columns]
+    new_rows = chunk.loc[is_new, columns]
+    state["orders"] = pd.concat([orders, new_rows]) if len(orders) else new_rows
+    return int(is_new.sum()), int(is_changed.sum())
+
+
+def drop_orders(state, keys):
+    """Take orders that are no longer in the export out of the counters and the state. Returns how many."""
+    removed = state["orders"].loc[state["orders"].index.intersection(keys)]
+    if len(removed):
+        _update_counters(state, removed.iloc[:0], removed)
+        state["orders"] = state["orders"].drop(removed.index)
+    return len(removed)
+
+
+def update_work_order_state(csv_path, state_path=WORK_ORDER_STATE_FILE, chunksize=CHUNK_SIZE):
+    """
+    Fold a (cleaned) Work Orders CSV into the persisted counters, chunk by chunk.
+    An export that was already folded in is skipped without being read.
+    """
+    state = load_state(state_path)
+    source = source_signature(csv_path)
+    if state["source"] == source:
+        return state
+
+    new_orders = changed_orders = 0
+    seen = []  # Order numbers in this export
+    reader = pd.read_csv(csv_path, chunksize=chunksize, dtype=str,
+                         usecols=lambda column: column == KEY or column in STATE_COLUMNS)
+    for chunk in reader:
+        seen.append(chunk[KEY].dropna())
+        new, changed = fold_chunk(state, chunk)
+        new_orders += new
+        changed_orders += changed
+
+    # The export is complete, so whatever it no longer lists was closed in AppFolio
+    seen = pd.concat(seen) if seen else pd.Series(dtype=str)
+    dropped_orders = drop_orders(state, state["orders"].index.difference(seen))
+
+    # Drop counters that went back to zero after changes
+    state["counts"] = {column: counts[counts != 0] for column, counts in state["counts"].items()}
+    state["source"] = source
+    save_state(state, state_path)
+    print(f"🔧 Work orders: {new_orders} new, {changed_orders} changed, {dropped_orders} closed, "
+          f"{len(state['orders'])} in the export")
+    return state
+
+
+def counts_table(state, column, count_label="Count"):
+    """Counter for one column as a value_counts-style [column, count_label] table, largest first."""
+    counts = state["counts"][column].sort_values(ascending=False, kind="stable")
+    return counts.rename_axis(column).reset_index(name=count_label)
+
+
+def totals(state):
+    """Totals the Work Orders metric cards need, from the state instead of the export."""
+    return {
+        "Total Workorder": len(state["orders"]),
+        "New work orders": int(state["counts"]["Status"].get("New", 0)),
+        "Urgent Work Orders": int(state["counts"]["Priority"].get("Urgent", 0)),
+        "Total Amounts": float(np.round(state["amount_total"], 2)),
+    }
+
+
+if __name__ == "__main__":
+    from dashboard_data import find_latest_files
+
+    state = update_work_order_state(find_latest_files()["Work Orders"])
+    print(counts_table(state, "Work Order Type").to_string(index=False))
+    print(totals(state))